@@ -0,0 +1,13 @@
+# azhar: the language implementation; azhar.compile() is the embedding API
+# (see azhar/embed.py), everything else is reached through its modules.
+#
+# The API is imported on first use: `import azhar.cli` (every run, every
+# `azhar check` worker) must not pay for loading the embedding layer.
+
+__all__ = ["compile", "CompiledProgram"]
+
+def __getattr__(name):
+    if name in __all__:
+        from azhar import embed
+        return getattr(embed, name)
+    raise AttributeError(f"module 'azhar' has no attribute '{name}'")
@@ -0,0 +1,196 @@
+# azhar/arrays.py
+
+import operator
+from array import array
+from itertools import repeat
+from azhar.errors import RuntimeErrorEx
+
+# Run-time side of the array types. `int[]` and `bool[]` keep their elements
+# unboxed in an array.array (8 bytes per int, 1 per bool) rather than as a
+# list of Python objects; `string[]` is a list. Arrays are passed and
+# assigned by reference.
+#
+# The type checker picks the function for each operation from the static
+# type and stores it on the node (`node.op`), as it does for operators, so
+# engines just call it: constructors take the elements, `get` the array and
+# an index, `put` the array, an index and a value.
+
+INT_RANGE = "int[] elements must fit in 64 bits"
+
+class IntArray(array):
+    __slots__ = ()
+    def __new__(cls, values=()):
+        return array.__new__(cls, 'q', values)
+    def __str__(self):
+        return f"[{', '.join(map(str, self))}]"
+
+class BoolArray(array):
+    __slots__ = ()
+    def __new__(cls, values=()):
+        return array.__new__(cls, 'b', values)
+    def __str__(self):
+        return f"[{', '.join(str(v == 1) for v in self)}]"
+
+class StringArray(list):
+    __slots__ = ()
+    def __str__(self):
+        return f"[{', '.join(map(str, self))}]"
+
+def int_array(*values):
+    try:
+        return IntArray(values)
+    except OverflowError:
+        raise RuntimeErrorEx(INT_RANGE) from None
+
+def bool_array(*values):
+    return BoolArray(values)
+
+def string_array(*values):
+    return StringArray(values)
+
+def out_of_range(items, index):
+    return RuntimeErrorEx(f"index {index} out of range for an array of length {len(items)}")
+
+def get(items, index):
+    if index >= 0:   # a negative index would silently count from the end
+        try:
+            return items[index]
+        except IndexError:
+            pass
+    raise out_of_range(items, index)
+
+def get_bool(items, index):
+    return get(items, index) == 1
+
+def put(items, index, value):
+    if index >= 0:
+        try:
+            items[index] = value
+            return None
+        except IndexError:
+            pass
+        except OverflowError:
+            raise RuntimeErrorEx(INT_RANGE) from None
+    raise out_of_range(items, index)
+
+def append(items, value):
+    try:
+        items.append(value)
+    except OverflowError:
+        raise RuntimeErrorEx(INT_RANGE) from None
+
+# Bulk operations (registered as built-in functions in azhar.builtins): one
+# call does the whole array natively instead of the engine interpreting a
+# loop. With NumPy installed, an int[] of NUMPY_MIN_LENGTH or more elements
+# is worked on in place through a zero-copy int64 view. NumPy arithmetic
+# wraps around silently on overflow, so it is only used where the operand
+# bounds prove the result fits; otherwise the exact Python version runs.
+# NumPy is optional, and imported only by the first operation that could use
+# it: most runs never get there, and importing it costs more than starting one.
+
+INT_MAX = 2**63 - 1
+NUMPY_MIN_LENGTH = 256   # below this, setting up the view costs more than it saves
+
+numpy = None   # the numpy module once imported; False if it is not installed
+
+def load_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:   # every bulk operation has a pure-Python version
+            module = False
+        numpy = module
+    return numpy
+
+def vectorized(items):
+    return type(items) is IntArray and len(items) >= NUMPY_MIN_LENGTH and bool(load_numpy())
+
+def view(items):
+    # int64 ndarray sharing `items`' memory
+    return numpy.frombuffer(items, dtype=numpy.int64)
+
+def bound(items):
+    # largest absolute value in a vectorized int[]
+    v = view(items)
+    return max(-int(v.min()), int(v.max()))
+
+def int_sum(items):
+    if vectorized(items) and bound(items) * len(items) <= INT_MAX:
+        return int(view(items).sum())
+    return sum(items)
+
+def int_min(items):
+    if not items:
+        raise RuntimeErrorEx("min of an empty array")
+    return int(view(items).min()) if vectorized(items) else min(items)
+
+def int_max(items):
+    if not items:
+        raise RuntimeErrorEx("max of an empty array")
+    return int(view(items).max()) if vectorized(items) else max(items)
+
+def sort(items):
+    # in place, ascending
+    if vectorized(items):
+        view(items).sort()
+    elif type(items) is StringArray:
+        items.sort()
+    else:
+        items[:] = type(items)(sorted(items))
+
+def fill(items, value):
+    # every element becomes `value`
+    if type(items) is StringArray:
+        items[:] = [value] * len(items)
+        return
+    try:
+        items[:] = type(items)((value,)) * len(items)
+    except OverflowError:
+        raise RuntimeErrorEx(INT_RANGE) from None
+
+def count(items, value):
+    # elements equal to `value`
+    if vectorized(items) and -INT_MAX - 1 <= value <= INT_MAX:
+        return int(numpy.count_nonzero(view(items) == value))
+    return items.count(value)
+
+def int_range(start, stop=None):
+    # range(n): 0 .. n-1; range(a, b): a .. b-1
+    if stop is None:
+        start, stop = 0, start
+    try:
+        if stop - start >= NUMPY_MIN_LENGTH and load_numpy():
+            return IntArray(numpy.arange(start, stop, dtype=numpy.int64).tobytes())
+        return IntArray(range(start, stop))
+    except OverflowError:
+        raise RuntimeErrorEx(INT_RANGE) from None
+
+def elementwise(op, safe, items, other):
+    # a new int[]: op(items[i], other[i]), or op(items[i], other) for an int;
+    # `safe(a, b)` tells if bounds a and b rule out overflow
+    if type(other) is IntArray:
+        if len(other) != len(items):
+            raise RuntimeErrorEx(f"{op.__name__}: arrays of different lengths ({len(items)} and {len(other)})")
+        if vectorized(items) and safe(bound(items), bound(other)):
+            return IntArray(op(view(items), view(other)).tobytes())
+        others = other
+    else:
+        if vectorized(items) and safe(bound(items), abs(other)):
+            return IntArray(op(view(items), other).tobytes())
+        others = repeat(other, len(items))
+    try:
+        return IntArray(map(op, items, others))
+    except OverflowError:
+        raise RuntimeErrorEx(INT_RANGE) from None
+
+def add(items, other):
+    return elementwise(operator.add, lambda a, b: a + b <= INT_MAX, items, other)
+
+def mul(items, other):
+    return elementwise(operator.mul, lambda a, b: a * b <= INT_MAX, items, other)
+
+# array type -> element type, constructor, element getter
+ELEMENT_TYPES = {'int[]': 'int', 'bool[]': 'bool', 'string[]': 'string'}
+CONSTRUCTORS = {'int[]': int_array, 'bool[]': bool_array, 'string[]': string_array}
+GETTERS = {'int[]': get, 'bool[]': get_bool, 'string[]': get}
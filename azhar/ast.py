@@ -1,70 +1,203 @@
 # azhar/ast.py
 
-class Node: pass
+# Nodes use __slots__ (no per-instance __dict__) since large parsed programs
+# stay resident. `_fields` names the attributes holding child nodes.
+# Attributes marked "resolver" are filled in by azhar.resolver, those marked
+# "checker" by azhar.typechecker: an expression's `type_name` ('int', 'bool',
+# 'string', 'void', 'int[]', ...) and, on operators, `op`, the function that
+# computes it (None for the short-circuiting and/or). Array literals, indexing
+# and calls to built-in functions carry an `op` too (see azhar.arrays); on a
+# call to an Azhar function it is None. Literals know their type statically.
+
+class Node:
+    __slots__ = ()
+    _fields = ()
 
 class Program(Node):
-    def __init__(self, statements): self.statements = statements
+    __slots__ = ('statements', 'frame_size', 'prepared')   # frame_size: resolver; prepared: Interpreter.prepare
+    _fields = ('statements',)
+    def __init__(self, statements): self.statements = statements; self.prepared = ()
 
 class Number(Node):
+    __slots__ = ('token', 'value')
+    type_name = 'int'
     def __init__(self, token): self.token = token; self.value = token.value
 
 class String(Node):
+    __slots__ = ('token', 'value')
+    type_name = 'string'
     def __init__(self, token): self.token = token; self.value = token.value
 
 class Bool(Node):
+    __slots__ = ('value', 'line', 'col')
+    type_name = 'bool'
     def __init__(self, value, line, col): self.value = value; self.line = line; self.col = col
 
 class VarAccess(Node):
+    __slots__ = ('name', 'token', 'type_name', 'depth', 'slot')   # type_name: checker; depth, slot: resolver
     def __init__(self, name_token): self.name = name_token.value; self.token = name_token
 
 class VarDecl(Node):
+    __slots__ = ('name', 'name_token', 'type_name', 'type_token', 'value_node', 'slot')   # slot: resolver
+    _fields = ('value_node',)
     def __init__(self, name_token, type_token, value_node):
         self.name = name_token.value; self.name_token = name_token
         self.type_name = type_token.value; self.type_token = type_token
         self.value_node = value_node
 
 class Assign(Node):
+    __slots__ = ('name', 'name_token', 'value_node', 'depth', 'slot')   # depth, slot: resolver
+    _fields = ('value_node',)
     def __init__(self, name_token, value_node):
         self.name = name_token.value; self.name_token = name_token
         self.value_node = value_node
 
 class BinOp(Node):
+    __slots__ = ('left', 'op_token', 'right', 'type_name', 'op')   # type_name, op: checker
+    _fields = ('left', 'right')
     def __init__(self, left, op_token, right):
         self.left = left; self.op_token = op_token; self.right = right
 
 class UnaryOp(Node):
+    __slots__ = ('op_token', 'node', 'type_name', 'op')   # type_name, op: checker
+    _fields = ('node',)
     def __init__(self, op_token, node): self.op_token = op_token; self.node = node
 
 class If(Node):
+    __slots__ = ('cond', 'then_block', 'else_block', 'line', 'col')
+    _fields = ('cond', 'then_block', 'else_block')
     def __init__(self, cond, then_block, else_block, line, col):
         self.cond = cond; self.then_block = then_block; self.else_block = else_block; self.line = line; self.col = col
 
 class While(Node):
+    __slots__ = ('cond', 'body', 'line', 'col')
+    _fields = ('cond', 'body')
     def __init__(self, cond, body, line, col): self.cond = cond; self.body = body; self.line = line; self.col = col
 
+class For(Node):
+    # for name in start .. stop do body end: name runs from start up to stop - 1
+    __slots__ = ('name', 'var_token', 'start', 'stop', 'body', 'line', 'col', 'slot', 'iter_slot')   # slots: resolver
+    _fields = ('start', 'stop', 'body')
+    def __init__(self, var_token, start, stop, body, line, col):
+        self.var_token = var_token; self.name = var_token.value
+        self.start = start; self.stop = stop; self.body = body; self.line = line; self.col = col
+
+class Import(Node):
+    # import "path": `module` (an azhar.modules.Module) is set by the checker
+    __slots__ = ('path', 'line', 'col', 'module')
+    def __init__(self, path, line, col): self.path = path; self.line = line; self.col = col
+
 class Break(Node):
+    __slots__ = ('line', 'col')
     def __init__(self, line, col): self.line = line; self.col = col
 
 class Block(Node):
+    __slots__ = ('statements', 'line', 'col')
+    _fields = ('statements',)
     def __init__(self, statements, line, col): self.statements = statements; self.line = line; self.col = col
 
 class FunctionDef(Node):
+    __slots__ = ('name', 'name_token', 'params', 'return_type_token', 'body', 'line', 'col',
+                 'frame_size', 'pure')   # frame_size: resolver; pure: azhar.purity
+    _fields = ('body',)
     def __init__(self, name_token, params, return_type_token, body, line, col):
         self.name = name_token.value; self.name_token = name_token
         self.params = params; self.return_type_token = return_type_token
         self.body = body; self.line = line; self.col = col
 
 class Call(Node):
+    __slots__ = ('name', 'name_token', 'args', 'type_name', 'op', 'func', 'depth')   # type_name, op: checker; func, depth: resolver
+    _fields = ('args',)
     def __init__(self, name_token, args): self.name = name_token.value; self.name_token = name_token; self.args = args
 
+class ArrayLiteral(Node):
+    __slots__ = ('elements', 'line', 'col', 'type_name', 'op')   # type_name, op: checker
+    _fields = ('elements',)
+    def __init__(self, elements, line, col): self.elements = elements; self.line = line; self.col = col
+
+class MapLiteral(Node):
+    # {k0: v0, k1: v1}: items are k0, v0, k1, v1, evaluated in that order
+    __slots__ = ('items', 'line', 'col', 'type_name', 'op')   # type_name, op: checker
+    _fields = ('items',)
+    def __init__(self, items, line, col): self.items = items; self.line = line; self.col = col
+
+class Index(Node):
+    # target[index]
+    __slots__ = ('target', 'index', 'type_name', 'op')   # type_name, op: checker
+    _fields = ('target', 'index')
+    def __init__(self, target, index): self.target = target; self.index = index
+
+class IndexAssign(Node):
+    # target[index] = value_node
+    __slots__ = ('target', 'index', 'value_node', 'line', 'col', 'op')   # op: checker
+    _fields = ('target', 'index', 'value_node')
+    def __init__(self, target, index, value_node, line, col):
+        self.target = target; self.index = index; self.value_node = value_node; self.line = line; self.col = col
+
 class Return(Node):
+    __slots__ = ('expr', 'line', 'col')
+    _fields = ('expr',)
     def __init__(self, expr, line, col): self.expr = expr; self.line = line; self.col = col
 
 class Print(Node):
+    __slots__ = ('expr', 'line', 'col')
+    _fields = ('expr',)
     def __init__(self, expr, line, col): self.expr = expr; self.line = line; self.col = col
 
 class Output(Node):
+    __slots__ = ('expr', 'line', 'col')
+    _fields = ('expr',)
     def __init__(self, expr, line, col): self.expr = expr; self.line = line; self.col = col
 
 class ReadInput(Node):
+    __slots__ = ('kind', 'line', 'col', 'type_name')   # type_name: checker
     def __init__(self, kind, line, col): self.kind = kind; self.line = line; self.col = col
+
+def iter_child_nodes(node):
+    for field in node._fields:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            yield from value
+        elif value is not None:
+            yield value
+
+def walk(node):
+    # every node under `node` (itself included), in no particular order
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        stack.extend(iter_child_nodes(node))
+        yield node
+
+def label(node):
+    # one-line description of `node` without its children
+    parts = [type(node).__name__]
+    if isinstance(node, FunctionDef):
+        params = ', '.join(f"{n.value}: {t.value}" for n, t in node.params)
+        ret = f" -> {node.return_type_token.value}" if node.return_type_token else ''
+        parts.append(f"{node.name}({params}){ret}")
+    elif isinstance(node, VarDecl):
+        parts.append(f"{node.name}: {node.type_name}")
+    elif isinstance(node, (BinOp, UnaryOp)):
+        parts.append(node.op_token.value)
+    elif isinstance(node, (VarAccess, Assign, Call, For)):
+        parts.append(node.name)
+    elif isinstance(node, Bool):
+        parts.append('true' if node.value else 'false')
+    elif isinstance(node, (Number, String)):
+        parts.append(repr(node.value))
+    elif isinstance(node, ReadInput):
+        parts.append(node.kind)
+    elif isinstance(node, Import):
+        parts.append(repr(node.path))
+    return ' '.join(parts)
+
+def dump(node, indent='  '):
+    # indented tree, one node per line, children in source order
+    lines = []
+    def visit(node, depth):
+        lines.append(indent * depth + label(node))
+        for child in iter_child_nodes(node):
+            visit(child, depth + 1)
+    visit(node, 0)
+    return '\n'.join(lines)
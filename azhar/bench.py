@@ -0,0 +1,197 @@
+# azhar/bench.py — `azhar bench`: time the benchmark suite, phase by phase
+#
+#   azhar bench [program.azhar ...] [--engine E] [--repeat N]
+#               [--baseline PATH] [--save] [--threshold F]
+#
+# Every program in benchmarks/ (plus a large generated one, for the front end)
+# is lexed, parsed, type checked and optimized, then run on each engine; the
+# best of --repeat timings is kept per phase. `name.in` next to a program is
+# its stdin. Reported rates:
+#   tokens/s  tokens produced per second of lexing
+#   nodes/s   AST nodes built per second of parsing
+#   calls/s   Azhar function calls made per second of running
+# Timings are compared against a baseline JSON (benchmarks/baseline.json,
+# written with --save); the exit status is 1 when any of them got slower by
+# more than --threshold.
+
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import time
+from azhar import cache
+from azhar import ast as AST
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.typechecker import TypeChecker
+from azhar.optimizer import Optimizer
+from azhar.engines import ENGINES, make_engine
+from azhar.streams import Output, Input
+from azhar.stats import Stats
+from azhar.version import __version__
+
+SUITE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+BASELINE = os.path.join(SUITE_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.15    # fail when a timing grows by more than 15%...
+NOISE_FLOOR_MS = 1.0        # ...and by at least this much
+GENERATED = 'generated.azhar'
+FRONT_END = ('lex', 'parse', 'typecheck', 'optimize')
+
+FUNCTION = '''function score_{i}(a: int, b: int) -> int do
+    let total: int = a * {i} + b
+    if total > 100 and b != 0 do
+        total = total / b
+    else do
+        total = total - 1
+    end
+    while total > 10 do
+        total = total - score_base(a)
+    end
+    return total
+end
+'''
+
+def generated_source(functions=1000):
+    # front-end workload: many mid-sized functions, few of them called
+    parts = ['function score_base(x: int) -> int do\n    return x + 1\nend\n']
+    parts += [FUNCTION.format(i=i) for i in range(functions)]
+    parts.append('print(score_0(5, 7) + score_1(5, 7))\n')
+    return ''.join(parts)
+
+def suite(paths=None):
+    # -> [(name, source, stdin text)]
+    programs = []
+    for path in paths or sorted(glob.glob(os.path.join(SUITE_DIR, '*.azhar'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        stdin = ''
+        if os.path.exists(os.path.splitext(path)[0] + '.in'):
+            with open(os.path.splitext(path)[0] + '.in', 'r', encoding='utf-8') as f:
+                stdin = f.read()
+        programs.append((os.path.basename(path), source, stdin))
+    if not paths:
+        programs.append((GENERATED, generated_source(), ''))
+    return programs
+
+def front_end(name, source):
+    # -> (program, tokens, nodes, {phase: seconds}), timed as the CLI runs it
+    t0 = time.perf_counter()
+    with cache.paused_gc():
+        tokens = Lexer(source, file=name).tokenize()
+        t1 = time.perf_counter()
+        program = Parser(tokens, file=name).parse()
+    t2 = time.perf_counter()
+    TypeChecker(file=name).check(program)
+    t3 = time.perf_counter()
+    nodes = sum(1 for _ in AST.walk(program))
+    t4 = time.perf_counter()
+    Optimizer().optimize(program)
+    t5 = time.perf_counter()
+    times = {'lex': t1 - t0, 'parse': t2 - t1, 'typecheck': t3 - t2, 'optimize': t5 - t4}
+    return program, len(tokens), nodes, times
+
+def run_once(engine, name, program, stdin, **options):
+    interp = make_engine(engine, file=name, output=Output(io.StringIO()), input=Input(io.StringIO(stdin)),
+                         **options)
+    t0 = time.perf_counter()
+    interp.run(program)
+    return time.perf_counter() - t0
+
+def measure(name, source, stdin, engines, repeat):
+    best = dict.fromkeys(FRONT_END, float('inf'))
+    for _ in range(repeat):
+        program, tokens, nodes, times = front_end(name, source)
+        for phase, seconds in times.items():
+            best[phase] = min(best[phase], seconds)
+    stats = Stats()   # an untimed counting run, for calls/s
+    run_once('tree', name, program, stdin, stats=stats)
+    run = {e: min(run_once(e, name, program, stdin) for _ in range(repeat)) for e in engines}
+    return {'tokens': tokens, 'nodes': nodes, 'calls': stats.calls,
+            'phases_ms': {p: round(s * 1000, 3) for p, s in best.items()},
+            'run_ms': {e: round(s * 1000, 3) for e, s in run.items()}}
+
+def rate(count, ms):
+    return f"{count / ms * 1000:,.0f}" if ms else '-'
+
+def report(results, engines, out=None):
+    out = sys.stdout if out is None else out
+    out.write(f"{'program':<18}{'tokens':>9}" + ''.join(f"{p + ' ms':>14}" for p in FRONT_END)
+              + f"{'tokens/s':>12}{'nodes/s':>12}\n")
+    for name, r in results.items():
+        ph = r['phases_ms']
+        out.write(f"{name:<18}{r['tokens']:>9}" + ''.join(f"{ph[p]:>14.2f}" for p in FRONT_END)
+                  + f"{rate(r['tokens'], ph['lex']):>12}{rate(r['nodes'], ph['parse']):>12}\n")
+    out.write(f"\n{'program':<18}{'calls':>9}" + ''.join(f"{e + ' ms':>14}{'calls/s':>12}" for e in engines) + '\n')
+    for name, r in results.items():
+        cells = ''.join(f"{r['run_ms'][e]:>14.2f}{rate(r['calls'], r['run_ms'][e]):>12}" for e in engines)
+        out.write(f"{name:<18}{r['calls']:>9}{cells}\n")
+
+def timings(result):
+    # {label: ms} for every timing in one program's result
+    flat = dict(result['phases_ms'])
+    flat.update((f"run[{e}]", ms) for e, ms in result['run_ms'].items())
+    return flat
+
+def regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # -> a message per timing that is slower than in `baseline` by more than
+    # `threshold` (a fraction) and NOISE_FLOOR_MS
+    found = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        old = timings(old)
+        for label, ms in timings(result).items():
+            before = old.get(label)
+            if before is not None and ms > before * (1 + threshold) and ms - before >= NOISE_FLOOR_MS:
+                found.append(f"{name} {label}: {before:.2f} ms -> {ms:.2f} ms (+{(ms / before - 1) * 100:.0f}%)")
+    return found
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='azhar bench', description="Time the Azhar benchmark suite.")
+    ap.add_argument('programs', nargs='*', help=f"programs to time (default: {SUITE_DIR}/*.azhar and a generated one)")
+    ap.add_argument('--engine', action='append', choices=sorted(ENGINES),
+                    help="engine to run on; repeat for several (default: all)")
+    ap.add_argument('--repeat', type=int, default=3, help="best-of-N timing (default: 3)")
+    ap.add_argument('--baseline', default=BASELINE, metavar='PATH',
+                    help="results to compare against (default: benchmarks/baseline.json)")
+    ap.add_argument('--save', action='store_true', help="write this run's results to --baseline")
+    ap.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                    help=f"slowdown that counts as a regression, as a fraction (default: {DEFAULT_THRESHOLD})")
+    try:
+        opts = ap.parse_args(argv)
+    except SystemExit as e:
+        return 64 if e.code else 0
+    if opts.repeat < 1 or opts.threshold < 0:
+        print("azhar bench: --repeat must be positive and --threshold not negative", file=sys.stderr)
+        return 64
+    engines = opts.engine or sorted(ENGINES, key=lambda e: e != 'tree')
+    results = {name: measure(name, source, stdin, engines, opts.repeat)
+               for name, source, stdin in suite(opts.programs)}
+    report(results, engines)
+    if opts.save:
+        with open(opts.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'version': __version__, 'python': platform.python_version(), 'results': results},
+                      f, indent=2)
+            f.write('\n')
+        print(f"\nbaseline written to {opts.baseline}")
+        return 0
+    if not os.path.exists(opts.baseline):
+        print(f"\nno baseline at {opts.baseline} (write one with --save)")
+        return 0
+    with open(opts.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    found = regressions(results, baseline, opts.threshold)
+    if found:
+        print(f"\n{len(found)} regression(s) beyond {opts.threshold:.0%} against {opts.baseline}:")
+        for message in found:
+            print(f"  {message}")
+        return 1
+    print(f"\nno regressions beyond {opts.threshold:.0%} against {opts.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,104 @@
 # azhar/builtins.py
 
-import sys
+from azhar import arrays, maps, strings
+from azhar.arrays import ELEMENT_TYPES
 from azhar.errors import RuntimeErrorEx
 
+# Built-in functions, used where no Azhar function of the same name is in
+# scope: name -> signature, a function from the argument types to
+# (result type, operation), or None if it does not take those types. The
+# type checker stores the operation on the Call node, so engines call it
+# directly with the evaluated arguments.
+def len_signature(types):
+    if len(types) == 1 and (types[0] in ELEMENT_TYPES or types[0] == 'string' or maps.split(types[0])):
+        return 'int', len
+    return None
+
+def key_signature(result, op):
+    # (map[K]V, K) -> result
+    def signature(types):
+        entry = len(types) == 2 and maps.split(types[0])
+        if entry and entry[0] == types[1]:
+            return result, op
+        return None
+    return signature
+
+def keys_signature(types):
+    entry = len(types) == 1 and maps.split(types[0])
+    if entry:
+        return f"{entry[0]}[]", maps.KEYS[entry[0]]
+    return None
+
+def values_signature(types):
+    entry = len(types) == 1 and maps.split(types[0])
+    if entry and entry[1] in maps.VALUES:
+        return f"{entry[1]}[]", maps.VALUES[entry[1]]
+    return None
+
+def element_signature(result, op):
+    # (array, element) -> result
+    def signature(types):
+        if len(types) == 2 and ELEMENT_TYPES.get(types[0]) == types[1]:
+            return result, op
+        return None
+    return signature
+
+def ints_signature(result, op):
+    # (int[]) -> result
+    def signature(types):
+        if types == ['int[]']:
+            return result, op
+        return None
+    return signature
+
+def sort_signature(types):
+    if types in (['int[]'], ['string[]']):
+        return 'void', arrays.sort
+    return None
+
+def substr_signature(types):
+    if types == ['string', 'int', 'int']:
+        return 'string', strings.substr
+    return None
+
+def index_signature(types):
+    if types == ['string', 'string']:
+        return 'int', strings.index
+    return None
+
+def range_signature(types):
+    if types in (['int'], ['int', 'int']):
+        return 'int[]', arrays.int_range
+    return None
+
+def elementwise_signature(op):
+    # (int[], int) or (int[], int[]) -> a new int[]
+    def signature(types):
+        if len(types) == 2 and types[0] == 'int[]' and types[1] in ('int', 'int[]'):
+            return 'int[]', op
+        return None
+    return signature
+
+BUILTIN_FUNCTIONS = {
+    'len': len_signature,                                   # len(a, s or m) -> int
+    'has': key_signature('bool', maps.has),                 # has(m, key) -> bool
+    'delete': key_signature('void', maps.delete),           # delete(m, key); no-op if absent
+    'keys': keys_signature,                                 # keys(m) -> K[], insertion order
+    'values': values_signature,                             # values(m) -> V[], V int, bool or string
+    'substr': substr_signature,                             # substr(s, start, length) -> string
+    'index': index_signature,                               # index(s, sub) -> int, -1 if absent
+    'append': element_signature('void', arrays.append),     # append(a, element)
+    'fill': element_signature('void', arrays.fill),         # fill(a, element): every element
+    'count': element_signature('int', arrays.count),        # count(a, element) -> int
+    'sum': ints_signature('int', arrays.int_sum),           # sum(a) -> int
+    'min': ints_signature('int', arrays.int_min),           # min(a) -> int, a not empty
+    'max': ints_signature('int', arrays.int_max),           # max(a) -> int, a not empty
+    'sort': sort_signature,                                 # sort(a): in place, int[] or string[]
+    'range': range_signature,                               # range(n), range(a, b) -> int[]
+    'add': elementwise_signature(arrays.add),               # add(a, int or int[]) -> int[]
+    'mul': elementwise_signature(arrays.mul),               # mul(a, int or int[]) -> int[]
+}
+
 def install_builtins(env):
     # print, output, read_string, read_int are dispatched in interpreter's Call
     env.set_func('print', ('__builtin__',))
@@ -10,19 +106,20 @@ def install_builtins(env):
     env.set_func('read_string', ('__builtin__',))
     env.set_func('read_int', ('__builtin__',))
 
-def call_builtin(name, args):
+def call_builtin(name, args, out, inp):
+    # `out`, `inp`: the engine's azhar.streams.Output and Input
     if name == 'print':
         if len(args) != 1: raise RuntimeErrorEx("print expects 1 argument")
-        print(args[0]); return None
+        out.write(f"{args[0]}\n"); return None
     if name == 'output':
         if len(args) != 1: raise RuntimeErrorEx("output expects 1 argument")
-        sys.stdout.write(str(args[0])); sys.stdout.flush(); return None
+        out.write(str(args[0])); return None
     if name == 'read_string':
         if len(args) != 0: raise RuntimeErrorEx("read_string takes no arguments")
-        return sys.stdin.readline().rstrip('\n')
+        out.flush()
+        return inp.read_string()
     if name == 'read_int':
         if len(args) != 0: raise RuntimeErrorEx("read_int takes no arguments")
-        s = sys.stdin.readline().strip()
-        try: return int(s)
-        except: raise RuntimeErrorEx("read_int got non-integer input")
+        out.flush()
+        return inp.read_int()
     return None
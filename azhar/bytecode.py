@@ -0,0 +1,61 @@
+# azhar/bytecode.py
+
+# Opcodes. Small ints so the VM loop can compare them cheaply; the most
+# frequently executed ones get the lowest numbers and are tested first.
+LOAD_LOCAL = 0           # arg: slot in the current frame
+LOAD_CONST = 1
+STORE_LOCAL = 2          # arg: slot in the current frame
+BINARY_OP = 3            # arg: a two-argument callable from `operator`
+POP_JUMP_IF_FALSE = 4    # arg: target pc
+JUMP = 5                 # arg: target pc
+LOAD_OUTER = 6           # arg: (depth, slot) in an enclosing frame
+STORE_OUTER = 7          # arg: (depth, slot) in an enclosing frame
+CALL = 8                 # arg: (Code, depth of its static link, argc)
+RETURN = 9
+POP = 10
+UNARY_OP = 11            # arg: a one-argument callable from `operator`
+JUMP_IF_FALSE_OR_POP = 12
+JUMP_IF_TRUE_OR_POP = 13
+PRINT = 14
+OUTPUT = 15
+READ_STRING = 16
+READ_INT = 17
+TAIL_CALL = 18           # arg: as CALL; `return f(...)`, reusing the caller's slot on the call stack
+CALL_BUILTIN = 19        # arg: (callable, argc); built-in functions, array literals and element stores
+GET_RANGE = 20           # arg: slot; pops stop and start, stores iter(range(start, stop)) there
+FOR_ITER = 21            # arg: (iterator slot, variable slot, pc); stores the next value, or jumps when done
+
+OPNAMES = {v: k for k, v in list(globals().items()) if k.isupper() and isinstance(v, int)}
+
+class Code:
+    def __init__(self, name, params=(), frame_size=1):
+        self.name = name
+        self.params = list(params)    # parameter names, in order
+        self.frame_size = frame_size  # slot 0 (static link) + params + locals
+        self.pure = False             # set for pure functions when the VM memoizes
+        self.instructions = []        # list of (opcode, arg)
+
+    def emit(self, op, arg=None):
+        self.instructions.append((op, arg))
+        return len(self.instructions) - 1
+
+    def patch(self, index, target):
+        op, _ = self.instructions[index]
+        self.instructions[index] = (op, target)
+
+    def here(self):
+        return len(self.instructions)
+
+    def disassemble(self):
+        lines = [f"code {self.name}({', '.join(self.params)}) frame={self.frame_size}"]
+        for pc, (op, arg) in enumerate(self.instructions):
+            if op in (CALL, TAIL_CALL):
+                shown = f"{arg[0].name} depth={arg[1]} argc={arg[2]}"
+            elif op == CALL_BUILTIN:
+                shown = f"{arg[0].__name__} argc={arg[1]}"
+            elif callable(arg):
+                shown = getattr(arg, '__name__', repr(arg))
+            else:
+                shown = '' if arg is None else repr(arg)
+            lines.append(f"  {pc:4d} {OPNAMES[op]:<22} {shown}".rstrip())
+        return "\n".join(lines)
@@ -0,0 +1,84 @@
+# azhar/cache.py
+
+import gc
+import hashlib
+import os
+import pickle
+import zlib
+from contextlib import contextmanager
+from azhar import ast as AST
+from azhar.tokens import Token
+from azhar.version import __version__
+
+# On-disk cache of checked programs, next to the script:
+#
+#   dir/script.azhar  ->  dir/__azharcache__/script.azhar.azc
+#   dir/lib.azhar     ->  dir/__azharcache__/lib.azhar.azm   (imported: azhar.modules)
+#
+# An entry is reused only when the source hash and the cache tag both match.
+# The tag covers the Azhar version, CACHE_FORMAT and the slot layout of the
+# AST/Token classes, so entries written by another build are ignored.
+# Failing to read or write the cache is never an error; the front end runs.
+# Entries are zlib-compressed pickles: about the size of the source itself.
+
+CACHE_DIR = '__azharcache__'
+CACHE_FORMAT = 1
+
+def _layout():
+    classes = [Token] + sorted((c for c in vars(AST).values()
+                                if isinstance(c, type) and issubclass(c, AST.Node)),
+                               key=lambda c: c.__name__)
+    return repr([(c.__name__, c.__slots__) for c in classes])
+
+CACHE_TAG = hashlib.sha256(f"{__version__}|{CACHE_FORMAT}|{_layout()}".encode()).hexdigest()[:16]
+
+@contextmanager
+def paused_gc():
+    # Building a large AST allocates hundreds of thousands of objects and none
+    # of them is garbage; left on, the cyclic collector rescans the growing
+    # tree over and over (more than half of load time on big programs).
+    # Nothing is frozen afterwards: this runs inside host processes too
+    # (azhar.compile), whose garbage must stay collectable.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled: gc.enable()
+
+def cache_path(path, ext='.azc'):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR, name + ext)
+
+def source_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load(path, digest, tag="", ext='.azc'):
+    try:
+        with open(cache_path(path, ext), 'rb') as f:
+            data = zlib.decompress(f.read())
+        with paused_gc():
+            entry = pickle.loads(data)
+    except Exception:
+        return None
+    if not isinstance(entry, tuple) or len(entry) != 3:
+        return None
+    entry_tag, entry_digest, program = entry
+    if entry_tag != CACHE_TAG + tag or entry_digest != digest:
+        return None
+    return program
+
+def store(path, digest, program, tag="", ext='.azc'):
+    target = cache_path(path, ext)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        data = pickle.dumps((CACHE_TAG + tag, digest, program), protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(data, 1))
+        os.replace(tmp, target)   # atomic: concurrent runs never see a torn file
+        return True
+    except Exception:  # read-only dir, deeply nested AST (RecursionError), ...
+        try: os.remove(tmp)
+        except OSError: pass
+        return False
@@ -0,0 +1,85 @@
+# azhar/check.py — `azhar check`: type check many files without running them
+#
+#   azhar check <file or directory ...> [-j N]
+#
+# Every .azhar file named, or found under a named directory, is lexed,
+# parsed and type checked (imports included) in a pool of N worker
+# processes. Errors are printed to stderr as each file's result arrives, so
+# the order follows completion, not the command line. Nothing is executed
+# and __azharcache__ is neither read nor written.
+#
+# Exit status: the worst over all files, with the same meaning as when
+# running a script: 0 all clean, 1 an Azhar error, 2 a file not found,
+# 3 anything else (unreadable file, bad encoding, ...); 64 for bad usage.
+
+import argparse
+import multiprocessing
+import os
+import sys
+from azhar import cache
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.typechecker import TypeChecker
+from azhar.modules import Loader
+from azhar.errors import AzharError
+
+def expand(paths):
+    # directories -> the .azhar files under them, sorted; files as given
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d != cache.CACHE_DIR)
+            files += [os.path.join(root, n) for n in sorted(names) if n.endswith('.azhar')]
+    return files
+
+def check_file(path):
+    # -> (path, exit status, message or None); runs in a worker process
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            with cache.paused_gc():
+                program = Parser(Lexer.from_stream(f, file=path).iter_tokens(), file=path).parse()
+        TypeChecker(file=path, loader=Loader(use_cache=False)).check(program)
+        return path, 0, None
+    except AzharError as e:
+        return path, 1, e.render()
+    except FileNotFoundError:
+        return path, 2, f"File not found: {path}"
+    except Exception as e:
+        return path, 3, f"{path}: Error: {e}"
+
+def results(files, jobs):
+    # (path, status, message) per file, as each finishes
+    if jobs == 1 or len(files) < 2:
+        yield from map(check_file, files)
+        return
+    with multiprocessing.Pool(min(jobs, len(files))) as pool:
+        # small chunks keep results flowing; a file's cost is mostly its size
+        yield from pool.imap_unordered(check_file, files, chunksize=max(1, len(files) // (jobs * 8)))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='azhar check', description="Type check Azhar files without running them.")
+    ap.add_argument('paths', nargs='+', help="files, or directories to search for .azhar files")
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, metavar='N',
+                    help="worker processes (default: one per CPU)")
+    try:
+        opts = ap.parse_args(argv)
+    except SystemExit as e:
+        return 64 if e.code else 0
+    if opts.jobs < 1:
+        print("azhar check: -j must be positive", file=sys.stderr)
+        return 64
+    files = expand(opts.paths)
+    status = failed = 0
+    for path, code, message in results(files, opts.jobs):
+        if code:
+            print(message, file=sys.stderr, flush=True)
+            failed += 1
+            status = max(status, code)
+    print(f"{len(files)} file(s) checked, {failed} with errors", file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,231 @@
 # azhar/cli.py
 
+import importlib
+import io
 import sys
+import argparse
+from azhar import cache
 from azhar.lexer import Lexer
 from azhar.parser import Parser
 from azhar.typechecker import TypeChecker
-from azhar.interp import Interpreter
+from azhar.modules import Loader
+from azhar.optimizer import Optimizer, OPT_LEVELS, DEFAULT_OPT_LEVEL
+from azhar import ast as AST
+from azhar.engines import ENGINES, DEFAULT_ENGINE, make_engine
 from azhar.errors import AzharError
+from azhar.streams import Output, DEFAULT_BUFFER_SIZE
+from azhar.vm import DEFAULT_MAX_DEPTH
+from azhar.purity import Memo, DEFAULT_MEMO_SIZE
+from azhar.profiler import Profiler
+from azhar.stats import Stats, timer
 from azhar.repl import start_repl
 
-def run_file(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        src = f.read()
-    lexer = Lexer(src, file=path)
-    tokens = lexer.tokenize()
-    parser = Parser(tokens, file=path)
-    program = parser.parse()
-    tc = TypeChecker(file=path)
-    tc.check(program)
-    interp = Interpreter()
-    interp.run(program)
+# `azhar <command> ...` runs a tool rather than a script: command -> module
+# with a main(argv); imported only when that command is run
+COMMANDS = {
+    'bench': 'azhar.bench',
+    'check': 'azhar.check',
+}
+
+def load_program(path, use_cache=True, opt_level=DEFAULT_OPT_LEVEL, stats=None):
+    # Lex, parse, check and optimize `path`; with `use_cache` the program saved
+    # in __azharcache__ by an earlier run of the same source is reused instead.
+    # `stats`: an azhar.stats.Stats to time each phase into
+    phase = timer(stats)
+    loader = Loader(opt_level, use_cache)   # for imports, cached alike
+    if not use_cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            program = check_stream(f, path, stats, loader)
+        with phase('optimize'):
+            return Optimizer(opt_level).optimize(program)
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = cache.source_hash(data)
+    tag = f"-O{opt_level}"
+    with phase('cache_load'):
+        program = cache.load(path, digest, tag)
+    if program is None:
+        program = check_stream(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'), path, stats, loader)
+        with phase('optimize'):
+            program = Optimizer(opt_level).optimize(program)
+        cache.store(path, digest, program, tag)
+    return program
+
+def check_stream(stream, file, stats=None, loader=None):
+    # `loader`: the azhar.modules.Loader imports go through
+    phase = timer(stats)
+    with cache.paused_gc():
+        lexer = Lexer.from_stream(stream, file=file)
+        if stats is None:
+            program = Parser(lexer.iter_tokens(), file=file).parse()
+        else:
+            # the parser normally pulls tokens as it goes; lexing everything
+            # first is what lets the two be timed apart
+            with phase('lex'):
+                tokens = lexer.tokenize()
+            with phase('parse'):
+                program = Parser(tokens, file=file).parse()
+    with phase('typecheck'):
+        TypeChecker(file=file, loader=loader).check(program)
+    return program
+
+def run_file(path, engine=DEFAULT_ENGINE, use_cache=True, opt_level=DEFAULT_OPT_LEVEL, output=None,
+             stats=None, **options):
+    # options: engine-specific, see azhar.engines.ENGINES
+    program = load_program(path, use_cache, opt_level, stats)
+    if stats is not None:
+        options['stats'] = stats   # runtime counters: see azhar.stats
+    interp = make_engine(engine, file=path, output=output, **options)
+    with timer(stats)('run'):
+        interp.run(program)
+
+def run_stream(stream, file="<stdin>", engine=DEFAULT_ENGINE, opt_level=DEFAULT_OPT_LEVEL, output=None,
+               stats=None, **options):
+    # Parse-as-you-read: each top-level statement is checked and run as soon
+    # as it has been read, so a program can be fed through a pipe or socket.
+    phase = timer(stats)
+    lexer = Lexer.from_stream(stream, file=file)
+    parser = Parser(lexer.iter_tokens(), file=file)
+    tc = TypeChecker(file=file, loader=Loader(opt_level))
+    optimizer = Optimizer(opt_level)
+    if stats is not None:
+        options['stats'] = stats
+    interp = make_engine(engine, file=file, output=output, **options)
+    statements = parser.iter_statements()
+    while True:
+        with phase('parse'):   # lexing included: tokens are read as needed
+            st = next(statements, None)
+        if st is None:
+            break
+        program = AST.Program([st])
+        with phase('typecheck'):
+            tc.check(program)
+        with phase('optimize'):
+            program = optimizer.optimize(program)
+        with phase('run'):
+            interp.run(program)
+
+def build_arg_parser():
+    ap = argparse.ArgumentParser(prog='azhar', description="Run an Azhar script, or start the REPL.")
+    ap.add_argument('script', nargs='?', help="path to a .azhar file, or - to read the program from stdin")
+    ap.add_argument('--engine', choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                    help=f"execution engine (default: {DEFAULT_ENGINE})")
+    ap.add_argument('--no-cache', dest='use_cache', action='store_false',
+                    help="don't read or write the __azharcache__ directory")
+    ap.add_argument('--opt-level', type=int, choices=OPT_LEVELS, default=DEFAULT_OPT_LEVEL,
+                    help=f"0: no optimization, 1: constant folding and dead branches, "
+                         f"2: also algebraic identities and unreachable code (default: {DEFAULT_OPT_LEVEL})")
+    ap.add_argument('--unbuffered', action='store_true',
+                    help="write program output immediately (default: buffer it unless stdout is a terminal)")
+    ap.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE, metavar='N',
+                    help=f"characters of output held before writing (default: {DEFAULT_BUFFER_SIZE})")
+    ap.add_argument('--max-depth', type=int, metavar='N',
+                    help=f"nested calls allowed before a runtime error (vm engine; default: {DEFAULT_MAX_DEPTH})")
+    ap.add_argument('--memoize', action='store_true',
+                    help="answer repeated calls to pure functions from a cache")
+    ap.add_argument('--memo-size', type=int, default=DEFAULT_MEMO_SIZE, metavar='N',
+                    help=f"calls remembered by --memoize (least recently used go first; default: {DEFAULT_MEMO_SIZE})")
+    ap.add_argument('--profile', action='store_true',
+                    help="after the run, print the hottest functions and lines to stderr (tree and closure engines)")
+    ap.add_argument('--profile-stacks', metavar='PATH',
+                    help="with --profile, also write collapsed stacks (for flamegraph tools) to PATH")
+    ap.add_argument('--stats', metavar='PATH',
+                    help="write phase times and runtime counters to PATH as JSON (function calls and call "
+                         "depth on every engine; nodes, environments and variable lookups on tree only, "
+                         "listed as counters_unavailable otherwise)")
+    ap.add_argument('--dump-ast', action='store_true',
+                    help="print the checked and optimized tree instead of running it")
+    return ap
 
 def main():
-    args = sys.argv[1:]
-    if len(args) == 0:
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return importlib.import_module(COMMANDS[sys.argv[1]]).main(sys.argv[2:])
+    try:
+        opts = build_arg_parser().parse_args(sys.argv[1:])
+    except SystemExit as e:
+        return 64 if e.code else 0  # EX_USAGE
+    if opts.script is None:
         start_repl()
         return 0
-    if len(args) == 1:
-        path = args[0]
+    path = opts.script
+    if opts.buffer_size < 1:
+        print("azhar: --buffer-size must be positive", file=sys.stderr)
+        return 64
+    if opts.max_depth is not None and (opts.engine != 'vm' or opts.max_depth < 1):
+        print("azhar: --max-depth takes a positive number and needs --engine=vm", file=sys.stderr)
+        return 64
+    if opts.memo_size < 1:
+        print("azhar: --memo-size must be positive", file=sys.stderr)
+        return 64
+    options = {} if opts.max_depth is None else {'max_depth': opts.max_depth}
+    if opts.memoize:
+        options['memo'] = Memo(opts.memo_size)
+    if opts.profile_stacks and not opts.profile:
+        print("azhar: --profile-stacks needs --profile", file=sys.stderr)
+        return 64
+    if opts.profile:
+        if opts.engine == 'vm':
+            print("azhar: --profile needs --engine=tree or --engine=closure", file=sys.stderr)
+            return 64
+        options['profiler'] = Profiler()
+    stats = Stats() if opts.stats else None
+    if stats is not None:
+        stats.memo = options.get('memo')
+    output = Output(buffered=False if opts.unbuffered else None, buffer_size=opts.buffer_size)
+    try:
+        if opts.dump_ast:
+            if path == '-':
+                loader = Loader(opts.opt_level, opts.use_cache)   # as for a file
+                program = Optimizer(opts.opt_level).optimize(check_stream(sys.stdin, "<stdin>", loader=loader))
+            else:
+                program = load_program(path, opts.use_cache, opts.opt_level)
+            print(AST.dump(program))
+        elif path == '-':
+            run_stream(sys.stdin, engine=opts.engine, opt_level=opts.opt_level, output=output,
+                       stats=stats, **options)
+        else:
+            run_file(path, engine=opts.engine, use_cache=opts.use_cache, opt_level=opts.opt_level,
+                     output=output, stats=stats, **options)
+        status = 0
+    except AzharError as e:
+        print(e.render(), file=sys.stderr)
+        status = 1
+    except FileNotFoundError:
+        print(f"File not found: {path}", file=sys.stderr)
+        status = 2
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        status = 3
+    # reports cover failed runs too
+    if opts.profile:
+        status = write_report(lambda: write_profile(options['profiler'], path, opts.profile_stacks),
+                              opts.profile_stacks, status)
+    if stats is not None:
+        status = write_report(lambda: stats.write(opts.stats, script=path, engine=opts.engine), opts.stats, status)
+    return status
+
+def write_report(write, path, status):
+    # A report that cannot be written is reported, not a traceback: the exit
+    # status becomes 3 unless the run itself already failed.
+    try:
+        write()
+    except OSError as e:
+        print(f"azhar: cannot write {path}: {e.strerror or e}", file=sys.stderr)
+        return status or 3
+    return status
+
+def write_profile(profiler, path, stacks_path=None):
+    source = None
+    if path != '-':
         try:
-            run_file(path)
-            return 0
-        except AzharError as e:
-            print(e.render(), file=sys.stderr)
-            return 1
-        except FileNotFoundError:
-            print(f"File not found: {path}", file=sys.stderr)
-            return 2
-        except Exception as e:
-            print(f"Error: {e}", file=sys.stderr)
-            return 3
-    print("Usage: azhar [script.azhar]", file=sys.stderr)
-    return 64  # EX_USAGE
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        except OSError:
+            pass
+    print(profiler.report(source), file=sys.stderr)
+    if stacks_path:
+        with open(stacks_path, 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
 
 if __name__ == "__main__":
     sys.exit(main())
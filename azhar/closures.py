@@ -0,0 +1,321 @@
+# azhar/closures.py
+
+import operator
+from azhar.errors import RuntimeErrorEx
+from azhar.compiler import EXPRESSIONS
+from azhar.completions import Completion, BREAK
+from azhar.streams import NOT_AN_INT
+from azhar.purity import MISSING
+from azhar.profiler import line_of
+
+# Compiles each AST node once into a Python closure taking the current frame.
+# Operator and node-type dispatch happen here, at compile time, so running
+# the program is just calling the pre-bound closures. Variables are read and
+# written through the (depth, slot) addresses assigned by azhar.resolver.
+# Statement closures return a completion record (azhar.completions).
+
+# The common operators are written out inline rather than called through
+# `node.op`, which saves a call per evaluation.
+INLINE_BINARY = {
+    operator.add: lambda l, r: lambda frame: l(frame) + r(frame),
+    operator.sub: lambda l, r: lambda frame: l(frame) - r(frame),
+    operator.mul: lambda l, r: lambda frame: l(frame) * r(frame),
+    operator.floordiv: lambda l, r: lambda frame: l(frame) // r(frame),
+    operator.eq: lambda l, r: lambda frame: l(frame) == r(frame),
+    operator.ne: lambda l, r: lambda frame: l(frame) != r(frame),
+    operator.lt: lambda l, r: lambda frame: l(frame) < r(frame),
+    operator.le: lambda l, r: lambda frame: l(frame) <= r(frame),
+    operator.gt: lambda l, r: lambda frame: l(frame) > r(frame),
+    operator.ge: lambda l, r: lambda frame: l(frame) >= r(frame),
+}
+
+class Function:
+    def __init__(self, name, frame_size):
+        self.name = name
+        self.frame_size = frame_size
+        self.body = None   # filled in once the body is compiled (allows recursion)
+
+def frame_at(frame, depth):
+    for _ in range(depth):
+        frame = frame[0]
+    return frame
+
+class ClosureCompiler:
+    def __init__(self, file="<stdin>", output=None, input=None, memo=None, profiler=None, stats=None):
+        self.file = file
+        self.output = output  # azhar.streams.Output/Input, opened by the Interpreter
+        self.input = input
+        self.memo = memo      # azhar.purity.Memo for calls to pure functions, or None
+        self.profiler = profiler   # azhar.profiler.Profiler: wrap statements and bodies to report to it
+        self.stats = stats         # azhar.stats.Stats: wrap bodies to count calls into it
+        self.functions = {}   # FunctionDef -> Function, kept across programs (REPL)
+
+    def compile(self, node):
+        m = getattr(self, f'visit_{type(node).__name__}', None)
+        if not m: raise RuntimeErrorEx(f"Internal: cannot compile {type(node).__name__}", self.file)
+        return m(node)
+
+    def compile_program(self, program):
+        return self.statements(program.statements)
+
+    def statement(self, node):
+        c = self.compile(node)
+        if c is None:
+            return c
+        if isinstance(node, EXPRESSIONS):
+            expr = c
+            def discard(frame):
+                expr(frame)  # expression statement: value dropped, completes normally
+            c = discard
+        if self.profiler is not None:
+            c = self.profiled_statement(c, line_of(node))
+        return c
+
+    def profiled_statement(self, run, line):
+        enter, leave = self.profiler.enter_line, self.profiler.leave_line
+        def profiled(frame):
+            enter(line)
+            try:
+                return run(frame)
+            finally:
+                leave()
+        return profiled
+
+    def statements(self, nodes):
+        compiled = (self.statement(st) for st in nodes)
+        stmts = tuple(st for st in compiled if st is not None)
+        if len(stmts) == 1:
+            return stmts[0]
+        def run_stmts(frame):
+            for st in stmts:
+                c = st(frame)
+                if c is not None:
+                    return c
+            return None
+        return run_stmts
+
+    # Expressions
+    def visit_Number(self, node):
+        value = node.value
+        return lambda frame: value
+
+    visit_String = visit_Number
+    visit_Bool = visit_Number
+
+    def visit_VarAccess(self, node):
+        depth, slot = node.depth, node.slot
+        if depth == 0: return lambda frame: frame[slot]
+        if depth == 1: return lambda frame: frame[0][slot]
+        return lambda frame: frame_at(frame, depth)[slot]
+
+    def visit_BinOp(self, node):
+        l = self.compile(node.left)
+        r = self.compile(node.right)
+        op = node.op
+        if op is None:   # and / or
+            if node.op_token.value == 'and':
+                return lambda frame: bool(l(frame)) and bool(r(frame))
+            return lambda frame: bool(l(frame)) or bool(r(frame))
+        inline = INLINE_BINARY.get(op)
+        if inline is not None:
+            return inline(l, r)
+        return lambda frame: op(l(frame), r(frame))
+
+    def visit_UnaryOp(self, node):
+        v = self.compile(node.node)
+        op = node.op
+        if op is operator.neg:
+            return lambda frame: -v(frame)
+        if op is operator.pos:
+            return v
+        return lambda frame: op(v(frame))
+
+    def visit_Call(self, node):
+        if node.op is not None:   # built-in function
+            return self.builtin(node.op, node.args)
+        fn = self.functions[node.func]
+        depth = node.depth
+        args = tuple(self.compile(a) for a in node.args)
+        padding = [None] * (fn.frame_size - 1 - len(args))
+        memo = self.memo
+        if memo is not None and node.func.pure:
+            def memo_call(frame):
+                vals = [a(frame) for a in args]
+                key = (fn, *vals)
+                value = memo.lookup(key)
+                if value is MISSING:
+                    c = fn.body([frame_at(frame, depth), *vals, *padding])
+                    value = None if c is None else c.value
+                    memo.store(key, value)
+                return value
+            return memo_call
+        def call(frame):
+            new = [frame_at(frame, depth)]
+            for a in args:
+                new.append(a(frame))
+            new += padding
+            c = fn.body(new)
+            return None if c is None else c.value
+        return call
+
+    def builtin(self, op, nodes):
+        args = tuple(self.compile(a) for a in nodes)
+        if len(args) == 1:
+            a, = args
+            return lambda frame: op(a(frame))
+        if len(args) == 2:
+            a, b = args
+            return lambda frame: op(a(frame), b(frame))
+        return lambda frame: op(*[a(frame) for a in args])
+
+    def visit_ArrayLiteral(self, node):
+        return self.builtin(node.op, node.elements)
+
+    def visit_MapLiteral(self, node):
+        return self.builtin(node.op, node.items)
+
+    def visit_Index(self, node):
+        target, index = self.compile(node.target), self.compile(node.index)
+        op = node.op
+        return lambda frame: op(target(frame), index(frame))
+
+    def visit_IndexAssign(self, node):
+        target, index, value = self.compile(node.target), self.compile(node.index), self.compile(node.value_node)
+        op = node.op
+        def store(frame):
+            op(target(frame), index(frame), value(frame))
+        return store
+
+    def visit_ReadInput(self, node):
+        out, inp = self.output, self.input
+        if node.kind == 'read_string':
+            def read_string(frame):
+                out.flush()
+                return inp.read_string()
+            return read_string
+        def read_int(frame):
+            out.flush()
+            try: return int(inp.read_string())
+            except ValueError: raise RuntimeErrorEx(NOT_AN_INT)
+        return read_int
+
+    # Statements
+    def visit_VarDecl(self, node):
+        slot = node.slot
+        value = self.compile(node.value_node)
+        def declare(frame):
+            frame[slot] = value(frame)
+        return declare
+
+    def visit_Assign(self, node):
+        depth, slot = node.depth, node.slot
+        value = self.compile(node.value_node)
+        if depth == 0:
+            def assign(frame):
+                frame[slot] = value(frame)
+        else:
+            def assign(frame):
+                frame_at(frame, depth)[slot] = value(frame)
+        return assign
+
+    def visit_Block(self, node):
+        return self.statements(node.statements)
+
+    def visit_If(self, node):
+        cond = self.compile(node.cond)
+        then = self.compile(node.then_block)
+        if node.else_block is None:
+            def run_if(frame):
+                if cond(frame): return then(frame)
+                return None
+            return run_if
+        other = self.compile(node.else_block)
+        def run_if_else(frame):
+            if cond(frame): return then(frame)
+            return other(frame)
+        return run_if_else
+
+    def visit_While(self, node):
+        cond = self.compile(node.cond)
+        body = self.compile(node.body)
+        def run_while(frame):
+            while cond(frame):
+                c = body(frame)
+                if c is not None:
+                    if c is BREAK: break
+                    return c  # return from inside the loop
+            return None
+        return run_while
+
+    def visit_For(self, node):
+        start, stop = self.compile(node.start), self.compile(node.stop)
+        body = self.compile(node.body)
+        slot = node.slot
+        def run_for(frame):
+            for i in range(start(frame), stop(frame)):
+                frame[slot] = i
+                c = body(frame)
+                if c is not None:
+                    if c is BREAK: break
+                    return c  # return from inside the loop
+            return None
+        return run_for
+
+    def visit_Break(self, node):
+        return lambda frame: BREAK
+
+    def visit_Return(self, node):
+        if node.expr is None:
+            done = Completion(None)  # immutable, so one record serves every call
+            return lambda frame: done
+        value = self.compile(node.expr)
+        return lambda frame: Completion(value(frame))
+
+    def visit_FunctionDef(self, node):
+        fn = Function(node.name, node.frame_size)
+        self.functions[node] = fn
+        fn.body = body = self.compile(node.body)
+        if self.profiler is not None:
+            enter, leave = self.profiler.enter, self.profiler.leave
+            def profiled_body(frame):
+                enter(node)
+                try:
+                    return body(frame)
+                finally:
+                    leave()
+            fn.body = profiled_body
+        if self.stats is not None:
+            fn.body = self.counted_body(fn.body)
+        return None  # calls are bound statically by the resolver; nothing runs here
+
+    def counted_body(self, body):
+        stats = self.stats
+        def counted(frame):
+            stats.calls += 1
+            stats.call_depth += 1
+            if stats.call_depth > stats.max_call_depth:
+                stats.max_call_depth = stats.call_depth
+            try:
+                return body(frame)
+            finally:
+                stats.call_depth -= 1
+        return counted
+
+    def visit_Import(self, node):
+        for func in node.module.functions:
+            self.compile(func)
+        return None
+
+    def visit_Print(self, node):
+        expr = self.compile(node.expr)
+        out = self.output
+        def run_print(frame):
+            out.write(f"{expr(frame)}\n")
+        return run_print
+
+    def visit_Output(self, node):
+        expr = self.compile(node.expr)
+        out = self.output
+        def output(frame):
+            out.write(str(expr(frame)))
+        return output
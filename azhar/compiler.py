@@ -0,0 +1,204 @@
+# azhar/compiler.py
+
+import operator
+from azhar import ast as AST
+from azhar.bytecode import *
+from azhar.errors import RuntimeErrorEx
+
+EXPRESSIONS = (AST.Number, AST.String, AST.Bool, AST.VarAccess, AST.BinOp,
+               AST.UnaryOp, AST.Call, AST.ReadInput, AST.ArrayLiteral, AST.MapLiteral, AST.Index)
+
+class Loop:
+    def __init__(self):
+        self.breaks = []   # indices of JUMPs to patch with the loop exit
+
+# Lowers a type-checked, resolved (azhar.resolver) AST.Program to bytecode
+# for azhar.vm.VM
+class Compiler:
+    def __init__(self, file="<stdin>"):
+        self.file = file
+        self.code = None
+        self.loops = []
+        self.codes = {}   # FunctionDef -> Code, kept across programs (REPL)
+
+    def compile_program(self, program):
+        self.code = Code('<program>', frame_size=program.frame_size)
+        self.loops = []
+        for st in program.statements:
+            self.statement(st)
+        self.code.emit(LOAD_CONST, None)
+        self.code.emit(RETURN)
+        return self.code
+
+    def compile(self, node):
+        m = getattr(self, f'visit_{type(node).__name__}', None)
+        if not m: raise RuntimeErrorEx(f"Internal: cannot compile {type(node).__name__}", self.file)
+        return m(node)
+
+    def statement(self, node):
+        self.compile(node)
+        if isinstance(node, EXPRESSIONS):
+            self.code.emit(POP)
+
+    # Expressions
+    def visit_Number(self, node): self.code.emit(LOAD_CONST, node.value)
+    def visit_String(self, node): self.code.emit(LOAD_CONST, node.value)
+    def visit_Bool(self, node): self.code.emit(LOAD_CONST, node.value)
+
+    def visit_VarAccess(self, node):
+        if node.depth == 0:
+            self.code.emit(LOAD_LOCAL, node.slot)
+        else:
+            self.code.emit(LOAD_OUTER, (node.depth, node.slot))
+
+    def visit_BinOp(self, node):
+        if node.op is None:   # and / or
+            self.compile(node.left)
+            op = JUMP_IF_FALSE_OR_POP if node.op_token.value == 'and' else JUMP_IF_TRUE_OR_POP
+            jump = self.code.emit(op)
+            self.compile(node.right)
+            self.code.patch(jump, self.code.here())
+            return
+        self.compile(node.left)
+        self.compile(node.right)
+        self.code.emit(BINARY_OP, node.op)
+
+    def visit_UnaryOp(self, node):
+        self.compile(node.node)
+        if node.op is not operator.pos:   # +x is x
+            self.code.emit(UNARY_OP, node.op)
+
+    def visit_Call(self, node):
+        if node.op is not None:
+            self.builtin(node.op, node.args)
+        else:
+            self.call(node, CALL)
+
+    def builtin(self, op, args):
+        for arg in args:
+            self.compile(arg)
+        self.code.emit(CALL_BUILTIN, (op, len(args)))
+
+    def visit_ArrayLiteral(self, node):
+        self.builtin(node.op, node.elements)
+
+    def visit_MapLiteral(self, node):
+        self.builtin(node.op, node.items)
+
+    def visit_Index(self, node):
+        self.compile(node.target)
+        self.compile(node.index)
+        self.code.emit(BINARY_OP, node.op)
+
+    def visit_IndexAssign(self, node):
+        self.builtin(node.op, (node.target, node.index, node.value_node))
+        self.code.emit(POP)
+
+    def call(self, node, op):
+        for arg in node.args:
+            self.compile(arg)
+        self.code.emit(op, (self.codes[node.func], node.depth, len(node.args)))
+
+    def visit_ReadInput(self, node):
+        self.code.emit(READ_STRING if node.kind == 'read_string' else READ_INT)
+
+    # Statements
+    def visit_VarDecl(self, node):
+        self.compile(node.value_node)
+        self.code.emit(STORE_LOCAL, node.slot)
+
+    def visit_Assign(self, node):
+        self.compile(node.value_node)
+        if node.depth == 0:
+            self.code.emit(STORE_LOCAL, node.slot)
+        else:
+            self.code.emit(STORE_OUTER, (node.depth, node.slot))
+
+    def visit_Block(self, node):
+        for st in node.statements:
+            self.statement(st)
+
+    def visit_If(self, node):
+        self.compile(node.cond)
+        to_else = self.code.emit(POP_JUMP_IF_FALSE)
+        self.compile(node.then_block)
+        if node.else_block:
+            to_end = self.code.emit(JUMP)
+            self.code.patch(to_else, self.code.here())
+            self.compile(node.else_block)
+            self.code.patch(to_end, self.code.here())
+        else:
+            self.code.patch(to_else, self.code.here())
+
+    def visit_While(self, node):
+        start = self.code.here()
+        self.compile(node.cond)
+        to_end = self.code.emit(POP_JUMP_IF_FALSE)
+        loop = Loop()
+        self.loops.append(loop)
+        self.compile(node.body)
+        self.loops.pop()
+        self.code.emit(JUMP, start)
+        end = self.code.here()
+        self.code.patch(to_end, end)
+        for b in loop.breaks:
+            self.code.patch(b, end)
+
+    def visit_For(self, node):
+        # the iterator lives in a frame slot, not on the operand stack, so
+        # leaving the loop (break, return) has nothing to clean up
+        self.compile(node.start)
+        self.compile(node.stop)
+        self.code.emit(GET_RANGE, node.iter_slot)
+        start = self.code.here()
+        to_end = self.code.emit(FOR_ITER)
+        loop = Loop()
+        self.loops.append(loop)
+        self.compile(node.body)
+        self.loops.pop()
+        self.code.emit(JUMP, start)
+        end = self.code.here()
+        self.code.patch(to_end, (node.iter_slot, node.slot, end))
+        for b in loop.breaks:
+            self.code.patch(b, end)
+
+    def visit_Break(self, node):
+        if not self.loops:
+            raise RuntimeErrorEx("'break' outside of a loop", self.file, node.line, node.col)
+        self.loops[-1].breaks.append(self.code.emit(JUMP))
+
+    def visit_Return(self, node):
+        if isinstance(node.expr, AST.Call) and node.expr.op is None:
+            # tail position: the callee replaces this frame instead of
+            # stacking on top of it, and its RETURN goes straight to our caller
+            self.call(node.expr, TAIL_CALL)
+            return
+        if node.expr is None:
+            self.code.emit(LOAD_CONST, None)
+        else:
+            self.compile(node.expr)
+        self.code.emit(RETURN)
+
+    def visit_FunctionDef(self, node):
+        # calls are bound statically (resolver), so a definition emits no code
+        outer = (self.code, self.loops)
+        self.code = Code(node.name, [p[0].value for p in node.params], node.frame_size)
+        self.code.pure = getattr(node, 'pure', False)   # azhar.purity, when it ran
+        self.codes[node] = self.code   # registered first so recursive calls find it
+        self.loops = []
+        self.compile(node.body)
+        self.code.emit(LOAD_CONST, None)
+        self.code.emit(RETURN)
+        self.code, self.loops = outer
+
+    def visit_Import(self, node):
+        for func in node.module.functions:
+            self.compile(func)
+
+    def visit_Print(self, node):
+        self.compile(node.expr)
+        self.code.emit(PRINT)
+
+    def visit_Output(self, node):
+        self.compile(node.expr)
+        self.code.emit(OUTPUT)
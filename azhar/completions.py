@@ -0,0 +1,16 @@
+# azhar/completions.py
+
+# Completion records for `return` and `break`.
+#
+# Statements evaluate to None when control falls through normally. A `return`
+# evaluates to Completion(value) and a `break` to the shared BREAK record;
+# blocks stop at the first non-None completion and hand it to the enclosing
+# loop or call, which consumes it. No Python exception is raised or unwound.
+
+class Completion:
+    __slots__ = ('value',)
+    def __init__(self, value=None): self.value = value
+    def __repr__(self):
+        return "Completion(break)" if self is BREAK else f"Completion(return {self.value!r})"
+
+BREAK = Completion()
@@ -0,0 +1,67 @@
+# azhar/embed.py — running Azhar programs from Python
+#
+#   program = azhar.compile(source, engine='vm')
+#   text = program.run(stdin="5\n")            # output returned as a string
+#   program.run(stdin=request, stdout=reply)   # or read/written from streams
+#
+# compile() lexes, parses, type checks and optimizes once; every run() then
+# starts from the checked program in a context of its own (globals, frames,
+# Output/Input over the streams given), so one CompiledProgram can serve any
+# number of runs, in any order. Nothing goes near sys.stdin or sys.stdout
+# unless they are passed in.
+#
+# Per run, on top of executing the program:
+#   tree     a new Interpreter (an Environment with the built-ins in it)
+#   vm       a new VM around bytecode compiled in compile()
+#   closure  a new Interpreter, which compiles the program to closures again
+#            (they are bound to the run's Output/Input)
+# Scopes and, with a memo, purity are worked out once in compile() too, so
+# runs only read the shared program. A memo passed in is shared by every run.
+
+import io
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.typechecker import TypeChecker
+from azhar.modules import Loader
+from azhar.optimizer import Optimizer, DEFAULT_OPT_LEVEL
+from azhar.engines import ENGINES, DEFAULT_ENGINE, make_engine
+from azhar.streams import Output, Input
+from azhar.vm import VM
+
+def compile(source, file="<string>", engine=DEFAULT_ENGINE, opt_level=DEFAULT_OPT_LEVEL, **options):
+    # `source`: program text, or a readable text stream of it; `file` names
+    # it in errors, and imports are relative to it when it is a real path.
+    # options: engine-specific, see azhar.engines.ENGINES, used by every run.
+    # Raises AzharError for a program that does not check.
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}' (choose from {', '.join(sorted(ENGINES))})")
+    lexer = Lexer(source, file=file) if isinstance(source, str) else Lexer.from_stream(source, file=file)
+    program = Parser(lexer.iter_tokens(), file=file).parse()
+    TypeChecker(file=file, loader=Loader(opt_level)).check(program)
+    return CompiledProgram(Optimizer(opt_level).optimize(program), file, engine, options)
+
+class CompiledProgram:
+    def __init__(self, program, file, engine, options):
+        self.program = program   # checked, optimized and prepared; runs only read it
+        self.file = file
+        self.engine = engine
+        self.options = options
+        if engine == 'vm':
+            self.code = VM(file=file, **options).compile(program)
+        else:
+            self.code = None
+            make_engine(engine, file=file, **options).prepare(program)
+
+    def run(self, stdin=None, stdout=None):
+        # `stdin`: a string or a readable text stream (None: no input);
+        # `stdout`: a writable text stream, or None to have the output returned
+        # as a string. Raises AzharError (RuntimeErrorEx) if the program fails.
+        if stdin is None or isinstance(stdin, str):
+            stdin = io.StringIO(stdin or '')
+        target = io.StringIO() if stdout is None else stdout
+        output, input = Output(target), Input(stdin)
+        if self.code is not None:
+            VM(file=self.file, output=output, input=input, **self.options).run_code(self.code)
+        else:
+            make_engine(self.engine, file=self.file, output=output, input=input, **self.options).run(self.program)
+        return target.getvalue() if stdout is None else None
@@ -0,0 +1,28 @@
+# azhar/engines.py
+
+from azhar.interp import Interpreter
+from azhar.vm import VM
+
+# name -> factory taking the source file name (for diagnostics), the
+# azhar.streams.Output/Input programs print to and read from (None: default
+# ones over sys.stdout/sys.stdin) and engine-specific options
+#   memo: an azhar.purity.Memo answering calls to pure functions (all engines)
+#   profiler: an azhar.profiler.Profiler to report calls and lines to (tree, closure)
+#   stats: an azhar.stats.Stats to count into: calls and call depth (all
+#          engines), also nodes, environments and lookups (tree)
+#   max_depth: nested calls allowed on the VM's explicit call stack (vm only)
+ENGINES = {
+    'tree': lambda file="<stdin>", output=None, input=None, **options:
+        Interpreter(output=output, input=input, **options),
+    'closure': lambda file="<stdin>", output=None, input=None, **options:
+        Interpreter(mode='closure', output=output, input=input, **options),
+    'vm': lambda file="<stdin>", output=None, input=None, **options:
+        VM(file=file, output=output, input=input, **options),
+}
+
+DEFAULT_ENGINE = 'tree'
+
+def make_engine(name=DEFAULT_ENGINE, file="<stdin>", output=None, input=None, **options):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}' (choose from {', '.join(sorted(ENGINES))})")
+    return ENGINES[name](file, output, input, **options)
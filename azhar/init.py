@@ -1 +0,0 @@
-__all__ = ["tokens","errors","ast","lexer","parser","types","builtins","interp","cli","repl"]
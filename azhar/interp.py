@@ -1,9 +1,16 @@
 # azhar/interp.py
 
-import sys
 from azhar.errors import RuntimeErrorEx
 from azhar import ast as AST
 from azhar.builtins import install_builtins, call_builtin
+from azhar.resolver import Resolver
+from azhar.closures import ClosureCompiler
+from azhar.completions import Completion, BREAK
+from azhar.streams import Output, Input
+from azhar import purity
+from azhar.purity import MISSING
+from azhar.profiler import line_of
+from azhar.stats import COUNTERS, CALL_COUNTERS
 
 class Environment:
     def __init__(self, parent=None):
@@ -34,26 +41,138 @@ class Environment:
         if self.parent: return self.parent.get_func(name)
         raise RuntimeErrorEx(f"Undefined function '{name}'")
 
-class ReturnSignal(Exception):
-    def __init__(self, value): self.value = value
-
-class BreakSignal(Exception):
-    pass
+MODES = ('tree', 'closure')
 
 class Interpreter:
-    def __init__(self):
+    # mode 'tree' walks the AST node by node; mode 'closure' first compiles
+    # the whole program to pre-bound Python closures (azhar.closures)
+    def __init__(self, mode='tree', output=None, input=None, memo=None, profiler=None, stats=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown interpreter mode '{mode}'")
+        self.mode = mode
+        self.output = Output() if output is None else output
+        self.input = Input() if input is None else input
+        self.memo = memo   # azhar.purity.Memo: answer calls to pure functions from it
+        self.profiler = profiler   # azhar.profiler.Profiler to report calls and lines to
+        self.stats = stats         # azhar.stats.Stats to count into
         self.global_env = Environment()
         self.current_env = self.global_env
         install_builtins(self.global_env)
+        if mode == 'closure' or memo is not None:
+            self.resolver = Resolver()   # purity analysis needs resolved scopes
+        if mode == 'closure':
+            self.compiler = ClosureCompiler(output=self.output, input=self.input, memo=memo,
+                                            profiler=profiler, stats=stats)
+            self.global_frame = [None]
+            if stats is not None:
+                stats.counted = CALL_COUNTERS
+        elif profiler is not None or stats is not None:
+            # only a profiled or counted run goes through profiled_run() and
+            # counted_run(); run() itself is untouched
+            self.statement_lines = {}   # statement node -> its source line
+            self.function_bodies = {}   # body Block -> its FunctionDef
+            if profiler is not None:
+                self.run = self.profiled_run
+            if stats is not None:
+                self.counted_inner = self.run
+                self.run = self.counted_run
+                stats.counted = COUNTERS
 
     def run(self, node):
         m = getattr(self, f'visit_{type(node).__name__}', None)
         if not m: raise RuntimeErrorEx("Internal: missing interpreter method")
         return m(node)
 
+    def profiled_run(self, node):
+        line = self.statement_lines.get(node)
+        func = self.function_bodies.get(node)
+        if line is None and func is None:
+            return Interpreter.run(self, node)
+        profiler = self.profiler
+        if line is not None: profiler.enter_line(line)
+        if func is not None: profiler.enter(func)
+        try:
+            return Interpreter.run(self, node)
+        finally:
+            if func is not None: profiler.leave()
+            if line is not None: profiler.leave_line()
+
+    def counted_run(self, node):
+        stats = self.stats
+        stats.nodes += 1
+        kind = type(node)
+        if kind is AST.VarAccess or kind is AST.Assign:
+            stats.lookups += 1
+            env, name = self.current_env, node.name
+            while env is not None and name not in env.values:
+                env = env.parent
+                stats.lookup_depth += 1
+        elif kind is AST.Block:
+            stats.environments += 1
+            if node in self.function_bodies:
+                stats.calls += 1
+                stats.environments += 1   # the call's parameter environment
+                stats.call_depth += 1
+                if stats.call_depth > stats.max_call_depth:
+                    stats.max_call_depth = stats.call_depth
+                try:
+                    return self.counted_inner(node)
+                finally:
+                    stats.call_depth -= 1
+        return self.counted_inner(node)
+
+    def index(self, program):
+        # what profiled_run() and counted_run() look for: statements by line,
+        # function bodies
+        for n in AST.walk(program):
+            if isinstance(n, (AST.Program, AST.Block)):
+                for st in n.statements:
+                    self.statement_lines[st] = line_of(st)
+            elif isinstance(n, AST.FunctionDef):
+                self.function_bodies[n.body] = n
+
     def visit_Program(self, node):
-        for st in node.statements:
-            self.run(st)
+        self.output.open()
+        self.input.open()
+        profiler = self.profiler
+        if self.mode == 'tree' and (profiler is not None or self.stats is not None):
+            self.index(node)
+        if profiler is not None:
+            profiler.start()
+        try:
+            self.prepare(node)
+            if self.mode == 'closure':
+                frame = self.global_frame
+                frame.extend([None] * (node.frame_size - len(frame)))
+                self.compiler.compile_program(node)(frame)
+                return None
+            for st in node.statements:
+                if type(self.run(st)) is Completion:
+                    break  # top-level return ends the program
+            return None
+        except RecursionError:
+            # each Azhar call nests several Python frames here
+            raise RuntimeErrorEx("Maximum recursion depth exceeded "
+                                 "(--engine=vm keeps calls on its own stack)") from None
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            self.output.flush()  # also when the program fails
+
+    def prepare(self, program):
+        # the annotations this interpreter reads: scopes (closure mode, and
+        # purity needs them) and purity (memo). Steps already done are
+        # skipped, so a program prepared once up front (azhar.embed) is only
+        # read by its runs, never written.
+        steps = (('resolve',) if self.mode == 'closure' or self.memo is not None else ()) \
+            + (('purity',) if self.memo is not None else ())
+        if all(step in program.prepared for step in steps):
+            return
+        if 'resolve' in steps:
+            self.resolver.resolve(program)
+        if 'purity' in steps:
+            purity.analyze(program)
+        program.prepared = steps
 
     def visit_Number(self, node): return node.value
     def visit_String(self, node): return node.value
@@ -73,100 +192,133 @@ class Interpreter:
         return None
 
     def visit_BinOp(self, node):
-        if node.op_token.type == 'KEYWORD':
+        op = node.op   # chosen by the type checker
+        if op is None:
             if node.op_token.value == 'and':
                 return bool(self.run(node.left)) and bool(self.run(node.right))
-            if node.op_token.value == 'or':
-                return bool(self.run(node.left)) or bool(self.run(node.right))
-        left = self.run(node.left)
-        right = self.run(node.right)
-        t = node.op_token.type
-        if t == 'PLUS': return left + right
-        if t == 'MINUS': return left - right
-        if t == 'MULTIPLY': return left * right
-        if t == 'DIVIDE': return left // right
-        if t == 'DOUBLE_EQUALS': return left == right
-        if t == 'NOT_EQUALS': return left != right
-        if t == 'LESS_THAN': return left < right
-        if t == 'LESS_EQUALS': return left <= right
-        if t == 'GREATER_THAN': return left > right
-        if t == 'GREATER_EQUALS': return left >= right
-        raise RuntimeErrorEx("Unknown binary operator")
+            return bool(self.run(node.left)) or bool(self.run(node.right))
+        return op(self.run(node.left), self.run(node.right))
 
     def visit_UnaryOp(self, node):
-        v = self.run(node.node)
-        if node.op_token.type == 'PLUS': return +v
-        if node.op_token.type == 'MINUS': return -v
-        return v
+        return node.op(self.run(node.node))
 
     def visit_If(self, node):
         if self.run(node.cond):
-            self.run(node.then_block)
-        else:
-            if node.else_block: self.run(node.else_block)
+            return self.run(node.then_block)
+        if node.else_block: return self.run(node.else_block)
         return None
 
     def visit_While(self, node):
+        while self.run(node.cond):
+            c = self.run(node.body)
+            if c is not None:
+                if c is BREAK: break
+                return c  # return from inside the loop
+        return None
+
+    def visit_For(self, node):
+        # a native range drives the loop; each iteration gets one fresh
+        # environment holding the loop variable, in which the body runs
+        # directly (no second one for the Block), so what the body declares
+        # never outlives its iteration
+        start, stop = self.run(node.start), self.run(node.stop)
+        prev = self.current_env
+        name, body, stats = node.name, node.body.statements, self.stats
         try:
-            while self.run(node.cond):
-                try:
-                    self.run(node.body)
-                except BreakSignal:
-                    break
+            for i in range(start, stop):
+                self.current_env = env = Environment(prev)
+                env.values[name] = i
+                if stats is not None:
+                    stats.environments += 1
+                for st in body:
+                    c = self.run(st)
+                    if type(c) is Completion:
+                        return None if c is BREAK else c
         finally:
-            return None
+            self.current_env = prev
+        return None
 
     def visit_Break(self, node):
-        raise BreakSignal()
+        return BREAK
 
     def visit_Block(self, node):
         prev = self.current_env
         self.current_env = Environment(prev)
         try:
             for st in node.statements:
-                self.run(st)
+                c = self.run(st)
+                if type(c) is Completion:
+                    return c
         finally:
             self.current_env = prev
         return None
 
     def visit_FunctionDef(self, node):
-        self.current_env.set_func(node.name, node)
+        # lexical scoping, as in the other engines and the checker: a call
+        # runs in an environment whose parent is where the function was defined
+        self.current_env.set_func(node.name, (node, self.current_env))
+        return None
+
+    def visit_Import(self, node):
+        for func in node.module.functions:
+            self.current_env.set_func(func.name, (func, self.current_env))
+        return None
+
+    def visit_ArrayLiteral(self, node):
+        return node.op(*[self.run(e) for e in node.elements])
+
+    def visit_MapLiteral(self, node):
+        return node.op(*[self.run(e) for e in node.items])
+
+    def visit_Index(self, node):
+        return node.op(self.run(node.target), self.run(node.index))
+
+    def visit_IndexAssign(self, node):
+        node.op(self.run(node.target), self.run(node.index), self.run(node.value_node))
         return None
 
     def visit_Call(self, node):
-        # built-ins
+        if node.op is not None:   # built-in function (chosen by the type checker)
+            return node.op(*[self.run(arg) for arg in node.args])
         if node.name in ('print','output','read_string','read_int'):
             vals = [self.run(arg) for arg in node.args]
-            return call_builtin(node.name, vals)
-        func_def = self.current_env.get_func(node.name)
+            return call_builtin(node.name, vals, self.output, self.input)
+        func_def, defining_env = self.current_env.get_func(node.name)
         prev_env = self.current_env
-        call_env = Environment(prev_env)
+        call_env = Environment(defining_env)
         if len(node.args) != len(func_def.params):
             raise RuntimeErrorEx(f"function '{node.name}' arg count mismatch")
-        for (p_name_tok, _p_type_tok), arg_expr in zip(func_def.params, node.args):
-            call_env.set(p_name_tok.value, self.run(arg_expr))
+        vals = [self.run(arg_expr) for arg_expr in node.args]
+        memo = self.memo
+        if memo is not None and func_def.pure:
+            key = (func_def, *vals)
+            value = memo.lookup(key)
+            if value is not MISSING:
+                return value
+        for (p_name_tok, _p_type_tok), val in zip(func_def.params, vals):
+            call_env.set(p_name_tok.value, val)
         self.current_env = call_env
         try:
-            self.run(func_def.body)
-        except ReturnSignal as rs:
+            c = self.run(func_def.body)
+        finally:
             self.current_env = prev_env
-            return rs.value
-        self.current_env = prev_env
-        return None
+        value = None if c is None else c.value
+        if memo is not None and func_def.pure:
+            memo.store(key, value)
+        return value
 
     def visit_Return(self, node):
         val = None if node.expr is None else self.run(node.expr)
-        raise ReturnSignal(val)
+        return Completion(val)
 
     def visit_Print(self, node):
-        v = self.run(node.expr); print(v); return None
+        v = self.run(node.expr); self.output.write(f"{v}\n"); return None
 
     def visit_Output(self, node):
-        v = self.run(node.expr); sys.stdout.write(str(v)); sys.stdout.flush(); return None
+        v = self.run(node.expr); self.output.write(str(v)); return None
 
     def visit_ReadInput(self, node):
+        self.output.flush()  # a prompt must show before we wait for input
         if node.kind == 'read_string':
-            return sys.stdin.readline().rstrip('\n')
-        s = sys.stdin.readline().strip()
-        try: return int(s)
-        except: raise RuntimeErrorEx("read_int got non-integer input")
+            return self.input.read_string()
+        return self.input.read_int()
@@ -1,159 +1,138 @@
 # azhar/lexer.py
 
+import re
+import sys
 from azhar.tokens import *
 from azhar.errors import LexerError
 
-class Lexer:
-    def __init__(self, text, file="<stdin>"):
-        self.text = text
-        self.file = file
-        self.pos = 0
-        self.line = 1
-        self.col = 1
-        self.current_char = text[0] if text else None
+# One compiled master pattern scans the whole source. Each match swallows any
+# leading blanks and comments, then one token; the named group that matched
+# (`lastgroup`) says which kind. Lexemes are slices of the source, never built
+# character by character. Trailing blanks match with no group at all.
+TOKEN_PATTERN = re.compile(r'''
+    (?:[ \t\r]+|//[^\n]*)*
+    (?:
+        (?P<IDENT>[^\W\d]\w*)
+      | (?P<OP>->|==|!=|<=|>=|\.\.|[-+*/=<>()\[\]{}:,.])
+      | (?P<NEWLINE>\n)
+      | (?P<NUMBER>\d+)
+      | (?P<STRING>"(?:[^"\\]|\\.)*")
+      | (?P<SEMI>;)
+      | (?P<OTHER>.)
+      | $
+    )
+''', re.VERBOSE | re.DOTALL)
 
-    def advance(self):
-        if self.current_char == '\n':
-            self.line += 1
-            self.col = 1
-        else:
-            self.col += 1
-        self.pos += 1
-        self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ESCAPES = {'n': '\n', '"': '"', 't': '\t'}
 
-    def peek(self):
-        nxt = self.pos + 1
-        return self.text[nxt] if nxt < len(self.text) else None
+OPERATORS = {
+    '+': TOKEN_PLUS, '-': TOKEN_MINUS, '*': TOKEN_MULTIPLY, '/': TOKEN_DIVIDE,
+    '=': TOKEN_EQUALS, '==': TOKEN_DOUBLE_EQUALS, '!=': TOKEN_NOT_EQUALS,
+    '<': TOKEN_LESS_THAN, '<=': TOKEN_LESS_EQUALS,
+    '>': TOKEN_GREATER_THAN, '>=': TOKEN_GREATER_EQUALS,
+    '->': TOKEN_ARROW, '(': TOKEN_LPAREN, ')': TOKEN_RPAREN,
+    '[': TOKEN_LBRACK, ']': TOKEN_RBRACK, ':': TOKEN_COLON,
+    '{': TOKEN_LBRACE, '}': TOKEN_RBRACE,
+    ',': TOKEN_COMMA, '.': TOKEN_DOT, '..': TOKEN_DOTDOT,
+}
 
-    def skip_whitespace(self):
-        while self.current_char is not None and self.current_char in ' \t\r':
-            self.advance()
+def unescape(body):
+    if '\\' not in body:
+        return body
+    return ESCAPE_PATTERN.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), body)
 
-    def skip_comment(self):
-        while self.current_char is not None and self.current_char != '\n':
-            self.advance()
-
-    def number(self):
-        start_line, start_col = self.line, self.col
-        num_str = ''
-        while self.current_char is not None and self.current_char.isdigit():
-            num_str += self.current_char
-            self.advance()
-        # v0.6 behavior: reject floats; keep for now
-        if self.current_char == '.':
-            snippet = self.grab_line(start_line)
-            raise LexerError("Floats are not supported.", self.file, start_line, start_col, snippet)
-        return Token(TOKEN_NUMBER, int(num_str), start_line, start_col)
+class Lexer:
+    def __init__(self, text, file="<stdin>"):
+        self.text = text
+        self.file = file
+        self.stream = None
 
-    def string(self):
-        start_line, start_col = self.line, self.col
-        self.advance()  # skip opening "
-        s = ''
-        while self.current_char is not None and self.current_char != '"':
-            if self.current_char == '\\':
-                self.advance()
-                if self.current_char == 'n':
-                    s += '\n'
-                elif self.current_char == '"':
-                    s += '"'
-                elif self.current_char == 't':
-                    s += '\t'
-                else:
-                    s += self.current_char or ''
-                self.advance()
-                continue
-            s += self.current_char
-            self.advance()
-        if self.current_char != '"':
-            snippet = self.grab_line(start_line)
-            raise LexerError("Unterminated string.", self.file, start_line, start_col, snippet)
-        self.advance()  # closing "
-        return Token(TOKEN_STRING, s, start_line, start_col)
+    @classmethod
+    def from_stream(cls, stream, file="<stdin>"):
+        # Lex a readable text stream (file, pipe, socket.makefile()) line by
+        # line; only the current line is held in memory.
+        lexer = cls(None, file)
+        lexer.stream = stream
+        return lexer
 
-    def ident_or_kw(self):
-        start_line, start_col = self.line, self.col
-        ident = ''
-        while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
-            ident += self.current_char
-            self.advance()
-        if ident in KEYWORDS:
-            if ident in TYPE_KEYWORDS:
-                return Token(TOKEN_TYPE, ident, start_line, start_col)
-            return Token(TOKEN_KEYWORD, ident, start_line, start_col)
-        return Token(TOKEN_IDENTIFIER, ident, start_line, start_col)
+    def chunks(self):
+        if self.stream is None:
+            if self.text: yield self.text
+            return
+        yield from iter(self.stream.readline, '')
 
-    def grab_line(self, target_line):
-        # Return the full line text for diagnostics
-        start = self.text.rfind('\n', 0, self.pos)
-        end = self.text.find('\n', self.pos)
-        if start == -1: start = 0
-        else: start += 1
-        if end == -1: end = len(self.text)
-        return self.text[start:end]
+    def error(self, message, buf, start, line, line_start):
+        # the snippet is the source line holding `start`
+        begin = buf.rfind('\n', 0, start) + 1
+        end = buf.find('\n', start)
+        if end == -1: end = len(buf)
+        return LexerError(message, self.file, line, start - line_start + 1, buf[begin:end])
 
     def tokenize(self):
-        tokens = []
-        while self.current_char is not None:
-            if self.current_char in ' \t\r':
-                self.skip_whitespace(); continue
-            if self.current_char == '/' and self.peek() == '/':
-                self.skip_comment(); continue
-            if self.current_char == '\n':
-                tokens.append(Token(TOKEN_NEWLINE, None, self.line, self.col))
-                self.advance(); continue
-            if self.current_char.isdigit():
-                tokens.append(self.number()); continue
-            if self.current_char == '"':
-                tokens.append(self.string()); continue
-            if self.current_char.isalpha() or self.current_char == '_':
-                tokens.append(self.ident_or_kw()); continue
+        return list(self.iter_tokens())
 
-            ch = self.current_char
-            ln, cl = self.line, self.col
-            if ch == '+': tokens.append(Token(TOKEN_PLUS, '+', ln, cl)); self.advance(); continue
-            if ch == '-':
-                if self.peek() == '>':
-                    self.advance(); self.advance()
-                    tokens.append(Token(TOKEN_ARROW, '->', ln, cl)); continue
-                tokens.append(Token(TOKEN_MINUS, '-', ln, cl)); self.advance(); continue
-            if ch == '*': tokens.append(Token(TOKEN_MULTIPLY, '*', ln, cl)); self.advance(); continue
-            if ch == '/': tokens.append(Token(TOKEN_DIVIDE, '/', ln, cl)); self.advance(); continue
-            if ch == '=':
-                if self.peek() == '=':
-                    self.advance(); self.advance()
-                    tokens.append(Token(TOKEN_DOUBLE_EQUALS, '==', ln, cl)); continue
-                tokens.append(Token(TOKEN_EQUALS, '=', ln, cl)); self.advance(); continue
-            if ch == '!':
-                if self.peek() == '=':
-                    self.advance(); self.advance()
-                    tokens.append(Token(TOKEN_NOT_EQUALS, '!=', ln, cl)); continue
-                raise LexerError("Unexpected '!'", self.file, ln, cl, self.grab_line(ln))
-            if ch == '<':
-                if self.peek() == '=':
-                    self.advance(); self.advance()
-                    tokens.append(Token(TOKEN_LESS_EQUALS, '<=', ln, cl)); continue
-                tokens.append(Token(TOKEN_LESS_THAN, '<', ln, cl)); self.advance(); continue
-            if ch == '>':
-                if self.peek() == '=':
-                    self.advance(); self.advance()
-                    tokens.append(Token(TOKEN_GREATER_EQUALS, '>=', ln, cl)); continue
-                tokens.append(Token(TOKEN_GREATER_THAN, '>', ln, cl)); self.advance(); continue
-            if ch == '(':
-                tokens.append(Token(TOKEN_LPAREN, '(', ln, cl)); self.advance(); continue
-            if ch == ')':
-                tokens.append(Token(TOKEN_RPAREN, ')', ln, cl)); self.advance(); continue
-            if ch == '[':
-                tokens.append(Token(TOKEN_LBRACK, '[', ln, cl)); self.advance(); continue
-            if ch == ']':
-                tokens.append(Token(TOKEN_RBRACK, ']', ln, cl)); self.advance(); continue
-            if ch == ':':
-                tokens.append(Token(TOKEN_COLON, ':', ln, cl)); self.advance(); continue
-            if ch == ',':
-                tokens.append(Token(TOKEN_COMMA, ',', ln, cl)); self.advance(); continue
-            if ch == '.':
-                tokens.append(Token(TOKEN_DOT, '.', ln, cl)); self.advance(); continue
-
-            raise LexerError(f"Unexpected character {ch!r}", self.file, ln, cl, self.grab_line(ln))
-
-        tokens.append(Token(TOKEN_EOF, None, self.line, self.col))
-        return tokens
+    def iter_tokens(self):
+        chunks = self.chunks()
+        buf = next(chunks, '')
+        pos = 0
+        line, line_start = 1, 0   # line_start: offset of the current line in buf
+        while True:
+            for m in TOKEN_PATTERN.finditer(buf, pos):
+                kind = m.lastgroup
+                if kind is None:
+                    continue
+                start = m.start(kind)
+                col = start - line_start + 1
+                if kind == 'IDENT':
+                    # interned: every use of a name shares one string object
+                    ident = sys.intern(m.group(kind))
+                    if ident in KEYWORDS:
+                        yield Token(TOKEN_TYPE if ident in TYPE_KEYWORDS else TOKEN_KEYWORD, ident, line, col)
+                    elif ident[0].isalpha() or ident[0] == '_':
+                        yield Token(TOKEN_IDENTIFIER, ident, line, col)
+                    else:  # \w also admits non-decimal numerics such as '½'
+                        raise self.error(f"Unexpected character {ident[0]!r}", buf, start, line, line_start)
+                elif kind == 'OP':
+                    op = sys.intern(m.group(kind))
+                    yield Token(OPERATORS[op], op, line, col)
+                elif kind == 'NEWLINE':
+                    yield Token(TOKEN_NEWLINE, None, line, col)
+                    line += 1
+                    line_start = start + 1
+                elif kind == 'NUMBER':
+                    # v0.6 behavior: reject floats; keep for now
+                    if buf.startswith('.', m.end()) and not buf.startswith('..', m.end()):
+                        raise self.error("Floats are not supported.", buf, start, line, line_start)
+                    yield Token(TOKEN_NUMBER, int(m.group(kind)), line, col)
+                elif kind == 'STRING':
+                    lexeme = m.group(kind)
+                    yield Token(TOKEN_STRING, unescape(lexeme[1:-1]), line, col)
+                    newlines = lexeme.count('\n')
+                    if newlines:
+                        line += newlines
+                        line_start = start + lexeme.rfind('\n') + 1
+                elif kind == 'SEMI':  # statement separator, same as a newline
+                    yield Token(TOKEN_NEWLINE, ';', line, col)
+                else:
+                    ch = m.group(kind)
+                    if ch == '"':
+                        more = next(chunks, None)
+                        if more is not None:
+                            # string continues on the next line: rescan it whole
+                            buf = buf[line_start:] + more
+                            pos = start - line_start
+                            line_start = 0
+                            break
+                        raise self.error("Unterminated string.", buf, start, line, line_start)
+                    if ch == '!':
+                        raise self.error("Unexpected '!'", buf, start, line, line_start)
+                    raise self.error(f"Unexpected character {ch!r}", buf, start, line, line_start)
+            else:
+                more = next(chunks, None)
+                if more is None:
+                    break
+                line_start -= len(buf)
+                buf = more
+                pos = 0
+        yield Token(TOKEN_EOF, None, line, len(buf) - line_start + 1)
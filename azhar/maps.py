@@ -0,0 +1,57 @@
+# azhar/maps.py
+
+from azhar import arrays
+from azhar.errors import RuntimeErrorEx
+
+# Run-time side of `map[K]V`: a dict, passed and assigned by reference like
+# an array. Keys are int, string or bool; values any type. As for arrays,
+# the type checker stores the function for each operation on the node and
+# engines just call it.
+
+KEY_TYPES = ('int', 'string', 'bool')
+
+def map_type(key_type, value_type):
+    return f"map[{key_type}]{value_type}"
+
+def split(type_name):
+    # 'map[K]V' -> (K, V); None for any other type
+    if not type_name.startswith('map['):
+        return None
+    return tuple(type_name[4:].split(']', 1))   # K has no ']' in it
+
+class Map(dict):
+    __slots__ = ()
+    def __str__(self):
+        return f"{{{', '.join(f'{k}: {v}' for k, v in self.items())}}}"
+
+def map_literal(*items):
+    # {k0: v0, k1: v1}: items are k0, v0, k1, v1, in source order
+    return Map(zip(items[::2], items[1::2]))
+
+def get(entries, key):
+    try:
+        return entries[key]
+    except KeyError:
+        raise RuntimeErrorEx(f"key {key} not in map") from None
+
+def put(entries, key, value):
+    entries[key] = value
+
+def has(entries, key):
+    return key in entries
+
+def delete(entries, key):
+    # removing a key that is not there does nothing
+    entries.pop(key, None)
+
+# keys(m) and values(m) copy into an array of the key or value type, in
+# insertion order
+def int_keys(entries): return arrays.int_array(*entries)
+def bool_keys(entries): return arrays.bool_array(*entries)
+def string_keys(entries): return arrays.string_array(*entries)
+def int_values(entries): return arrays.int_array(*entries.values())
+def bool_values(entries): return arrays.bool_array(*entries.values())
+def string_values(entries): return arrays.string_array(*entries.values())
+
+KEYS = {'int': int_keys, 'bool': bool_keys, 'string': string_keys}
+VALUES = {'int': int_values, 'bool': bool_values, 'string': string_values}
@@ -0,0 +1,119 @@
+# azhar/modules.py
+
+import os
+from azhar import ast as AST
+from azhar import cache
+from azhar.errors import TypeErrorEx
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.optimizer import DEFAULT_OPT_LEVEL, Optimizer, position
+from azhar.typechecker import TypeChecker
+
+# `import "path/lib.azhar"` makes the functions of another file callable.
+#
+# A module is a file of function definitions and imports. Importing it
+# brings in all of its functions, those it imported included, so that
+# they and everything they call sit side by side in the importer's global
+# scope. Paths are relative to the importing file.
+#
+# Each module is loaded once per process (LOADED; again only if it or a
+# module it imports changes), and its checked, optimized functions are saved in
+# __azharcache__ (lib.azhar.azm) for later runs. Importers are type checked
+# against a module's exported signatures, never its function bodies.
+#
+# A Module pickles as a reference, (path, interface): a cached program or
+# module that imports it links to the module as it is now when unpickled,
+# and is rejected (so checked again) if the signatures it was checked
+# against have changed.
+
+MODULE_EXT = '.azm'
+
+LOADED = {}      # (absolute path, opt level) -> (file stamp, Module)
+LOADING = set()  # keys being loaded right now: seeing one again is a cycle
+
+class CircularImport(Exception):
+    pass
+
+class StaleModule(Exception):
+    pass
+
+class Module:
+    def __init__(self, path, opt_level, own, imports):
+        self.path = path
+        self.opt_level = opt_level
+        self.own = own           # FunctionDefs written in this file
+        self.imports = imports   # Modules this file imports
+        self.functions = []      # own and imported ones, each once, callees first
+        seen = set()
+        for f in [f for m in imports for f in m.functions] + own:
+            if f not in seen:
+                seen.add(f)
+                self.functions.append(f)
+        self.interface = tuple(sorted(signature(f) for f in self.functions))
+
+    def __reduce__(self):
+        return link, (self.path, self.opt_level, self.interface)
+
+def signature(func):
+    # (name, parameter types, return type)
+    ret = func.return_type_token.value if func.return_type_token else 'void'
+    return func.name, tuple(t.value for _, t in func.params), ret
+
+def link(path, opt_level, interface):
+    # unpickling a Module: the one at `path` now, if it still fits
+    module = Loader(opt_level).load(path)
+    if module.interface != interface:
+        raise StaleModule(path)
+    return module
+
+def stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+class Loader:
+    def __init__(self, opt_level=DEFAULT_OPT_LEVEL, use_cache=True):
+        self.opt_level = opt_level
+        self.use_cache = use_cache   # read and write __azharcache__
+
+    def load(self, path):
+        # -> Module; raises OSError if `path` cannot be read
+        path = os.path.abspath(path)
+        key = (path, self.opt_level)
+        current = stamp(path)
+        entry = LOADED.get(key)
+        if entry is not None and entry[0] == current \
+                and all(self.load(m.path) is m for m in entry[1].imports):   # nor have its imports
+            return entry[1]
+        if key in LOADING:
+            raise CircularImport(path)
+        LOADING.add(key)
+        try:
+            module = self.compile(path)
+        finally:
+            LOADING.discard(key)
+        LOADED[key] = (current, module)
+        return module
+
+    def compile(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = cache.source_hash(data)
+        tag = f"-O{self.opt_level}"
+        if self.use_cache:
+            state = cache.load(path, digest, tag, MODULE_EXT)
+            if state is not None:
+                return Module(path, self.opt_level, *state)
+        with cache.paused_gc():
+            program = Parser(Lexer(data.decode('utf-8'), file=path).tokenize(), file=path).parse()
+        for st in program.statements:
+            if not isinstance(st, (AST.FunctionDef, AST.Import)):
+                token = getattr(st, 'name_token', None)   # VarDecl, Assign
+                line, col = (token.line, token.col) if token else position(st)
+                raise TypeErrorEx("A module can only define functions and import modules", path, line, col)
+        TypeChecker(file=path, loader=self).check(program)
+        Optimizer(self.opt_level).optimize(program)
+        own = [st for st in program.statements if isinstance(st, AST.FunctionDef)]
+        imports = [st.module for st in program.statements if isinstance(st, AST.Import)]
+        if self.use_cache:
+            cache.store(path, digest, (own, imports), tag, MODULE_EXT)
+        return Module(path, self.opt_level, own, imports)
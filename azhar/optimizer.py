@@ -0,0 +1,194 @@
+# azhar/optimizer.py
+
+from azhar.tokens import *
+from azhar import ast as AST
+
+# Runs on the checked AST, before any engine sees it, and rewrites it in place.
+# Folding applies the operation the type checker chose (`node.op`), and
+# every node it creates or keeps carries its checker annotations.
+#
+#   level 0  nothing
+#   level 1  fold constant expressions (`60 * 60 * 24` -> 86400, `1 < 2` ->
+#            true) and drop branches whose condition is a constant:
+#            `if true do A else do B end` -> A, `while false do ... end` -> ()
+#   level 2  also algebraic identities (`x * 1`, `x + 0`, `x - 0`, `x / 1`,
+#            `- -x`, `+x` -> x) and statements after `return`/`break`
+#
+# Nothing that can fail at run time is folded: `1 / 0` is left for the engine
+# to report. Operands are only dropped when they are literals, so calls and
+# read_*() keep their side effects.
+
+OPT_LEVELS = (0, 1, 2)
+DEFAULT_OPT_LEVEL = 2
+
+# (operator, literal operand, side) -> the other operand is the result
+IDENTITIES = {
+    (TOKEN_PLUS, 0, 'right'), (TOKEN_PLUS, 0, 'left'),
+    (TOKEN_MINUS, 0, 'right'),
+    (TOKEN_MULTIPLY, 1, 'right'), (TOKEN_MULTIPLY, 1, 'left'),
+    (TOKEN_DIVIDE, 1, 'right'),
+}
+
+LITERALS = (AST.Number, AST.String, AST.Bool)
+
+def position(node):
+    # (line, col) of the source text an expression starts at
+    if isinstance(node, (AST.Number, AST.String, AST.VarAccess)):
+        return node.token.line, node.token.col
+    if isinstance(node, AST.BinOp):
+        return position(node.left)
+    if isinstance(node, AST.UnaryOp):
+        return node.op_token.line, node.op_token.col
+    if isinstance(node, AST.Call):
+        return node.name_token.line, node.name_token.col
+    if isinstance(node, AST.Index):
+        return position(node.target)
+    return node.line, node.col
+
+def literal(value, like):
+    line, col = position(like)
+    if isinstance(value, bool):
+        return AST.Bool(value, line, col)
+    if isinstance(value, int):
+        return AST.Number(Token(TOKEN_NUMBER, value, line, col))
+    return AST.String(Token(TOKEN_STRING, str(value), line, col))   # a folded `+` may give a Rope
+
+class Optimizer:
+    def __init__(self, level=DEFAULT_OPT_LEVEL):
+        if level not in OPT_LEVELS:
+            raise ValueError(f"opt level must be one of {OPT_LEVELS}, got {level!r}")
+        self.level = level
+
+    def optimize(self, program):
+        if self.level:
+            program.statements = self.statements(program.statements)
+        return program
+
+    def visit(self, node):
+        # returns the node to use in place of `node`; None removes a statement
+        m = getattr(self, f'visit_{type(node).__name__}', None)
+        return m(node) if m else node
+
+    def statements(self, stmts):
+        out = []
+        for st in stmts:
+            st = self.visit(st)
+            if st is None:
+                continue
+            out.append(st)
+            if self.level >= 2 and isinstance(st, (AST.Return, AST.Break)):
+                break   # the rest of the block can never run
+        return out
+
+    # Statements
+    def visit_Block(self, node):
+        node.statements = self.statements(node.statements)
+        return node
+
+    def visit_If(self, node):
+        node.cond = self.visit(node.cond)
+        if isinstance(node.cond, AST.Bool):
+            # the surviving branch keeps its own Block, and so its scope
+            if node.cond.value:
+                return self.visit(node.then_block)
+            return self.visit(node.else_block) if node.else_block else None
+        node.then_block = self.visit(node.then_block)
+        if node.else_block: node.else_block = self.visit(node.else_block)
+        return node
+
+    def visit_While(self, node):
+        node.cond = self.visit(node.cond)
+        if isinstance(node.cond, AST.Bool) and not node.cond.value:
+            return None
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_For(self, node):
+        node.start = self.visit(node.start)
+        node.stop = self.visit(node.stop)
+        if isinstance(node.start, AST.Number) and isinstance(node.stop, AST.Number) \
+                and node.stop.value <= node.start.value:
+            return None
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_FunctionDef(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_VarDecl(self, node):
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    def visit_Assign(self, node):
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    def visit_Return(self, node):
+        if node.expr is not None: node.expr = self.visit(node.expr)
+        return node
+
+    def visit_Print(self, node):
+        node.expr = self.visit(node.expr)
+        return node
+
+    def visit_Output(self, node):
+        node.expr = self.visit(node.expr)
+        return node
+
+    def visit_IndexAssign(self, node):
+        node.target = self.visit(node.target)
+        node.index = self.visit(node.index)
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    # Expressions
+    def visit_Call(self, node):
+        node.args = [self.visit(a) for a in node.args]
+        return node
+
+    def visit_ArrayLiteral(self, node):
+        node.elements = [self.visit(e) for e in node.elements]
+        return node
+
+    def visit_MapLiteral(self, node):
+        node.items = [self.visit(e) for e in node.items]
+        return node
+
+    def visit_Index(self, node):
+        node.target = self.visit(node.target)
+        node.index = self.visit(node.index)
+        return node
+
+    def visit_UnaryOp(self, node):
+        node.node = inner = self.visit(node.node)
+        t = node.op_token.type
+        if isinstance(inner, AST.Number):
+            return literal(node.op(inner.value), node)
+        if self.level >= 2:
+            if t == TOKEN_PLUS:
+                return inner
+            if isinstance(inner, AST.UnaryOp) and inner.op_token.type == TOKEN_MINUS:
+                return inner.node   # - -x
+        return node
+
+    def visit_BinOp(self, node):
+        node.left = left = self.visit(node.left)
+        node.right = right = self.visit(node.right)
+        op = node.op_token
+        if op.type == TOKEN_KEYWORD:   # and / or: only the left side decides
+            if isinstance(left, AST.Bool):
+                if left.value == (op.value == 'or'):
+                    return literal(left.value, node)   # short-circuits
+                return right   # both sides are bool, so `true and x` is x
+            return node
+        if isinstance(left, LITERALS) and isinstance(right, LITERALS):
+            if op.type == TOKEN_DIVIDE and right.value == 0:
+                return node   # runtime error, not ours to raise
+            return literal(node.op(left.value, right.value), node)
+        if self.level >= 2:
+            if isinstance(right, AST.Number) and (op.type, right.value, 'right') in IDENTITIES:
+                return left
+            if isinstance(left, AST.Number) and (op.type, left.value, 'left') in IDENTITIES:
+                return right
+        return node
@@ -5,21 +5,29 @@ from azhar.errors import ParseError
 from azhar import ast as AST
 
 class Parser:
+    # `tokens` may be a list or any iterator (e.g. Lexer.iter_tokens()); tokens
+    # are pulled one at a time, so only the lookahead buffer is held in memory
     def __init__(self, tokens, file="<stdin>"):
         # drop NEWLINE tokens for v0.6 newline-insensitive grammar
-        self.tokens = [t for t in tokens if t.type != TOKEN_NEWLINE]
+        self.tokens = (t for t in tokens if t.type != TOKEN_NEWLINE)
         self.file = file
-        self.pos = 0
-        self.current = self.tokens[0] if self.tokens else Token(TOKEN_EOF)
+        self.lookahead = []   # tokens pulled past `current` by peek()
+        self.current = next(self.tokens, None) or Token(TOKEN_EOF)
 
     def advance(self):
-        self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current = self.tokens[self.pos]
+        if self.lookahead:
+            self.current = self.lookahead.pop(0)
+        else:
+            # past the end `current` stays on EOF
+            self.current = next(self.tokens, self.current)
 
     def peek(self, k=1):
-        idx = self.pos + k
-        return self.tokens[idx] if idx < len(self.tokens) else Token(TOKEN_EOF, None, self.current.line, self.current.col)
+        while len(self.lookahead) < k:
+            tok = next(self.tokens, None)
+            if tok is None:
+                return Token(TOKEN_EOF, None, self.current.line, self.current.col)
+            self.lookahead.append(tok)
+        return self.lookahead[k - 1]
 
     def eat(self, type_):
         if self.current.type == type_:
@@ -29,10 +37,13 @@ class Parser:
         raise ParseError(f"Expected {type_}, got {self.current}", self.file, self.current.line, self.current.col)
 
     def parse(self):
-        stmts = []
+        return AST.Program(list(self.iter_statements()))
+
+    def iter_statements(self):
+        # yields each top-level statement as soon as it is complete, so a
+        # program arriving over a pipe can be processed while it is read
         while self.current.type != TOKEN_EOF:
-            stmts.append(self.statement())
-        return AST.Program(stmts)
+            yield self.statement()
 
     def statement(self):
         tok = self.current
@@ -49,6 +60,14 @@ class Parser:
         if tok.type == TOKEN_KEYWORD and tok.value == 'while':
             return self.while_stmt()
 
+        if tok.type == TOKEN_KEYWORD and tok.value == 'for':
+            return self.for_stmt()
+
+        if tok.type == TOKEN_KEYWORD and tok.value == 'import':
+            self.advance()
+            path = self.eat(TOKEN_STRING)
+            return AST.Import(path.value, tok.line, tok.col)
+
         if tok.type == TOKEN_KEYWORD and tok.value == 'break':
             line, col = tok.line, tok.col
             self.advance()
@@ -91,6 +110,18 @@ class Parser:
         if tok.type == TOKEN_IDENTIFIER and self.peek().type == TOKEN_LPAREN:
             return self.call()
 
+        # element assignment: a[i] = value
+        if tok.type == TOKEN_IDENTIFIER and self.peek().type == TOKEN_LBRACK:
+            target = self.expression()
+            if self.current.type != TOKEN_EQUALS:
+                return target
+            if not isinstance(target, AST.Index):
+                raise ParseError("Only a variable or an array element can be assigned to", self.file,
+                                 self.current.line, self.current.col)
+            self.advance()
+            value = self.expression()
+            return AST.IndexAssign(target.target, target.index, value, tok.line, tok.col)
+
         # fallback: expression statement
         expr = self.expression()
         return expr
@@ -99,11 +130,38 @@ class Parser:
         self.eat(TOKEN_KEYWORD)  # let
         name_tok = self.eat(TOKEN_IDENTIFIER)
         self.eat(TOKEN_COLON)
-        type_tok = self.eat(TOKEN_TYPE)
+        type_tok = self.type_annotation()
         self.eat(TOKEN_EQUALS)
         value = self.expression()
         return AST.VarDecl(name_tok, type_tok, value)
 
+    def type_annotation(self):
+        tok = self.eat(TOKEN_TYPE)
+        if tok.value == 'map':
+            return self.map_type(tok)
+        if self.current.type != TOKEN_LBRACK:
+            return TYPE_TOKENS[tok.value]
+        self.advance()
+        self.eat(TOKEN_RBRACK)
+        if tok.value == 'void':
+            raise ParseError("There are no void arrays", self.file, tok.line, tok.col)
+        return TYPE_TOKENS[f"{tok.value}[]"]
+
+    def map_type(self, tok):
+        # map[K]V, after `map`
+        if self.current.type != TOKEN_LBRACK:
+            raise ParseError("Expected map[key type]value type", self.file, tok.line, tok.col)
+        self.advance()
+        key = self.type_annotation()
+        self.eat(TOKEN_RBRACK)
+        value = self.type_annotation()
+        if key.value not in ('int', 'string', 'bool'):
+            raise ParseError(f"Map keys must be int, string or bool, not {key.value}", self.file, tok.line, tok.col)
+        if value.value == 'void':
+            raise ParseError("Map values cannot be void", self.file, tok.line, tok.col)
+        name = f"map[{key.value}]{value.value}"
+        return TYPE_TOKENS.setdefault(name, Token(TOKEN_TYPE, name))
+
     def function_def(self):
         kw_tok = self.eat(TOKEN_KEYWORD)  # function
         name_tok = self.eat(TOKEN_IDENTIFIER)
@@ -113,7 +171,7 @@ class Parser:
             while True:
                 p_name = self.eat(TOKEN_IDENTIFIER)
                 self.eat(TOKEN_COLON)
-                p_type = self.eat(TOKEN_TYPE)
+                p_type = self.type_annotation()
                 params.append((p_name, p_type))
                 if self.current.type == TOKEN_COMMA:
                     self.advance()
@@ -123,7 +181,7 @@ class Parser:
         ret_type = None
         if self.current.type == TOKEN_ARROW:
             self.advance()
-            ret_type = self.eat(TOKEN_TYPE)
+            ret_type = self.type_annotation()
         self.expect_do()
         body = self.block_until_end_or_else()
         if self.current.type == TOKEN_KEYWORD and self.current.value == 'end':
@@ -175,6 +233,23 @@ class Parser:
             raise ParseError("Expected 'end' after while", self.file, w_tok.line, w_tok.col)
         return AST.While(cond, body, w_tok.line, w_tok.col)
 
+    def for_stmt(self):
+        f_tok = self.eat(TOKEN_KEYWORD)
+        var_tok = self.eat(TOKEN_IDENTIFIER)
+        if self.current.type != TOKEN_KEYWORD or self.current.value != 'in':
+            raise ParseError("Expected 'in' after the for loop variable", self.file, var_tok.line, var_tok.col)
+        self.advance()
+        start = self.expression()
+        self.eat(TOKEN_DOTDOT)
+        stop = self.expression()
+        self.expect_do()
+        body = self.block_until_end_or_else()
+        if self.current.type == TOKEN_KEYWORD and self.current.value == 'end':
+            self.advance()
+        else:
+            raise ParseError("Expected 'end' after for", self.file, f_tok.line, f_tok.col)
+        return AST.For(var_tok, start, stop, body, f_tok.line, f_tok.col)
+
     # Expressions
     def expression(self): return self.bool_or()
 
@@ -231,7 +306,16 @@ class Parser:
             op = self.current; self.advance()
             node = self.unary()
             return AST.UnaryOp(op, node)
-        return self.primary()
+        return self.postfix()
+
+    def postfix(self):
+        node = self.primary()
+        while self.current.type == TOKEN_LBRACK:
+            self.advance()
+            index = self.expression()
+            self.eat(TOKEN_RBRACK)
+            node = AST.Index(node, index)
+        return node
 
     def primary(self):
         tok = self.current
@@ -250,6 +334,12 @@ class Parser:
             expr = self.expression()
             self.eat(TOKEN_RPAREN)
             return expr
+        if tok.type == TOKEN_LBRACK:
+            self.advance()
+            return AST.ArrayLiteral(self.arguments(TOKEN_RBRACK), tok.line, tok.col)
+        if tok.type == TOKEN_LBRACE:
+            self.advance()
+            return AST.MapLiteral(self.entries(), tok.line, tok.col)
         if tok.type == TOKEN_KEYWORD and tok.value in ('read_string','read_int'):
             kind = tok.value; line, col = tok.line, tok.col
             self.advance(); self.eat(TOKEN_LPAREN); self.eat(TOKEN_RPAREN)
@@ -259,12 +349,30 @@ class Parser:
     def call(self):
         name_tok = self.eat(TOKEN_IDENTIFIER)
         self.eat(TOKEN_LPAREN)
+        return AST.Call(name_tok, self.arguments(TOKEN_RPAREN))
+
+    def arguments(self, closing):
+        # comma-separated expressions up to and including `closing`
         args = []
-        if self.current.type != TOKEN_RPAREN:
+        if self.current.type != closing:
             while True:
                 args.append(self.expression())
                 if self.current.type == TOKEN_COMMA:
                     self.advance(); continue
                 break
-        self.eat(TOKEN_RPAREN)
-        return AST.Call(name_tok, args)
+        self.eat(closing)
+        return args
+
+    def entries(self):
+        # `key: value` pairs up to and including `}`, flattened
+        items = []
+        if self.current.type != TOKEN_RBRACE:
+            while True:
+                items.append(self.expression())
+                self.eat(TOKEN_COLON)
+                items.append(self.expression())
+                if self.current.type == TOKEN_COMMA:
+                    self.advance(); continue
+                break
+        self.eat(TOKEN_RBRACE)
+        return items
@@ -0,0 +1,116 @@
+# azhar/profiler.py
+
+import time
+from azhar.optimizer import position
+
+# Where an Azhar program spends its time, in terms of its own functions and
+# source lines rather than the interpreter's. The tree and closure engines
+# report to a Profiler only when given one; without it they run exactly the
+# code they run otherwise.
+#
+#   functions  per FunctionDef: calls, total time (callees included; a
+#              recursive function is timed from its outermost call) and self
+#              time (callees excluded). Top-level code counts as <program>.
+#   lines      per source line: statements executed there and their self
+#              time (nested statements, and so function bodies, excluded)
+#   stacks     self time per call stack, for flamegraph tools
+
+PROGRAM = '<program>'
+
+class FunctionStats:
+    __slots__ = ('name', 'line', 'calls', 'active', 'total', 'own')
+    def __init__(self, name, line):
+        self.name = name; self.line = line
+        self.calls = 0; self.active = 0; self.total = 0; self.own = 0   # times in ns
+
+class LineStats:
+    __slots__ = ('hits', 'own')
+    def __init__(self): self.hits = 0; self.own = 0
+
+def line_of(node):
+    # source line a statement starts on
+    token = getattr(node, 'name_token', None)   # VarDecl, Assign, Call
+    if token is not None:
+        return token.line
+    return position(node)[0]
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.functions = {}   # FunctionDef (None: top-level code) -> FunctionStats
+        self.lines = {}       # line -> LineStats
+        self.stacks = {}      # (PROGRAM, name, ...) -> self time in ns
+        self.calls = []       # [FunctionDef, start, callee time] per active call
+        self.path = []        # names along `calls`
+        self.statements = []  # [line, start, nested time] per active statement
+
+    # Called by the engines
+    def start(self):
+        # a program run begins (the REPL runs one per input)
+        self.enter(None)
+
+    def stop(self):
+        while self.statements:   # a runtime error left these active
+            self.leave_line()
+        while self.calls:
+            self.leave()
+
+    def enter(self, func):
+        stats = self.functions.get(func)
+        if stats is None:
+            stats = self.functions[func] = (FunctionStats(PROGRAM, 0) if func is None
+                                            else FunctionStats(func.name, func.line))
+        stats.calls += 1
+        stats.active += 1
+        self.path.append(stats.name)
+        self.calls.append([stats, self.clock(), 0])
+
+    def leave(self):
+        stats, start, inner = self.calls.pop()
+        elapsed = self.clock() - start
+        own = elapsed - inner
+        stats.own += own
+        stats.active -= 1
+        if not stats.active:
+            stats.total += elapsed
+        key = tuple(self.path)
+        self.stacks[key] = self.stacks.get(key, 0) + own
+        self.path.pop()
+        if self.calls:
+            self.calls[-1][2] += elapsed
+
+    def enter_line(self, line):
+        self.statements.append([line, self.clock(), 0])
+
+    def leave_line(self):
+        line, start, inner = self.statements.pop()
+        elapsed = self.clock() - start
+        stats = self.lines.get(line)
+        if stats is None:
+            stats = self.lines[line] = LineStats()
+        stats.hits += 1
+        stats.own += elapsed - inner
+        if self.statements:
+            self.statements[-1][2] += elapsed
+
+    # Results
+    def report(self, source=None, limit=20):
+        # the hottest functions and lines, by self time; `source`: the
+        # program's text, to show each line
+        out = [f"{'function':<24}{'line':>6}{'calls':>10}{'total ms':>12}{'self ms':>12}"]
+        for s in sorted(self.functions.values(), key=lambda s: -s.own)[:limit]:
+            line = s.line or ''
+            out.append(f"{s.name:<24}{line:>6}{s.calls:>10}{s.total / 1e6:>12.3f}{s.own / 1e6:>12.3f}")
+        text = source.splitlines() if source is not None else []
+        out.append('')
+        out.append(f"{'line':>6}{'hits':>10}{'self ms':>12}  source")
+        for line, s in sorted(self.lines.items(), key=lambda item: -item[1].own)[:limit]:
+            code = text[line - 1].strip() if 0 < line <= len(text) else ''
+            out.append(f"{line:>6}{s.hits:>10}{s.own / 1e6:>12.3f}  {code}")
+        return '\n'.join(out)
+
+    def collapsed(self):
+        # "<program>;outer;inner <microseconds>" per stack: the input format of
+        # flamegraph.pl, inferno and speedscope
+        return ''.join(f"{';'.join(path)} {own // 1000}\n"
+                       for path, own in sorted(self.stacks.items()) if own >= 1000)
@@ -0,0 +1,103 @@
+# azhar/purity.py
+
+from collections import OrderedDict
+from azhar import ast as AST
+from azhar import maps
+from azhar.arrays import ELEMENT_TYPES
+
+# A function is pure when its result depends on nothing but its arguments
+# and calling it has no effect besides returning that result:
+#   - no print/output/read_*() anywhere in its body (nested functions included)
+#   - no read or write of a variable declared outside it
+#   - every function it calls, other than ones nested in it, is pure
+#   - no array or map parameter or result: they are shared and mutable, so equal
+#     arguments do not mean an equal result (and are not hashable anyway)
+# Calls to a pure function can then be answered from a Memo. Runs on a
+# resolved AST (azhar.resolver): scopes are told apart by (depth, slot).
+
+IO_NODES = (AST.Print, AST.Output, AST.ReadInput)
+
+MISSING = object()   # Memo.lookup() result when the call is not cached
+
+class Impure(Exception):
+    pass
+
+def analyze(program):
+    # sets FunctionDef.pure for every function defined in `program`
+    funcs = [n for n in AST.walk(program) if isinstance(n, AST.FunctionDef)]
+    for st in program.statements:   # and every function it imports
+        if isinstance(st, AST.Import):
+            funcs += [n for func in st.module.functions for n in AST.walk(func)
+                      if isinstance(n, AST.FunctionDef)]
+    callees = {}
+    for f in funcs:
+        try:
+            callees[f] = outside_calls(f)
+            f.pure = True
+        except Impure:
+            f.pure = False
+    # optimistic fixpoint: a cycle of calls (a nested function calling the
+    # one it is defined in) stays pure unless some function in it is not
+    changed = True
+    while changed:
+        changed = False
+        for f in funcs:
+            if f.pure and not all(getattr(g, 'pure', False) for g in callees[f]):
+                f.pure = False
+                changed = True
+
+def outside_calls(func):
+    # -> the functions `func` calls that are not nested in it; raises Impure
+    types = [t.value for _, t in func.params]
+    if func.return_type_token is not None:
+        types.append(func.return_type_token.value)
+    if any(t in ELEMENT_TYPES or maps.split(t) for t in types):
+        raise Impure
+    nested = set()
+    calls = set()
+    def visit(node, level):
+        # level: function boundaries between `func` and `node`; a variable is
+        # declared outside `func` if it lives more frames out than that
+        if isinstance(node, IO_NODES):
+            raise Impure
+        if isinstance(node, (AST.VarAccess, AST.Assign)) and node.depth > level:
+            raise Impure
+        if isinstance(node, AST.Call) and node.op is None:
+            calls.add(node.func)
+        if isinstance(node, AST.FunctionDef):
+            nested.add(node)
+            level += 1
+        for child in AST.iter_child_nodes(node):
+            visit(child, level)
+    visit(func.body, 0)
+    return calls - nested - {func}
+
+DEFAULT_MEMO_SIZE = 4096
+
+class Memo:
+    # LRU cache of pure-call results, keyed by (function, argument tuple)
+    def __init__(self, size=DEFAULT_MEMO_SIZE):
+        if size < 1:
+            raise ValueError(f"memo size must be positive, got {size}")
+        self.size = size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        table = self.table
+        if key in table:
+            table.move_to_end(key)
+            self.hits += 1
+            return table[key]
+        self.misses += 1
+        return MISSING
+
+    def store(self, key, value):
+        table = self.table
+        table[key] = value
+        if len(table) > self.size:
+            table.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.table), 'size': self.size}
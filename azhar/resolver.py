@@ -0,0 +1,155 @@
+# azhar/resolver.py
+
+from azhar.errors import RuntimeErrorEx
+
+# Lexical addressing for the compiling engines (closure mode and the VM).
+#
+# Runs after the TypeChecker. Every function activation (and the program
+# itself) gets one fixed-size frame: a Python list whose slot 0 holds the
+# frame of the enclosing function (the static link) and whose other slots
+# hold parameters and locals. Blocks do not get frames of their own; a `let`
+# inside a nested block simply gets a fresh slot in the enclosing frame.
+#
+# Annotations written onto the AST:
+#   VarDecl.slot
+#   For: .slot (the loop variable), .iter_slot (the VM's range iterator)
+#   VarAccess / Assign: .depth (frames to walk up via slot 0), .slot
+#   Call: .func (the FunctionDef it binds to), .depth (where that function's
+#         static link is, relative to the caller's frame); calls to built-in
+#         functions (those with an `op`) bind to nothing
+#   FunctionDef / Program: .frame_size
+
+class FrameScope:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.size = 1          # slot 0 is the static link
+        self.blocks = [{}]     # innermost last: name -> slot
+        self.funcs = [{}]      # innermost last: name -> FunctionDef
+
+    def declare(self, name):
+        block = self.blocks[-1]
+        if name not in block:  # re-declaring in the same block reuses the slot
+            block[name] = self.size
+            self.size += 1
+        return block[name]
+
+class Resolver:
+    def __init__(self, file="<stdin>"):
+        self.file = file
+        # the program frame persists so repeated runs (REPL) keep their globals
+        self.globals = FrameScope()
+        self.current = self.globals
+
+    def resolve(self, node):
+        m = getattr(self, f'visit_{type(node).__name__}', None)
+        if m: m(node)
+
+    def lookup(self, name):
+        depth, frame = 0, self.current
+        while frame is not None:
+            for block in reversed(frame.blocks):
+                if name in block: return depth, block[name]
+            depth, frame = depth + 1, frame.parent
+        raise RuntimeErrorEx(f"Internal: unresolved variable '{name}'", self.file)
+
+    def lookup_func(self, name):
+        depth, frame = 0, self.current
+        while frame is not None:
+            for funcs in reversed(frame.funcs):
+                if name in funcs: return depth, funcs[name]
+            depth, frame = depth + 1, frame.parent
+        raise RuntimeErrorEx(f"Internal: unresolved function '{name}'", self.file)
+
+    def push_block(self):
+        self.current.blocks.append({})
+        self.current.funcs.append({})
+
+    def pop_block(self):
+        self.current.blocks.pop()
+        self.current.funcs.pop()
+
+    def visit_Program(self, node):
+        for st in node.statements:
+            self.resolve(st)
+        node.frame_size = self.globals.size
+
+    def visit_VarAccess(self, node):
+        node.depth, node.slot = self.lookup(node.name)
+
+    def visit_VarDecl(self, node):
+        self.resolve(node.value_node)
+        node.slot = self.current.declare(node.name)
+
+    def visit_Assign(self, node):
+        self.resolve(node.value_node)
+        node.depth, node.slot = self.lookup(node.name)
+
+    def visit_BinOp(self, node):
+        self.resolve(node.left); self.resolve(node.right)
+
+    def visit_UnaryOp(self, node):
+        self.resolve(node.node)
+
+    def visit_If(self, node):
+        self.resolve(node.cond)
+        self.resolve(node.then_block)
+        if node.else_block: self.resolve(node.else_block)
+
+    def visit_While(self, node):
+        self.resolve(node.cond)
+        self.resolve(node.body)
+
+    def visit_For(self, node):
+        self.resolve(node.start); self.resolve(node.stop)
+        self.push_block()
+        node.slot = self.current.declare(node.name)
+        node.iter_slot = self.current.declare(' range')   # no variable can be named this
+        self.resolve(node.body)
+        self.pop_block()
+
+    def visit_Block(self, node):
+        self.push_block()
+        for st in node.statements:
+            self.resolve(st)
+        self.pop_block()
+
+    def visit_FunctionDef(self, node):
+        self.current.funcs[-1][node.name] = node
+        frame = FrameScope(self.current)
+        for p_name_tok, _p_type_tok in node.params:
+            frame.declare(p_name_tok.value)
+        self.current = frame
+        self.resolve(node.body)
+        self.current = frame.parent
+        node.frame_size = frame.size
+
+    def visit_Import(self, node):
+        # imported functions are defined here, as if written in place
+        for func in node.module.functions:
+            self.visit_FunctionDef(func)
+
+    def visit_Call(self, node):
+        for arg in node.args:
+            self.resolve(arg)
+        if node.op is None:
+            node.depth, node.func = self.lookup_func(node.name)
+
+    def visit_ArrayLiteral(self, node):
+        for e in node.elements:
+            self.resolve(e)
+
+    def visit_MapLiteral(self, node):
+        for e in node.items:
+            self.resolve(e)
+
+    def visit_Index(self, node):
+        self.resolve(node.target); self.resolve(node.index)
+
+    def visit_IndexAssign(self, node):
+        self.resolve(node.target); self.resolve(node.index); self.resolve(node.value_node)
+
+    def visit_Return(self, node):
+        if node.expr is not None: self.resolve(node.expr)
+
+    def visit_Print(self, node): self.resolve(node.expr)
+    def visit_Output(self, node): self.resolve(node.expr)
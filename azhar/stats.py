@@ -0,0 +1,81 @@
+# azhar/stats.py
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from azhar.version import __version__
+
+# Aggregate numbers about one `azhar` invocation, written as JSON by
+# `--stats=PATH`:
+#   - wall time per phase: lex, parse, typecheck, optimize, run (cache_load
+#     instead of the first four when __azharcache__ had the program)
+#   - runtime counters: nodes evaluated, environments allocated, variable
+#     lookups and the parent links they walked (tree engine only), function
+#     calls and the deepest call nesting (every engine); those the engine
+#     used cannot count are listed under "counters_unavailable"
+#   - the --memoize hit/miss counts
+# The tree engine counts only when given a Stats, through a separate run(),
+# and the closure engine through wrapped function bodies, so a run without
+# --stats does none of this work. The VM always counts its calls (two local
+# variables in its loop) and adds them to a Stats it is given.
+
+COUNTERS = ('nodes_evaluated', 'environments_allocated', 'variable_lookups', 'avg_lookup_depth',
+            'function_calls', 'max_call_depth')
+CALL_COUNTERS = ('function_calls', 'max_call_depth')   # what every engine counts
+
+class Stats:
+    def __init__(self):
+        self.phases = {}   # name -> seconds
+        self.nodes = 0
+        self.environments = 0
+        self.lookups = 0
+        self.lookup_depth = 0   # parent links walked by all lookups together
+        self.calls = 0
+        self.call_depth = 0
+        self.max_call_depth = 0
+        self.counted = ()       # names (from COUNTERS) an engine filled in
+        self.memo = None        # the run's azhar.purity.Memo, if any
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def as_dict(self, **extra):
+        # `extra`: fields describing the invocation (script, engine, ...)
+        data = {'version': __version__, **extra,
+                'phases_ms': {name: round(s * 1000, 3) for name, s in self.phases.items()},
+                'total_ms': round(sum(self.phases.values()) * 1000, 3)}
+        counters = {
+            'nodes_evaluated': self.nodes,
+            'environments_allocated': self.environments,
+            'variable_lookups': self.lookups,
+            'avg_lookup_depth': round(self.lookup_depth / self.lookups, 3) if self.lookups else 0,
+            'function_calls': self.calls,
+            'max_call_depth': self.max_call_depth,
+        }
+        data['counters'] = {name: counters[name] for name in COUNTERS if name in self.counted}
+        data['counters_unavailable'] = [name for name in COUNTERS if name not in self.counted]
+        if self.memo is not None:
+            data['memo'] = self.memo.stats()
+        return data
+
+    def count_calls(self, calls, max_depth):
+        # calls made and deepest nesting from an engine that counts them itself
+        self.calls += calls
+        self.max_call_depth = max(self.max_call_depth, max_depth)
+        self.counted = tuple(set(self.counted) | set(CALL_COUNTERS))
+
+    def write(self, path, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(**extra), f, indent=2)
+            f.write('\n')
+
+def timer(stats):
+    # phase(name) of `stats`, or a no-op context when there are no stats
+    if stats is None:
+        return lambda name: nullcontext()
+    return stats.phase
@@ -0,0 +1,81 @@
+# azhar/streams.py
+
+import sys
+from azhar.errors import RuntimeErrorEx
+
+# Program output goes through an Output rather than print()/sys.stdout, so a
+# program printing thousands of lines makes a handful of write calls instead
+# of one (plus a flush) per line. Engines flush it:
+#   - before read_string()/read_int(), so a prompt is visible before input
+#   - when a program run ends, normally or with an error
+# Writes to a terminal are never held back.
+#
+# Program input comes from an Input: read_string()/read_int() take the next
+# line of its stream, served by the stream's own buffer.
+
+DEFAULT_BUFFER_SIZE = 64 * 1024   # characters held before a write is forced
+
+NOT_AN_INT = "read_int got non-integer input"
+
+def isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):   # no isatty(), or a closed stream
+        return False
+
+class Output:
+    def __init__(self, stream=None, buffered=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        if buffer_size < 1:
+            raise ValueError(f"buffer size must be positive, got {buffer_size}")
+        self.target = stream        # None: whatever sys.stdout is when a run starts
+        self.buffered = buffered    # None: buffer unless the stream is a terminal
+        self.buffer_size = buffer_size
+        self.stream = None
+        self.parts = []
+        self.size = 0
+        self.write = self.write_through
+
+    def open(self):
+        # called by the engines as a program run starts
+        self.stream = sys.stdout if self.target is None else self.target
+        buffered = self.buffered
+        if buffered is None:
+            buffered = not isatty(self.stream)
+        self.write = self.write_buffered if buffered else self.write_through
+
+    def write_buffered(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def write_through(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(''.join(self.parts))
+            self.parts.clear()
+            self.size = 0
+            self.stream.flush()
+
+class Input:
+    def __init__(self, stream=None):
+        self.source = stream    # None: whatever sys.stdin is when a run starts
+        self.stream = None
+
+    def open(self):
+        # called by the engines as a program run starts
+        self.stream = sys.stdin if self.source is None else self.source
+
+    def read_string(self):
+        # the next line without its newline; '' at EOF
+        return self.stream.readline().rstrip('\n')
+
+    def read_int(self):
+        # the VM and closure engines inline this; keep them in step
+        try:
+            return int(self.read_string())   # int() ignores surrounding whitespace
+        except ValueError:
+            raise RuntimeErrorEx(NOT_AN_INT)
@@ -0,0 +1,103 @@
+# azhar/strings.py
+
+from bisect import bisect_right
+from itertools import islice
+from azhar.errors import RuntimeErrorEx
+
+# Run-time side of string concatenation. `a + b` on short strings is plain
+# str concatenation; once a result reaches ROPE_MIN characters it is a Rope
+# instead: a list of chunks, joined the first time the whole text is needed
+# (print, output, comparison) and kept joined from then on.
+#
+# Ropes are values, but they share their chunk list: `r + s` appends s to
+# r's list in place and returns a new Rope covering one more chunk, unless
+# another rope already extended the list past r, in which case r's chunks
+# are copied first. A loop doing `s = s + piece` thus appends in O(1)
+# amortized time instead of copying all of `s` every iteration. len, substr
+# and index work on the chunks without joining them.
+
+ROPE_MIN = 256   # shorter results stay plain str: copying them is cheap
+
+class Rope:
+    __slots__ = ('chunks', 'ends', 'count', 'flat')
+    def __init__(self, chunks, ends, count):
+        self.chunks = chunks   # shared: only chunks[:count] belong to this rope
+        self.ends = ends       # ends[i]: combined length of chunks[0..i]
+        self.count = count
+        self.flat = None       # the joined text, once something needed it
+
+    def __len__(self):
+        return self.ends[self.count - 1]
+
+    def __str__(self):
+        if self.flat is None:
+            self.flat = ''.join(islice(self.chunks, self.count))
+        return self.flat
+
+    # equal to, hashed and ordered like its text, so ropes and strs mix
+    # freely in comparisons, string[] sorting and memo keys
+    def __eq__(self, other): return str(self) == str(other)
+    def __hash__(self): return hash(str(self))
+    def __lt__(self, other): return str(self) < str(other)
+    def __le__(self, other): return str(self) <= str(other)
+    def __gt__(self, other): return str(self) > str(other)
+    def __ge__(self, other): return str(self) >= str(other)
+
+    def extended(self, piece):
+        chunks, ends, count = self.chunks, self.ends, self.count
+        if len(chunks) != count:   # the shared list has moved on past this rope
+            chunks, ends = chunks[:count], ends[:count]
+        chunks.append(piece)
+        ends.append(ends[-1] + len(piece))
+        return Rope(chunks, ends, count + 1)
+
+    def slice(self, start, stop):
+        # the text from `start` to `stop`, joining only the chunks it spans
+        i = bisect_right(self.ends, start, 0, self.count)   # chunk holding `start`
+        begin = self.ends[i - 1] if i else 0                # where chunk i starts
+        parts = []
+        while start < stop:
+            parts.append(self.chunks[i][start - begin:stop - begin])
+            start = begin = self.ends[i]
+            i += 1
+        return ''.join(parts)
+
+    def find(self, sub):
+        # first position of `sub`, or -1, scanning chunk by chunk; `tail`
+        # carries the end of what was scanned, for matches across chunks
+        keep = len(sub) - 1
+        tail, offset = '', 0   # offset: position of tail[0]
+        for chunk in islice(self.chunks, self.count):
+            window = tail + chunk
+            at = window.find(sub)
+            if at >= 0:
+                return offset + at
+            cut = max(len(window) - keep, 0)
+            tail, offset = window[cut:], offset + cut
+        return -1
+
+def concat(left, right):
+    if not right:
+        return left
+    if type(left) is Rope:
+        return left.extended(str(right))
+    length = len(left) + len(right)
+    if length < ROPE_MIN:
+        return left + right   # both str: a rope is never this short
+    right = str(right)
+    return Rope([left, right], [len(left), length], 2)
+
+def substr(text, start, length):
+    # the `length` characters from position `start`
+    if start < 0 or length < 0 or start + length > len(text):
+        raise RuntimeErrorEx(f"substr({start}, {length}) out of range for a string of length {len(text)}")
+    if type(text) is Rope and text.flat is None:
+        return text.slice(start, start + length)
+    return str(text)[start:start + length]
+
+def index(text, sub):
+    # position of the first `sub` in `text`, or -1
+    sub = str(sub)
+    if type(text) is Rope and text.flat is None:
+        return text.find(sub)
+    return str(text).find(sub)
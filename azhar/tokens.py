@@ -22,24 +22,27 @@ TOKEN_GREATER_THAN = 'GREATER_THAN'
 TOKEN_GREATER_EQUALS = 'GREATER_EQUALS'
 TOKEN_LPAREN = 'LPAREN'
 TOKEN_RPAREN = 'RPAREN'
-TOKEN_LBRACK = 'LBRACK'   # reserved for future arrays
-TOKEN_RBRACK = 'RBRACK'   # reserved for future arrays
+TOKEN_LBRACK = 'LBRACK'   # arrays: `int[]`, `[1, 2]`, `a[i]`
+TOKEN_RBRACK = 'RBRACK'
+TOKEN_LBRACE = 'LBRACE'   # map literals: `{"a": 1}`
+TOKEN_RBRACE = 'RBRACE'
 TOKEN_COLON = 'COLON'
 TOKEN_ARROW = 'ARROW'
 TOKEN_NEWLINE = 'NEWLINE'
 TOKEN_EOF = 'EOF'
 TOKEN_COMMA = 'COMMA'
 TOKEN_DOT = 'DOT'         # reserved for future field access
+TOKEN_DOTDOT = 'DOTDOT'   # `for i in a .. b`
 
 KEYWORDS = {
     'let','function','do','end','if','else','return','true','false',
-    'print','output','and','or','read_string','read_int','while','break','void',
-    'int','string','bool'
+    'print','output','and','or','read_string','read_int','while','for','in','break','void','import',
+    'int','string','bool','map'
 }
 
-TYPE_KEYWORDS = {'int','string','bool','void'}
+TYPE_KEYWORDS = {'int','string','bool','void','map'}
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     type: str
     value: object = None
@@ -49,3 +52,9 @@ class Token:
         if self.value is None:
             return f"Token({self.type})"
         return f"Token({self.type}, {repr(self.value)})"
+
+# Type annotations are the most repeated tokens in a program and their own
+# position is never reported (diagnostics point at the declared name), so the
+# parser keeps one shared token per type instead of one per occurrence.
+TYPE_TOKENS = {name: Token(TOKEN_TYPE, name) for name in TYPE_KEYWORDS}
+TYPE_TOKENS.update((f"{name}[]", Token(TOKEN_TYPE, f"{name}[]")) for name in ('int', 'string', 'bool'))
@@ -1,7 +1,29 @@
 # azhar/types.py
 
+import operator
+import os
+from azhar import arrays, maps, strings
+from azhar.arrays import ELEMENT_TYPES, CONSTRUCTORS, GETTERS
+from azhar.builtins import BUILTIN_FUNCTIONS
 from azhar.errors import TypeErrorEx
 
+# The operation each operator performs, chosen here once from the operand
+# types and stored on the node (`node.op`) so engines never re-dispatch on
+# the operator token while running.
+ARITHMETIC = {
+    'PLUS': operator.add, 'MINUS': operator.sub,
+    'MULTIPLY': operator.mul, 'DIVIDE': operator.floordiv,
+}
+COMPARISON = {
+    'LESS_THAN': operator.lt, 'LESS_EQUALS': operator.le,
+    'GREATER_THAN': operator.gt, 'GREATER_EQUALS': operator.ge,
+}
+EQUALITY = {'DOUBLE_EQUALS': operator.eq, 'NOT_EQUALS': operator.ne}
+UNARY = {'PLUS': operator.pos, 'MINUS': operator.neg}
+
+EMPTY_ARRAY = '[]'   # type of `[]` until it is assigned to a declared array type
+EMPTY_MAP = '{}'     # likewise for `{}` and map types
+
 class Symbol:
     def __init__(self, name, type_name): self.name = name; self.type_name = type_name
 
@@ -34,16 +56,33 @@ class Scope:
         return None
 
 class TypeChecker:
-    def __init__(self, file="<stdin>"):
+    def __init__(self, file="<stdin>", loader=None):
         self.global_scope = Scope()
         self.current = self.global_scope
         self.file = file
+        self.loader = loader    # azhar.modules.Loader for imports; a default one if None
+        self.imported = {}      # function name -> FunctionDef brought in by an import
+        self.loop_depth = 0
+        self.return_type = None   # of the function being checked
 
     def check(self, node):
         m = getattr(self, f'visit_{type(node).__name__}', None)
         if not m: raise TypeErrorEx("Internal: missing type check method", self.file)
         return m(node)
 
+    def assignable(self, node, value_type, target_type):
+        # can `node`, of `value_type`, go where `target_type` is expected? An
+        # empty `[]` or `{}` takes on the array or map type expected of it.
+        if value_type == target_type:
+            return True
+        if value_type == EMPTY_ARRAY and target_type in ELEMENT_TYPES:
+            node.type_name, node.op = target_type, CONSTRUCTORS[target_type]
+            return True
+        if value_type == EMPTY_MAP and maps.split(target_type):
+            node.type_name = target_type
+            return True
+        return False
+
     def visit_Program(self, node):
         for st in node.statements:
             self.check(st)
@@ -56,11 +95,12 @@ class TypeChecker:
         sym = self.current.lookup(node.name)
         if sym is None:
             raise TypeErrorEx(f"Undeclared variable '{node.name}'", self.file, node.token.line, node.token.col)
+        node.type_name = sym.type_name
         return sym.type_name
 
     def visit_VarDecl(self, node):
         val_type = self.check(node.value_node)
-        if val_type != node.type_name:
+        if not self.assignable(node.value_node, val_type, node.type_name):
             raise TypeErrorEx(f"Cannot assign {val_type} to {node.type_name}", self.file, node.name_token.line, node.name_token.col)
         self.current.define(node.name, node.type_name)
         return 'void'
@@ -70,41 +110,106 @@ class TypeChecker:
         if sym is None:
             raise TypeErrorEx(f"Variable '{node.name}' not declared", self.file, node.name_token.line, node.name_token.col)
         val_type = self.check(node.value_node)
-        if val_type != sym.type_name:
+        if not self.assignable(node.value_node, val_type, sym.type_name):
             raise TypeErrorEx(f"Cannot assign {val_type} to {sym.type_name}", self.file, node.name_token.line, node.name_token.col)
         return 'void'
 
+    def visit_ArrayLiteral(self, node):
+        types = {self.check(e) for e in node.elements}
+        if not types:
+            node.type_name, node.op = EMPTY_ARRAY, arrays.string_array   # unless assigned somewhere typed
+            return EMPTY_ARRAY
+        if len(types) > 1:
+            raise TypeErrorEx("Array elements must all have the same type", self.file, node.line, node.col)
+        node.type_name = f"{types.pop()}[]"
+        if node.type_name not in ELEMENT_TYPES:
+            raise TypeErrorEx(f"Arrays hold int, bool or string, not {node.type_name[:-2]}", self.file, node.line, node.col)
+        node.op = CONSTRUCTORS[node.type_name]
+        return node.type_name
+
+    def visit_MapLiteral(self, node):
+        node.op = maps.map_literal
+        if not node.items:
+            node.type_name = EMPTY_MAP   # unless assigned somewhere typed
+            return EMPTY_MAP
+        keys = {self.check(k) for k in node.items[::2]}
+        values = {self.check(v) for v in node.items[1::2]}
+        if len(keys) > 1 or len(values) > 1:
+            raise TypeErrorEx("Map keys must all have the same type, and so must values", self.file, node.line, node.col)
+        key, value = keys.pop(), values.pop()
+        if key not in maps.KEY_TYPES:
+            raise TypeErrorEx(f"Map keys must be int, string or bool, not {key}", self.file, node.line, node.col)
+        if value in (EMPTY_ARRAY, EMPTY_MAP):
+            raise TypeErrorEx(f"Cannot tell the type of {value} as a map value", self.file, node.line, node.col)
+        node.type_name = maps.map_type(key, value)
+        return node.type_name
+
+    def element_type(self, target, index):
+        # -> (type of `target`, type of `target`[`index`])
+        t = self.check(target)
+        entry = maps.split(t)
+        if entry is not None:
+            if self.check(index) != entry[0]:
+                raise TypeErrorEx(f"Keys of {t} must be {entry[0]}", self.file)
+            return t, entry[1]
+        if t not in ELEMENT_TYPES:
+            raise TypeErrorEx(f"Cannot index {t}", self.file)
+        if self.check(index) != 'int':
+            raise TypeErrorEx("Array index must be int", self.file)
+        return t, ELEMENT_TYPES[t]
+
+    def visit_Index(self, node):
+        t, node.type_name = self.element_type(node.target, node.index)
+        node.op = GETTERS[t] if t in GETTERS else maps.get
+        return node.type_name
+
+    def visit_IndexAssign(self, node):
+        t, element = self.element_type(node.target, node.index)
+        if not self.assignable(node.value_node, self.check(node.value_node), element):
+            kind = "Elements" if t in ELEMENT_TYPES else "Values"
+            raise TypeErrorEx(f"{kind} of {t} must be {element}", self.file, node.line, node.col)
+        node.op = arrays.put if t in ELEMENT_TYPES else maps.put
+        return 'void'
+
     def visit_BinOp(self, node):
+        node.type_name, node.op = self.binary(node)
+        return node.type_name
+
+    def binary(self, node):
+        # -> (result type, operation)
         # logical and/or tokens are KEYWORD type with values
         if node.op_token.type == 'KEYWORD':
             if node.op_token.value in ('and','or'):
                 lt = self.check(node.left); rt = self.check(node.right)
                 if lt != 'bool' or rt != 'bool':
                     raise TypeErrorEx("Logical operations require bool", self.file)
-                return 'bool'
+                return 'bool', None   # short-circuits: engines handle it
         lt = self.check(node.left); rt = self.check(node.right)
         t = node.op_token.type
-        if t in ('PLUS','MINUS','MULTIPLY','DIVIDE'):
+        if t == 'PLUS' and lt == rt == 'string':
+            return 'string', strings.concat
+        if t in ARITHMETIC:
             if lt != 'int' or rt != 'int':
                 raise TypeErrorEx("Arithmetic requires int", self.file)
-            return 'int'
-        if t in ('LESS_THAN','LESS_EQUALS','GREATER_THAN','GREATER_EQUALS'):
+            return 'int', ARITHMETIC[t]
+        if t in COMPARISON:
             if lt != 'int' or rt != 'int':
                 raise TypeErrorEx("Comparison requires int", self.file)
-            return 'bool'
-        if t in ('DOUBLE_EQUALS','NOT_EQUALS'):
+            return 'bool', COMPARISON[t]
+        if t in EQUALITY:
             if lt != rt:
                 raise TypeErrorEx("Equality requires same types", self.file)
-            return 'bool'
+            return 'bool', EQUALITY[t]
         raise TypeErrorEx("Unknown binary operator", self.file)
 
     def visit_UnaryOp(self, node):
         t = self.check(node.node)
-        if node.op_token.type in ('PLUS','MINUS'):
+        if node.op_token.type in UNARY:
             if t != 'int':
                 raise TypeErrorEx("Unary +/- require int", self.file)
+            node.type_name, node.op = 'int', UNARY[node.op_token.type]
             return 'int'
-        return t
+        raise TypeErrorEx("Unknown unary operator", self.file)
 
     def visit_If(self, node):
         ct = self.check(node.cond)
@@ -118,7 +223,26 @@ class TypeChecker:
         ct = self.check(node.cond)
         if ct != 'bool':
             raise TypeErrorEx("while condition must be bool", self.file, node.line, node.col)
+        self.loop_depth += 1
         self.check(node.body)
+        self.loop_depth -= 1
+        return 'void'
+
+    def visit_For(self, node):
+        if self.check(node.start) != 'int' or self.check(node.stop) != 'int':
+            raise TypeErrorEx("for loop bounds must be int", self.file, node.line, node.col)
+        prev = self.current
+        self.current = Scope(prev)   # the loop variable is only seen by the body
+        self.current.define(node.name, 'int')
+        self.loop_depth += 1
+        self.check(node.body)
+        self.loop_depth -= 1
+        self.current = prev
+        return 'void'
+
+    def visit_Break(self, node):
+        if self.loop_depth == 0:
+            raise TypeErrorEx("'break' outside of a loop", self.file, node.line, node.col)
         return 'void'
 
     def visit_Block(self, node):
@@ -129,7 +253,37 @@ class TypeChecker:
         self.current = prev
         return 'void'
 
+    def visit_Import(self, node):
+        # the module's functions join the global scope by signature alone;
+        # their bodies were checked when the module was loaded
+        from azhar.modules import Loader, CircularImport, signature   # azhar.modules imports this module
+        if self.current is not self.global_scope:
+            raise TypeErrorEx("import is only allowed at the top level", self.file, node.line, node.col)
+        if self.loader is None:
+            self.loader = Loader()
+        base = os.path.dirname(self.file) if os.path.isfile(self.file) else ''
+        try:
+            node.module = self.loader.load(os.path.join(base, node.path))
+        except CircularImport:
+            raise TypeErrorEx(f"Circular import of '{node.path}'", self.file, node.line, node.col) from None
+        except OSError as e:
+            raise TypeErrorEx(f"Cannot import '{node.path}': {e.strerror}", self.file, node.line, node.col) from None
+        for func in node.module.functions:
+            if self.imported.get(func.name) is func:
+                continue   # the same module again, directly or through another
+            if func.name in self.global_scope.functions:
+                raise TypeErrorEx(f"Function '{func.name}' imported from '{node.path}' is already defined",
+                                  self.file, node.line, node.col)
+            name, param_types, ret_type = signature(func)
+            params = [(p.value, t) for (p, _), t in zip(func.params, param_types)]
+            self.global_scope.define_func(name, params, ret_type)
+            self.imported[name] = func
+        return 'void'
+
     def visit_FunctionDef(self, node):
+        if self.current is self.global_scope and node.name in self.imported:
+            raise TypeErrorEx(f"Function '{node.name}' is already imported", self.file,
+                              node.name_token.line, node.name_token.col)
         ret_type = node.return_type_token.value if node.return_type_token else 'void'
         params = [(p[0].value, p[1].value) for p in node.params]
         self.current.define_func(node.name, params, ret_type)
@@ -138,26 +292,47 @@ class TypeChecker:
         for pname, ptype in params:
             func_scope.define(pname, ptype)
         self.current = func_scope
+        outer_loops, self.loop_depth = self.loop_depth, 0  # break cannot leave a function
+        outer_return, self.return_type = self.return_type, ret_type
         self.check(node.body)
+        self.loop_depth = outer_loops
+        self.return_type = outer_return
         self.current = prev
         return 'void'
 
     def visit_Call(self, node):
         fsym = self.current.lookup_func(node.name)
         if fsym is None:
+            if node.name in BUILTIN_FUNCTIONS:
+                return self.builtin_call(node)
             raise TypeErrorEx(f"Undefined function '{node.name}'", self.file, node.name_token.line, node.name_token.col)
         if len(node.args) != len(fsym.params):
             raise TypeErrorEx(f"Function '{node.name}' expects {len(fsym.params)} args, got {len(node.args)}", self.file)
         for arg, (_, ptype) in zip(node.args, fsym.params):
             at = self.check(arg)
-            if at != ptype:
+            if not self.assignable(arg, at, ptype):
                 raise TypeErrorEx(f"Argument type mismatch for '{node.name}'", self.file, node.name_token.line, node.name_token.col)
+        node.type_name, node.op = fsym.return_type, None
         return fsym.return_type
 
+    def builtin_call(self, node):
+        types = [self.check(arg) for arg in node.args]
+        signature = BUILTIN_FUNCTIONS[node.name](types)
+        if signature is None:
+            raise TypeErrorEx(f"Cannot call {node.name}({', '.join(types)})", self.file,
+                              node.name_token.line, node.name_token.col)
+        node.type_name, node.op = signature
+        return node.type_name
+
     def visit_Return(self, node):
         if node.expr is None: return 'void'
-        return self.check(node.expr)
+        t = self.check(node.expr)
+        if self.return_type is not None and self.assignable(node.expr, t, self.return_type):
+            return self.return_type
+        return t
 
     def visit_Print(self, node): self.check(node.expr); return 'void'
     def visit_Output(self, node): self.check(node.expr); return 'void'
-    def visit_ReadInput(self, node): return 'string' if node.kind == 'read_string' else 'int'
+    def visit_ReadInput(self, node):
+        node.type_name = 'string' if node.kind == 'read_string' else 'int'
+        return node.type_name
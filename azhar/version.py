@@ -0,0 +1,3 @@
+# azhar/version.py
+
+__version__ = "0.7.0"
@@ -0,0 +1,177 @@
+# azhar/vm.py
+
+from azhar.bytecode import *
+from azhar.compiler import Compiler
+from azhar.resolver import Resolver
+from azhar.errors import RuntimeErrorEx
+from azhar.streams import Output, Input, NOT_AN_INT
+from azhar import purity
+from azhar.purity import MISSING
+
+DEFAULT_MAX_DEPTH = 100_000   # nested (non-tail) Azhar calls
+
+class VM:
+    def __init__(self, file="<stdin>", output=None, input=None, max_depth=DEFAULT_MAX_DEPTH, memo=None, stats=None):
+        if max_depth < 1:
+            raise ValueError(f"max depth must be positive, got {max_depth}")
+        self.file = file
+        self.max_depth = max_depth
+        self.memo = memo   # azhar.purity.Memo: answer calls to pure functions from it
+        self.stats = stats   # azhar.stats.Stats to add the calls of each run to
+        self.calls_made = self.max_call_depth = 0   # by the last run; counted always
+        self.output = Output() if output is None else output
+        self.input = Input() if input is None else input
+        self.resolver = Resolver(file=file)
+        self.compiler = Compiler(file=file)
+        self.global_frame = [None]   # slot 0: no enclosing frame
+
+    def run(self, program):
+        return self.run_code(self.compile(program))
+
+    def compile(self, program):
+        # -> the program's Code; it holds no run state, so any VM can run it
+        # again (azhar.embed compiles once and runs it per request)
+        self.resolver.resolve(program)
+        if self.memo is not None:
+            purity.analyze(program)
+        return self.compiler.compile_program(program)
+
+    def run_code(self, code):
+        frame = self.global_frame
+        frame.extend([None] * (code.frame_size - len(frame)))
+        self.output.open()
+        self.input.open()
+        try:
+            return self.execute(code, frame)
+        finally:
+            self.output.flush()  # also when the program fails
+
+    def execute(self, code, frame):
+        # Azhar calls never recurse in Python: a CALL saves the caller's
+        # (instructions, pc, frame, key) on `calls` and jumps into the callee,
+        # and RETURN pops it back. All frames share one operand stack; a callee
+        # finds its arguments on top and leaves its result there. `key` is set
+        # when a pure function missed the memo, and RETURN stores its result.
+        instructions = code.instructions
+        out, inp = self.output, self.input
+        max_depth = self.max_depth
+        memo = self.memo
+        calls = []
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        made = deepest = 0   # calls, and the most nested at once
+        try:
+            while True:
+                op, arg = instructions[pc]
+                pc += 1
+                if op == LOAD_LOCAL:
+                    push(frame[arg])
+                elif op == LOAD_CONST:
+                    push(arg)
+                elif op == STORE_LOCAL:
+                    frame[arg] = pop()
+                elif op == BINARY_OP:
+                    right = pop()
+                    stack[-1] = arg(stack[-1], right)
+                elif op == POP_JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == LOAD_OUTER:
+                    depth, slot = arg
+                    f = frame[0]
+                    while depth > 1:
+                        f = f[0]; depth -= 1
+                    push(f[slot])
+                elif op == STORE_OUTER:
+                    depth, slot = arg
+                    f = frame[0]
+                    while depth > 1:
+                        f = f[0]; depth -= 1
+                    f[slot] = pop()
+                elif op == CALL or op == TAIL_CALL:
+                    callee, depth, argc = arg
+                    link = frame
+                    while depth:
+                        link = link[0]; depth -= 1
+                    key = None
+                    if memo is not None and callee.pure and op == CALL:
+                        key = (callee, *stack[len(stack) - argc:])
+                        value = memo.lookup(key)
+                        if value is not MISSING:
+                            del stack[len(stack) - argc:]
+                            push(value)
+                            continue
+                    new = [link]
+                    if argc:
+                        new += stack[-argc:]
+                        del stack[-argc:]
+                    new += [None] * (callee.frame_size - 1 - argc)
+                    made += 1
+                    if op == CALL:
+                        if len(calls) >= max_depth:
+                            raise RuntimeErrorEx(f"Maximum call depth ({max_depth}) exceeded calling '{callee.name}'", self.file)
+                        calls.append((instructions, pc, frame, key))
+                        if len(calls) > deepest:
+                            deepest = len(calls)
+                    instructions = callee.instructions
+                    frame = new
+                    pc = 0
+                elif op == CALL_BUILTIN:
+                    fn, argc = arg
+                    if argc:
+                        args = stack[len(stack) - argc:]
+                        del stack[len(stack) - argc:]
+                        push(fn(*args))
+                    else:
+                        push(fn())
+                elif op == RETURN:
+                    if not calls:
+                        return pop()
+                    instructions, pc, frame, key = calls.pop()   # result stays on the stack
+                    if key is not None:
+                        memo.store(key, stack[-1])
+                elif op == POP:
+                    pop()
+                elif op == FOR_ITER:
+                    it, slot, end = arg
+                    value = next(frame[it], None)   # never None while values remain
+                    if value is None:
+                        pc = end
+                    else:
+                        frame[slot] = value
+                elif op == GET_RANGE:
+                    stop = pop()
+                    frame[arg] = iter(range(pop(), stop))
+                elif op == UNARY_OP:
+                    stack[-1] = arg(stack[-1])
+                elif op == JUMP_IF_FALSE_OR_POP:
+                    if not stack[-1]:
+                        pc = arg
+                    else:
+                        pop()
+                elif op == JUMP_IF_TRUE_OR_POP:
+                    if stack[-1]:
+                        pc = arg
+                    else:
+                        pop()
+                elif op == PRINT:
+                    out.write(f"{pop()}\n")
+                elif op == OUTPUT:
+                    out.write(str(pop()))
+                elif op == READ_STRING:
+                    out.flush()
+                    push(inp.read_string())
+                elif op == READ_INT:
+                    out.flush()
+                    try: push(int(inp.read_string()))
+                    except ValueError: raise RuntimeErrorEx(NOT_AN_INT)
+                else:
+                    raise RuntimeErrorEx(f"Internal: bad opcode {op}")
+        finally:
+            self.calls_made, self.max_call_depth = made, deepest
+            if self.stats is not None:
+                self.stats.count_calls(made, deepest)
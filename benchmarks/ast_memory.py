@@ -0,0 +1,65 @@
+# benchmarks/ast_memory.py — resident size of a parsed program, per AST node
+#
+#   python benchmarks/ast_memory.py [--lines N]
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar import ast as AST
+
+FUNCTION = '''function score_{i}(a: int, b: int) -> int do
+    let total: int = a * {i} + b
+    if total > 100 and b != 0 do
+        total = total / b
+    else do
+        total = total - 1
+    end
+    while total > 10 do
+        total = total - score_base(a)
+    end
+    print("score {i}")
+    return total
+end
+'''
+
+def generate(lines):
+    parts = ['function score_base(x: int) -> int do\n    return x + 1\nend\n']
+    count, i = 3, 0
+    while count < lines:
+        chunk = FUNCTION.format(i=i)
+        parts.append(chunk)
+        count += chunk.count('\n')
+        i += 1
+    return ''.join(parts)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure memory held by a parsed Azhar program.")
+    ap.add_argument('--lines', type=int, default=100_000)
+    opts = ap.parse_args(argv)
+    src = generate(opts.lines)
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    program = Parser(Lexer(src, file="<bench>").iter_tokens(), file="<bench>").parse()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = sum(1 for _ in AST.walk(program))
+    print(f"lines:          {src.count(chr(10)):,}")
+    print(f"AST nodes:      {nodes:,}")
+    print(f"held:           {held / 2**20:.1f} MiB ({held / nodes:.0f} bytes/node, tokens included)")
+    print(f"peak:           {peak / 2**20:.1f} MiB")
+    print(f"parse time:     {elapsed:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
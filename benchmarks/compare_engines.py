@@ -0,0 +1,60 @@
+# benchmarks/compare_engines.py — time each execution engine on the sample programs
+#
+#   python benchmarks/compare_engines.py [--repeat N] [program.azhar ...]
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.typechecker import TypeChecker
+from azhar.engines import ENGINES, make_engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        src = f.read()
+    program = Parser(Lexer(src, file=path).tokenize(), file=path).parse()
+    TypeChecker(file=path).check(program)
+    return program
+
+def time_engine(engine, program, repeat):
+    best = None
+    old_out = sys.stdout
+    try:
+        for _ in range(repeat):
+            sys.stdout = io.StringIO()
+            interp = make_engine(engine)
+            t0 = time.perf_counter()
+            interp.run(program)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        sys.stdout = old_out
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare Azhar execution engines.")
+    ap.add_argument('programs', nargs='*')
+    ap.add_argument('--repeat', type=int, default=3, help="best-of-N timing (default: 3)")
+    opts = ap.parse_args(argv)
+    programs = opts.programs or sorted(glob.glob(os.path.join(HERE, '*.azhar')))
+    engines = sorted(ENGINES, key=lambda e: e != 'tree')  # reference engine first
+    print(f"{'program':<20}" + "".join(f"{e:>16}" for e in engines))
+    for path in programs:
+        program = load(path)
+        times = {e: time_engine(e, program, opts.repeat) for e in engines}
+        base = times['tree']
+        cells = [f"{times[e] * 1000:9.1f}ms x{base / times[e]:4.1f}" for e in engines]
+        print(f"{os.path.basename(path):<20}" + "".join(f"{c:>16}" for c in cells))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
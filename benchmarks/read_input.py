@@ -0,0 +1,130 @@
+# benchmarks/read_input.py — read_int() throughput on a large stdin
+#
+#   python benchmarks/read_input.py [--mb N] [--repeat N]
+#
+# Generates N MB of integers, one per line, then times:
+#   - the input layer alone: `int(Input.read_string())` (what the VM and
+#     closure engines do, one readline() per value) against a bulk reader that
+#     reads the whole stream once and hands out its lines, stdin a regular
+#     file and a pipe
+#   - a whole Azhar program summing every integer, per engine, stdin a file
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from azhar.streams import Input
+from azhar.engines import ENGINES
+
+SUM_PROGRAM = '''
+let n: int = {count}
+let total: int = 0
+while n > 0 do
+    total = total + read_int()
+    n = n - 1
+end
+print(total)
+'''
+
+def generate(path, mb):
+    rng = random.Random(12)
+    size = mb * 1024 * 1024
+    lines = []
+    while size > 0:
+        line = str(rng.randint(-10**6, 10**6))
+        lines.append(line)
+        size -= len(line) + 1
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return len(lines)
+
+class BulkInput:
+    # the alternative to azhar.streams.Input: one read(), then a line index.
+    # Not usable as is: it waits for EOF before the first value, so a program
+    # reading from a terminal or talking to another process would hang.
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = None
+        self.next = 0
+
+    def read_string(self):
+        if self.lines is None:
+            self.lines = self.stream.read().splitlines()
+        i = self.next
+        if i == len(self.lines):
+            return ''
+        self.next = i + 1
+        return self.lines[i]
+
+def open_source(path, kind):
+    if kind == 'file':
+        return open(path, encoding='utf-8')
+    r, w = os.pipe()
+    def feed():
+        with open(path, 'rb') as src, open(w, 'wb') as dst:
+            while True:
+                block = src.read(1 << 16)
+                if not block: break
+                dst.write(block)
+    threading.Thread(target=feed, daemon=True).start()
+    return open(r, encoding='utf-8')
+
+def time_layer(path, count, kind, reader, repeat):
+    best = None
+    for _ in range(repeat):
+        with open_source(path, kind) as stream:
+            t0 = time.perf_counter()
+            total = 0
+            if reader == 'Input':
+                inp = Input(stream)
+                inp.open()
+            else:
+                inp = BulkInput(stream)
+            for _ in range(count):
+                total += int(inp.read_string())
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def time_program(program, data, engine, repeat):
+    best = None
+    for _ in range(repeat):
+        with open(data, 'rb') as stdin:
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'azhar.cli', '--no-cache', f'--engine={engine}', program],
+                           stdin=stdin, stdout=subprocess.DEVNULL, cwd=ROOT, check=True)
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time read_int() on a large stdin.")
+    ap.add_argument('--mb', type=int, default=10, help="input size in MB (default: 10)")
+    ap.add_argument('--repeat', type=int, default=3, help="best-of-N timing (default: 3)")
+    opts = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, 'ints.txt')
+        count = generate(data, opts.mb)
+        print(f"{opts.mb} MB, {count} integers")
+        print(f"{'stdin':<8}{'Input':>12}{'bulk':>12}")
+        for kind in ('file', 'pipe'):
+            line = time_layer(data, count, kind, 'Input', opts.repeat)
+            bulk = time_layer(data, count, kind, 'bulk', opts.repeat)
+            print(f"{kind:<8}{line * 1000:10.1f}ms{bulk * 1000:10.1f}ms")
+        program = os.path.join(tmp, 'sum.azhar')
+        with open(program, 'w', encoding='utf-8') as f:
+            f.write(SUM_PROGRAM.format(count=count))
+        for engine in sorted(ENGINES, key=lambda e: e != 'tree'):
+            print(f"sum.azhar --engine={engine:<8}{time_program(program, data, engine, opts.repeat) * 1000:10.1f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import pytest
+from azhar.engines import ENGINES
+
+# Every test that takes `engine` runs once per execution engine.
+@pytest.fixture(params=sorted(ENGINES))
+def engine(request):
+    return request.param
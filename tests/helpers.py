@@ -0,0 +1,29 @@
+# Shared test helpers: from tests.helpers import checked, run, execute
+
+import io
+from azhar.lexer import Lexer
+from azhar.parser import Parser
+from azhar.typechecker import TypeChecker
+from azhar.engines import DEFAULT_ENGINE, make_engine
+from azhar.streams import Output, Input
+
+def checked(src):
+    # lexed, parsed and type checked, as file "<test>"
+    program = Parser(Lexer(src, file="<test>").tokenize(), file="<test>").parse()
+    TypeChecker(file="<test>").check(program)
+    return program
+
+def execute(program, engine=DEFAULT_ENGINE, stdin="", output=None, **options):
+    # run `program`, reading `stdin` (a string or a text stream); returns what
+    # it printed, unless it printed to `output`, an azhar.streams.Output
+    # options: engine-specific (memo=..., profiler=..., max_depth=...)
+    out = None
+    if output is None:
+        out = io.StringIO()
+        output = Output(out)
+    stdin = io.StringIO(stdin) if isinstance(stdin, str) else stdin
+    make_engine(engine, file="<test>", output=output, input=Input(stdin), **options).run(program)
+    return None if out is None else out.getvalue()
+
+def run(src, engine=DEFAULT_ENGINE, stdin="", **options):
+    return execute(checked(src), engine, stdin, **options)
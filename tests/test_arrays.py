@@ -0,0 +1,161 @@
+from azhar.engines import make_engine
+from azhar.streams import Output
+from azhar.errors import TypeErrorEx, RuntimeErrorEx
+from azhar.arrays import IntArray, BoolArray
+from azhar import arrays
+from azhar import ast as AST
+import io
+import os
+import subprocess
+import sys
+import pytest
+from tests.helpers import checked, run
+
+PROGRAM = '''
+let xs: int[] = [3, 1, 2]
+let flags: bool[] = [true, false]
+let names: string[] = []
+append(names, "ann")
+append(names, "bob")
+xs[0] = xs[1] + xs[2] * 10
+append(xs, 7)
+function total(a: int[]) -> int do
+    let i: int = 0
+    let s: int = 0
+    while i < len(a) do
+        s = s + a[i]
+        i = i + 1
+    end
+    return s
+end
+function fresh() -> bool[] do
+    return []
+end
+let alias: int[] = xs
+alias[3] = 8
+print(xs)
+print(flags[1])
+print(names[1])
+print(len(names))
+print(total(xs))
+print(len(fresh()))
+'''
+
+def test_arrays_on_every_engine(engine):
+    assert run(PROGRAM, engine) == "[21, 1, 2, 8]\nFalse\nbob\n2\n32\n0\n"
+
+@pytest.mark.parametrize('src, message', [
+    ('let a: int[] = [1, "x"]', "same type"),
+    ('let a: int[] = [true]', r"Cannot assign bool\[\] to int\[\]"),
+    ('let a: int = 1\nprint(a[0])', "Cannot index int"),
+    ('let a: int[] = [1]\nprint(a[true])', "index must be int"),
+    ('let a: string[] = []\na[0] = 1', r"Elements of string\[\] must be string"),
+    ('let a: int[] = []\nappend(a, "x")', r"Cannot call append\(int\[\], string\)"),
+    ('print(len(3))', r"Cannot call len\(int\)"),
+])
+def test_type_errors(src, message):
+    with pytest.raises(TypeErrorEx, match=message):
+        checked(src)
+
+def test_compact_storage():
+    program = checked('let a: int[] = [1, 2]\nlet b: bool[] = []\nlet c: int[] = [5]')
+    assert program.statements[1].value_node.type_name == 'bool[]'   # `[]` typed by its declaration
+    out = io.StringIO()
+    engine = make_engine('vm', file="<test>", output=Output(out))
+    engine.run(program)
+    a, b = engine.global_frame[1], engine.global_frame[2]
+    assert isinstance(a, IntArray) and a.itemsize == 8
+    assert isinstance(b, BoolArray) and b.itemsize == 1
+
+@pytest.mark.parametrize('src, message', [
+    ('let a: int[] = [1]\nprint(a[1])', "index 1 out of range for an array of length 1"),
+    ('let a: int[] = [1]\nprint(a[0 - 1])', "index -1 out of range"),
+    ('let a: int[] = [1]\nappend(a, 9223372036854775807 + 1)', "must fit in 64 bits"),
+])
+def test_runtime_errors(src, message, engine):
+    with pytest.raises(RuntimeErrorEx, match=message):
+        run(src, engine)
+
+BULK = '''
+let xs: int[] = add(mul(range(5), 3), range(10, 15))
+print(xs)
+print(sum(xs) + min(xs) * 1000 + max(xs) * 100000)
+let ys: int[] = [5, 3, 9, 3]
+sort(ys)
+print(ys)
+print(count(ys, 3))
+fill(ys, 7)
+print(ys)
+let names: string[] = ["bob", "ann"]
+sort(names)
+print(names)
+function sum(a: int) -> int do
+    return a
+end
+print(sum(4))
+'''
+
+def test_bulk_operations(engine):
+    # a user function named like a built-in one takes its place
+    assert run(BULK, engine) == "[10, 14, 18, 22, 26]\n2610090\n[3, 3, 5, 9]\n2\n[7, 7, 7, 7]\n[ann, bob]\n4\n"
+
+@pytest.mark.parametrize('src, message', [
+    ('let a: bool[] = []\nprint(sum(a))', r"Cannot call sum\(bool\[\]\)"),
+    ('let a: bool[] = []\nsort(a)', r"Cannot call sort\(bool\[\]\)"),
+    ('let a: int[] = []\nfill(a, "x")', r"Cannot call fill\(int\[\], string\)"),
+    ('let a: string[] = []\nprint(add(a, 1))', r"Cannot call add\(string\[\], int\)"),
+    ('print(range(true))', r"Cannot call range\(bool\)"),
+])
+def test_bulk_type_errors(src, message):
+    with pytest.raises(TypeErrorEx, match=message):
+        checked(src)
+
+@pytest.mark.parametrize('src, message', [
+    ('let a: int[] = []\nprint(min(a))', "min of an empty array"),
+    ('print(add(range(2), range(3)))', r"add: arrays of different lengths \(2 and 3\)"),
+    ('print(mul(range(3), 9223372036854775807))', "must fit in 64 bits"),
+])
+def test_bulk_runtime_errors(src, message, engine):
+    with pytest.raises(RuntimeErrorEx, match=message):
+        run(src, engine)
+
+def test_index_assignment_parses_to_its_own_node():
+    program = checked('let a: int[] = [0]\na[0] = 5\nprint(a[0])')
+    assert isinstance(program.statements[1], AST.IndexAssign)
+    assert AST.dump(program).count('Index') == 2
+
+BIG = 2**62
+VECTOR_CASES = [
+    [3, -1, 4, 1, -5, 9],
+    [BIG, BIG, -3],           # sum overflows int64: the exact version must answer
+    [-2**63, 0, 2**63 - 1],   # extremes: bound() itself exceeds INT_MAX
+]
+
+@pytest.mark.parametrize('values', VECTOR_CASES)
+def test_numpy_path_matches_the_fallback(values, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(arrays, 'NUMPY_MIN_LENGTH', 1)   # small arrays take the NumPy route
+    def each(items):
+        results = [arrays.int_sum(items), arrays.int_min(items), arrays.int_max(items),
+                   arrays.count(items, values[0]), arrays.count(items, 2**70)]
+        for op in (arrays.add, arrays.mul):
+            for other in (IntArray(values[::-1]), 2, BIG, -1):
+                try:
+                    results.append(op(items, other).tolist())
+                except RuntimeErrorEx as e:
+                    results.append(str(e))
+        sorted_items = IntArray(items)
+        arrays.sort(sorted_items)
+        return results + [sorted_items.tolist(), arrays.int_range(-2, 5).tolist()]
+    assert arrays.vectorized(IntArray(values))
+    fast = each(IntArray(values))
+    monkeypatch.setattr(arrays, 'numpy', False)   # as if not installed
+    assert not arrays.vectorized(IntArray(values))
+    assert fast == each(IntArray(values))
+
+def test_cli_startup_does_not_import_numpy():
+    # NumPy is loaded by the first large bulk operation, never at startup
+    code = "import sys, azhar.cli; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout == "False\n"
@@ -0,0 +1,38 @@
+import json
+from azhar import bench
+
+SRC = '''
+function sq(n: int) -> int do
+    return n * n
+end
+let total: int = 0
+let k: int = read_int()
+while k > 0 do
+    total = total + sq(k)
+    k = k - 1
+end
+print(total)
+'''
+
+def test_regressions_need_threshold_and_noise_floor():
+    old = {'p.azhar': {'phases_ms': {'lex': 10.0, 'parse': 0.1}, 'run_ms': {'vm': 100.0}}}
+    new = {'p.azhar': {'phases_ms': {'lex': 12.0, 'parse': 0.5}, 'run_ms': {'vm': 130.0}},
+           'new.azhar': {'phases_ms': {'lex': 1.0}, 'run_ms': {}}}
+    # lex: +20% but under the threshold; parse: x5 but under the noise floor
+    assert bench.regressions(new, old, threshold=0.25) == ["p.azhar run[vm]: 100.00 ms -> 130.00 ms (+30%)"]
+    assert len(bench.regressions(new, old, threshold=0.1)) == 2
+
+def test_save_then_compare(tmp_path, capsys):
+    program = tmp_path / "sq.azhar"
+    program.write_text(SRC, encoding="utf-8")
+    (tmp_path / "sq.in").write_text("5000\n", encoding="utf-8")
+    baseline = tmp_path / "baseline.json"
+    args = [str(program), '--engine=vm', '--repeat=1', f'--baseline={baseline}']
+    assert bench.main(args + ['--save']) == 0
+    result = json.loads(baseline.read_text(encoding="utf-8"))['results']['sq.azhar']
+    assert result['calls'] == 5000 and result['tokens'] > 0 and set(result['run_ms']) == {'vm'}
+
+    result['run_ms']['vm'] = 0.001   # pretend it used to be far faster
+    baseline.write_text(json.dumps({'results': {'sq.azhar': result}}), encoding="utf-8")
+    assert bench.main(args) == 1
+    assert "sq.azhar run[vm]" in capsys.readouterr().out
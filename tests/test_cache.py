@@ -0,0 +1,61 @@
+import gc
+import os
+from azhar import cache
+from azhar import cli
+from azhar.errors import TypeErrorEx
+import pytest
+
+SRC = '''
+function sq(n:int) -> int do
+    return n * n
+end
+print(sq(7))
+'''
+
+def write(tmp_path, src):
+    path = tmp_path / "prog.azhar"
+    path.write_text(src, encoding="utf-8")
+    return str(path)
+
+def test_second_run_skips_front_end(tmp_path, capsys, engine, monkeypatch):
+    path = write(tmp_path, SRC)
+    cli.run_file(path, engine=engine)
+    assert os.path.exists(cache.cache_path(path))
+    assert cache.cache_path(path).startswith(str(tmp_path / cache.CACHE_DIR))
+
+    def no_front_end(*args):
+        raise AssertionError("front end ran on a cache hit")
+    monkeypatch.setattr(cli, "check_stream", no_front_end)
+    cli.run_file(path, engine=engine)
+    assert capsys.readouterr().out == "49\n49\n"
+
+def test_changed_source_or_tag_is_a_miss(tmp_path, capsys, monkeypatch):
+    path = write(tmp_path, SRC)
+    cli.run_file(path)
+    write(tmp_path, SRC.replace("7", "8"))
+    cli.run_file(path)
+    monkeypatch.setattr(cache, "CACHE_TAG", "other-build")
+    cli.run_file(path)
+    assert capsys.readouterr().out == "49\n64\n64\n"
+
+def test_bad_programs_and_corrupt_entries(tmp_path, capsys):
+    path = write(tmp_path, 'let x: int = "no"')
+    with pytest.raises(TypeErrorEx):
+        cli.run_file(path)
+    assert not os.path.exists(cache.cache_path(path))
+
+    path = write(tmp_path, "print(1)")
+    os.makedirs(os.path.dirname(cache.cache_path(path)), exist_ok=True)
+    with open(cache.cache_path(path), "wb") as f:
+        f.write(b"not a pickle")
+    cli.run_file(path)
+    cli.run_file(path, use_cache=False)
+    assert capsys.readouterr().out == "1\n1\n"
+
+def test_paused_gc_restores_the_collector_and_freezes_nothing():
+    frozen = gc.get_freeze_count()
+    with cache.paused_gc():
+        assert not gc.isenabled()
+        garbage = [[] for _ in range(1000)]
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == frozen
@@ -0,0 +1,42 @@
+import pytest
+from azhar import check
+
+LIB = 'function sq(n: int) -> int do\n    return n * n\nend\n'
+GOOD = 'import "lib/sq.azhar"\nprint(sq(3))\n'
+BAD = 'let x: int = "no"\n'
+
+def tree(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "a.azhar").write_text(GOOD, encoding="utf-8")
+    (tmp_path / "lib/b.azhar").write_text(BAD, encoding="utf-8")
+    (tmp_path / "lib/sq.azhar").write_text(LIB, encoding="utf-8")
+    (tmp_path / "notes.txt").write_text(BAD, encoding="utf-8")
+    return tmp_path
+
+def test_expand_finds_azhar_files_in_order(tmp_path):
+    root = tree(tmp_path)
+    (root / "__azharcache__").mkdir()
+    (root / "__azharcache__/x.azhar").write_text(BAD, encoding="utf-8")
+    files = check.expand([str(root), "other.azhar"])
+    assert [f[len(str(root)) + 1:] for f in files[:-1]] == ["a.azhar", "lib/b.azhar", "lib/sq.azhar"]
+    assert files[-1] == "other.azhar"
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_errors_are_reported_and_status_is_aggregated(tmp_path, capsys, jobs):
+    root = tree(tmp_path)
+    assert check.main([str(root), '-j', jobs]) == 1
+    err = capsys.readouterr().err
+    assert "b.azhar" in err and "Cannot assign" in err
+    assert err.endswith("3 file(s) checked, 1 with errors\n")
+    assert not (root / "__azharcache__").exists()   # nothing cached, nothing run
+
+def test_clean_files_and_missing_ones(tmp_path, capsys):
+    root = tree(tmp_path)
+    assert check.main([str(root / "a.azhar"), '-j', '2']) == 0
+    assert capsys.readouterr() == ("", "1 file(s) checked, 0 with errors\n")
+    assert check.main([str(root / "a.azhar"), str(root / "lib/b.azhar"), str(root / "gone.azhar")]) == 2
+    assert "File not found" in capsys.readouterr().err
+
+def test_usage_errors():
+    assert check.main([]) == 64
+    assert check.main(['x.azhar', '-j', '0']) == 64
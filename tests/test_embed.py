@@ -0,0 +1,60 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+import azhar
+from azhar import embed, purity
+from azhar.purity import Memo
+from azhar.resolver import Resolver
+from azhar.errors import TypeErrorEx, RuntimeErrorEx
+
+SRC = '''
+let seen: int[] = []
+function square(n: int) -> int do
+    return n * n
+end
+let k: int = read_int()
+while k > 0 do
+    append(seen, square(k))
+    k = k - 1
+end
+print(seen)
+print(read_string())
+'''
+
+def test_compile_once_run_many(engine, capsys, monkeypatch):
+    program = azhar.compile(SRC, engine=engine)
+    monkeypatch.setattr(embed, 'Parser', None)   # runs must not go back to the front end
+    monkeypatch.setattr(embed, 'TypeChecker', None)
+    assert program.run(stdin="3\nhi\n") == "[9, 4, 1]\nhi\n"
+    assert program.run(stdin="1\nagain") == "[1]\nagain\n"   # globals start over
+    out = io.StringIO()
+    assert program.run(stdin=io.StringIO("2\nx\n"), stdout=out) is None
+    assert out.getvalue() == "[4, 1]\nx\n"
+    assert capsys.readouterr() == ("", "")   # sys.stdout never used
+
+def test_runs_only_read_the_program(engine, monkeypatch):
+    # scopes and purity are worked out once, in compile(); runs only read them
+    program = azhar.compile(SRC, engine=engine, memo=Memo())
+    monkeypatch.setattr(Resolver, 'resolve', None)
+    monkeypatch.setattr(purity, 'analyze', None)
+    assert program.run(stdin="2\nhi\n") == "[4, 1]\nhi\n"
+    assert program.run(stdin="1\nhi\n") == "[1]\nhi\n"
+
+def test_errors(engine):
+    with pytest.raises(TypeErrorEx, match="Cannot assign"):
+        azhar.compile('let x: int = "a"')
+    program = azhar.compile('let a: int[] = [5, 6]\nprint(a[read_int()])', engine=engine)
+    assert program.run(stdin="1") == "6\n"
+    with pytest.raises(RuntimeErrorEx):
+        program.run(stdin="7")
+    assert program.run(stdin="0") == "5\n"   # a failed run leaves nothing behind
+    with pytest.raises(ValueError, match="Unknown engine"):
+        azhar.compile('print(1)', engine='jit')
+
+def test_cli_startup_does_not_load_the_embedding_layer():
+    code = "import sys, azhar.cli; print(sorted({'azhar.embed', 'azhar.bench', 'azhar.check'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout == "[]\n"
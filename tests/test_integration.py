@@ -1,9 +1,4 @@
-from io import StringIO
-import sys
-from azhar.lexer import Lexer
-from azhar.parser import Parser
-from azhar.types import TypeChecker
-from azhar.interp import Interpreter
+from tests.helpers import run
 
 TICTACTOE_SMOKE = '''
 let b1: string = "1"
@@ -16,20 +11,7 @@ print("AZHAR")
 draw()
 '''
 
-def run(src):
-    tokens = Lexer(src, file="<test>").tokenize()
-    program = Parser(tokens, file="<test>").parse()
-    TypeChecker(file="<test>").check(program)
-    interp = Interpreter()
-    old = sys.stdout
-    try:
-        sys.stdout = StringIO()
-        interp.run(program)
-        return sys.stdout.getvalue()
-    finally:
-        sys.stdout = old
-
-def test_integration_smoke():
-    out = run(TICTACTOE_SMOKE)
+def test_integration_smoke(engine):
+    out = run(TICTACTOE_SMOKE, engine=engine)
     assert "AZHAR" in out  # prints banner [attached_file:1]
     assert "123" in out.replace("\n","")  # draw outputs 1 2 3 inline then newline [attached_file:1]
@@ -1,28 +1,156 @@
-from azhar.lexer import Lexer
-from azhar.parser import Parser
-from azhar.types import TypeChecker
-from azhar.interp import Interpreter
-from io import StringIO
-import sys
-
-def run(src, stdin_data=""):
-    tokens = Lexer(src, file="<test>").tokenize()
-    program = Parser(tokens, file="<test>").parse()
-    TypeChecker(file="<test>").check(program)
-    interp = Interpreter()
-    old_in, old_out = sys.stdin, sys.stdout
-    try:
-        sys.stdin = StringIO(stdin_data)
-        sys.stdout = StringIO()
-        interp.run(program)
-        return sys.stdout.getvalue()
-    finally:
-        sys.stdin, sys.stdout = old_in, old_out
-
-def test_print_and_assign():
-    out = run('let x: int = 1\nx = x + 2\nprint(x)')
+from azhar.purity import Memo
+from azhar.errors import RuntimeErrorEx
+import pytest
+from tests.helpers import run
+
+def test_print_and_assign(engine):
+    out = run('let x: int = 1\nx = x + 2\nprint(x)', engine=engine)
     assert out.strip() == "3"  # 1 + 2 printed [attached_file:1]
 
-def test_read_int():
-    out = run('let n: int = read_int()\nprint(n + 5)', stdin_data="7\n")
+def test_read_int(engine):
+    out = run('let n: int = read_int()\nprint(n + 5)', engine, stdin="7\n")
     assert out.strip() == "12"  # read 7, add 5 [attached_file:1]
+
+def test_while_break_and_recursion(engine):
+    src = '''
+function fib(n: int) -> int do
+    if n < 2 do
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+let i: int = 0
+while true do
+    if i == 3 do
+        break
+    end
+    output(fib(i + 5))
+    output(" ")
+    i = i + 1
+end
+print(-7 / 2)
+'''
+    assert run(src, engine=engine) == "5 8 13 -4\n"
+
+def test_block_shadowing_and_nested_functions(engine):
+    src = '''
+let x: int = 1
+function outer(n: int) -> int do
+    let acc: int = 10
+    function inner(k: int) -> int do
+        return acc + k + x
+    end
+    if n > 0 do
+        let x: int = 100
+        acc = acc + x
+    end
+    return inner(n)
+end
+print(outer(2))
+print(x)
+'''
+    assert run(src, engine=engine) == "113\n1\n"
+
+def test_functions_are_lexically_scoped(engine):
+    # f sees the x and h where it is defined, not those of its caller
+    src = '''
+let x: int = 1
+function h() -> int do
+    return 10
+end
+function f() -> int do
+    return x + h()
+end
+function g() -> int do
+    let x: int = 2
+    function h() -> int do
+        return 20
+    end
+    return f() + h()
+end
+print(g())
+'''
+    assert run(src, engine=engine) == "31\n"
+
+def test_memoized_calls_match_lexical_scoping(engine):
+    src = '''
+let x: int = 1
+function f(n: int) -> int do
+    return n + x
+end
+function g() -> int do
+    let x: int = 2
+    return f(1) + f(1)
+end
+print(g())
+'''
+    assert run(src, engine, memo=Memo()) == "4\n"
+
+def test_return_from_inside_while(engine):
+    src = '''
+function first_square_above(limit: int) -> int do
+    let i: int = 0
+    while true do
+        while true do
+            if i * i > limit do
+                return i
+            end
+            break
+        end
+        i = i + 1
+    end
+    return -1
+end
+print(first_square_above(50))
+'''
+    assert run(src, engine=engine) == "8\n"
+
+def test_for_loop(engine):
+    src = '''
+let total: int = 0
+for i in 0 .. 10 do
+    let sq: int = i * i
+    total = total + sq
+    if i == 7 do
+        break
+    end
+end
+function pair(n: int) -> int do
+    for a in 1 .. n do
+        for b in a .. n do
+            if a * b == 12 do
+                return a * 100 + b
+            end
+        end
+    end
+    return 0
+end
+let i: int = 5
+for i in i .. i + 2 do
+    output(i)
+end
+for k in 3 .. 1 do
+    print(k)
+end
+print(i)
+print(total + pair(10))
+'''
+    assert run(src, engine=engine) == "565\n346\n"   # 5 6, then the outer i; 140 + 206
+
+def test_for_body_declarations_do_not_outlive_the_iteration(engine):
+    src = '''
+let x: int = 1
+for i in 0 .. 3 do
+    output(x)
+    let x: int = i + 10
+    output(x)
+end
+print(x)
+'''
+    assert run(src, engine=engine) == "1101111121\n"
+
+def test_runaway_recursion_is_a_runtime_error():
+    src = 'function f(n: int) -> int do\nreturn f(n + 1) + 1\nend\nprint(f(0))'
+    for engine in ("tree", "closure"):
+        with pytest.raises(RuntimeErrorEx, match="Maximum recursion depth exceeded"):
+            run(src, engine=engine)
@@ -1,6 +1,8 @@
 import io
+import pytest
 from azhar.lexer import Lexer
 from azhar.tokens import *
+from azhar.errors import LexerError
 
 def lex(src):
     return [t for t in Lexer(src, file="<test>").tokenize() if t.type != TOKEN_NEWLINE]
@@ -15,3 +17,33 @@ def test_strings_and_ops():
     ts = lex('print("hi")\nif true do end\nx == 1 and 2 != 3')
     kinds = [t.type for t in ts]
     assert TOKEN_STRING in kinds and TOKEN_DOUBLE_EQUALS in kinds and TOKEN_NOT_EQUALS in kinds  # string and ==, != present [attached_file:1]
+
+def test_positions_and_escapes():
+    ts = Lexer('let s: string = "a\\n\\"b"\n  print(s) // done', file="<test>").tokenize()
+    assert ts[5].type == TOKEN_STRING and ts[5].value == 'a\n"b'
+    pr = [t for t in ts if t.value == 'print'][0]
+    assert (pr.line, pr.col) == (2, 3)
+    assert (ts[-1].type, ts[-1].line, ts[-1].col) == (TOKEN_EOF, 2, 19)
+
+def test_multiline_string_advances_line():
+    ts = lex('"one\ntwo" x')
+    assert ts[0].value == "one\ntwo"
+    assert (ts[1].line, ts[1].col) == (2, 6)
+
+def test_lexer_errors():
+    cases = [('let x: int = 1.5', "Floats are not supported.", 1, 14),
+             ('print(1)\nprint("abc)', "Unterminated string.", 2, 7),
+             ('x = !y', "Unexpected '!'", 1, 5),
+             ('x = @', "Unexpected character '@'", 1, 5)]
+    for src, msg, line, col in cases:
+        with pytest.raises(LexerError) as ei:
+            Lexer(src, file="<test>").tokenize()
+        err = ei.value
+        assert (err.args[0], err.line, err.col) == (msg, line, col)
+        assert err.snippet == src.splitlines()[line - 1]
+
+def test_stream_matches_text():
+    src = 'let s: string = "two\nlines" // c\nprint(s)\n'
+    from_text = [(t.type, t.value, t.line, t.col) for t in Lexer(src, file="<test>").tokenize()]
+    from_stream = [(t.type, t.value, t.line, t.col) for t in Lexer.from_stream(io.StringIO(src), file="<test>").iter_tokens()]
+    assert from_stream == from_text
@@ -0,0 +1,50 @@
+from azhar.errors import TypeErrorEx, RuntimeErrorEx, ParseError
+import pytest
+from tests.helpers import checked, run
+
+PROGRAM = '''
+let ages: map[string]int = {"ann": 31, "bob": 27}
+ages["cy"] = 40
+ages["ann"] = ages["ann"] + 1
+delete(ages, "bob")
+delete(ages, "nobody")
+print(ages)
+print(has(ages, "bob"))
+print(keys(ages))
+print(sum(values(ages)))
+let groups: map[int]string[] = {}
+groups[7] = []
+append(groups[7], "x")
+print(groups)
+function lookup(m: map[string]int, k: string) -> int do
+    if has(m, k) do
+        return m[k]
+    end
+    return 0
+end
+print(lookup(ages, "cy") + lookup(ages, "q") + len(ages))
+'''
+
+def test_maps_on_every_engine(engine):
+    assert run(PROGRAM, engine) == "{ann: 32, cy: 40}\nFalse\n[ann, cy]\n72\n{7: [x]}\n42\n"
+
+@pytest.mark.parametrize('src, message', [
+    ('let m: map[string]int = {"a": 1, "b": "x"}', "same type"),
+    ('let m: map[string]int = {1: 1}', r"Cannot assign map\[int\]int to map\[string\]int"),
+    ('let m: map[string]int = {}\nprint(m[1])', r"Keys of map\[string\]int must be string"),
+    ('let m: map[string]int = {}\nm["a"] = true', r"Values of map\[string\]int must be int"),
+    ('let m: map[int]int[] = {}\nprint(values(m))', r"Cannot call values\(map\[int\]int\[\]\)"),
+    ('let m: map[int]int = {}\nprint(has(m, "a"))', r"Cannot call has\(map\[int\]int, string\)"),
+])
+def test_type_errors(src, message):
+    with pytest.raises(TypeErrorEx, match=message):
+        checked(src)
+
+@pytest.mark.parametrize('src', ['let m: map[int[]]int = {}', 'let m: map[int]void = {}', 'let m: map = {}'])
+def test_bad_map_types(src):
+    with pytest.raises(ParseError):
+        checked(src)
+
+def test_missing_key(engine):
+    with pytest.raises(RuntimeErrorEx, match="key 3 not in map"):
+        run('let m: map[int]bool = {1: true}\nprint(m[3])', engine)
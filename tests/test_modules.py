@@ -0,0 +1,84 @@
+import io
+import sys
+import pytest
+from azhar import cli, modules
+from azhar.errors import TypeErrorEx
+
+UTIL = '''
+function twice(n: int) -> int do
+    return n * 2
+end
+'''
+
+SHAPES = '''
+import "util.azhar"
+function area(w: int, h: int) -> int do
+    return twice(w * h) / 2
+end
+'''
+
+MAIN = '''
+import "lib/shapes.azhar"
+import "lib/util.azhar"
+print(area(3, 4) + twice(5))
+'''
+
+def write(tmp_path, files):
+    for name, text in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return str(tmp_path / "main.azhar")
+
+def test_import_on_every_engine(tmp_path, capsys, engine):
+    main = write(tmp_path, {'lib/util.azhar': UTIL, 'lib/shapes.azhar': SHAPES, 'main.azhar': MAIN})
+    cli.run_file(main, engine=engine, use_cache=False)
+    assert capsys.readouterr().out == "22\n"
+
+def test_modules_load_once_and_persist(tmp_path, monkeypatch):
+    write(tmp_path, {'util.azhar': UTIL})
+    path = str(tmp_path / "util.azhar")
+    module = modules.Loader().load(path)
+    assert modules.Loader().load(path) is module
+    assert [f.name for f in module.functions] == ['twice']
+    monkeypatch.setattr(modules, 'LOADED', {})
+    monkeypatch.setattr(modules, 'Parser', None)   # a new process: only the .azm can serve it
+    assert modules.Loader().load(path).interface == module.interface
+
+def test_cached_importer_is_checked_again_when_exports_change(tmp_path, capsys):
+    main = write(tmp_path, {'lib/util.azhar': UTIL, 'lib/shapes.azhar': SHAPES, 'main.azhar': MAIN})
+    cli.run_file(main)
+    cli.run_file(main)   # from __azharcache__
+    assert capsys.readouterr().out == "22\n22\n"
+    (tmp_path / 'lib/util.azhar').write_text(UTIL.replace('n * 2', 'n * 3'), encoding="utf-8")
+    cli.run_file(main)   # same exports: only the new body matters
+    assert capsys.readouterr().out == "33\n"
+    (tmp_path / 'lib/util.azhar').write_text(UTIL.replace('n: int', 'n: int, m: int'), encoding="utf-8")
+    with pytest.raises(TypeErrorEx, match="expects 2 args") as e:   # the cached shapes module is stale
+        cli.run_file(main)
+    assert e.value.file.endswith("shapes.azhar")
+
+@pytest.mark.parametrize('files, message', [
+    ({'lib/util.azhar': 'let x: int = 1', 'main.azhar': 'import "lib/util.azhar"'}, "can only define functions"),
+    ({'a.azhar': 'import "b.azhar"', 'b.azhar': 'import "a.azhar"', 'main.azhar': 'import "a.azhar"'},
+     "Circular import of 'a.azhar'"),
+    ({'main.azhar': 'import "missing.azhar"'}, "Cannot import 'missing.azhar'"),
+    ({'lib/util.azhar': UTIL, 'main.azhar': 'import "lib/util.azhar"\nfunction twice() -> void do end'},
+     "'twice' is already imported"),
+    ({'lib/util.azhar': UTIL, 'main.azhar': 'if true do\nimport "lib/util.azhar"\nend'}, "only allowed at the top level"),
+])
+def test_import_errors(tmp_path, files, message):
+    main = write(tmp_path, files)
+    with pytest.raises(TypeErrorEx, match=message):
+        cli.run_file(main, use_cache=False)
+
+def test_dump_ast_from_stdin_loads_imports_with_the_cli_options(tmp_path, monkeypatch, capsys):
+    write(tmp_path, {'lib/util.azhar': UTIL})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(modules, 'LOADED', {})
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('import "lib/util.azhar"\nprint(twice(2))\n'))
+    monkeypatch.setattr(sys, 'argv', ['azhar', '--no-cache', '--opt-level=0', '--dump-ast', '-'])
+    assert cli.main() == 0
+    assert "Import" in capsys.readouterr().out
+    assert [opt for _, opt in modules.LOADED] == [0]
+    assert not (tmp_path / "lib" / "__azharcache__").exists()
@@ -0,0 +1,67 @@
+from azhar.optimizer import Optimizer
+from azhar import ast as AST
+from tests.helpers import checked, execute
+
+def optimized(src, level=2):
+    return Optimizer(level).optimize(checked(src))
+
+PROGRAM = '''
+let day: int = 60 * 60 * 24
+print(day)
+print(-7 / 2 * 1 + 0)
+print(- -read_int() / 1)
+let s: bool = "a" == "a" and 2 >= 3
+if s do
+    print(1)
+else do
+    let day: int = 0
+    print(day + 1)
+end
+while false do
+    print(2)
+end
+function f(n: int) -> int do
+    while true do
+        if n > 3 or false do
+            return n
+            print(99)
+        end
+        n = n + 1 * 1
+    end
+    return 0
+end
+print(f(0))
+print(day)
+'''
+
+def test_folding_keeps_semantics(engine):
+    expected = execute(optimized(PROGRAM, 0), engine, "-5\n")
+    assert expected == "86400\n-4\n-5\n1\n4\n86400\n"
+    for level in (1, 2):
+        assert execute(optimized(PROGRAM, level), engine, "-5\n") == expected
+
+def test_optimized_tree():
+    assert AST.dump(optimized('let x: int = 2 * 3 + 1\nif 1 < 2 do print(x * 1) end')) == '''\
+Program
+  VarDecl x: int
+    Number 7
+  Block
+    Print
+      VarAccess x'''
+    # level 1 folds but leaves identities and unreachable code alone
+    assert AST.dump(optimized('function f(n: int) -> int do\nreturn n + 0\nprint(1)\nend', 1)) == '''\
+Program
+  FunctionDef f(n: int) -> int
+    Block
+      Return
+        BinOp +
+          VarAccess n
+          Number 0
+      Print
+        Number 1'''
+
+def test_side_effects_and_errors_are_kept():
+    # a call is never dropped, and division by zero is left for run time
+    program = optimized('function f() -> int do\nprint(1)\nreturn 0\nend\nprint(f() * 1)\nprint(1 / 0)')
+    assert isinstance(program.statements[1].expr, AST.Call)
+    assert isinstance(program.statements[2].expr, AST.BinOp)
@@ -29,3 +29,27 @@ end
     program = parse(src)
     assert any(isinstance(s, AST.FunctionDef) for s in program.statements)  # function parsed [attached_file:1]
     assert any(isinstance(s, AST.While) for s in program.statements)        # while parsed [attached_file:1]
+
+class LineFeed:
+    # a stream that records how many lines the lexer has pulled
+    def __init__(self, lines): self.lines = list(lines); self.read = 0
+    def readline(self):
+        if self.read == len(self.lines): return ''
+        self.read += 1
+        return self.lines[self.read - 1]
+
+def test_statements_parsed_as_read():
+    feed = LineFeed(['let a: int = 1\n', 'print(a)\n', 'let b: int = 2\n', 'print(b)\n'])
+    parser = Parser(Lexer.from_stream(feed, file="<test>").iter_tokens(), file="<test>")
+    stmts = parser.iter_statements()
+    assert isinstance(next(stmts), AST.VarDecl)
+    assert feed.read <= 2  # only the lookahead has been pulled, not the whole source
+    assert len(list(stmts)) == 3
+
+def test_nodes_are_slotted_and_names_shared():
+    program = parse('let total: int = 1\ntotal = total + 1\nlet other: int = total')
+    decl, assign, other = program.statements
+    assert not hasattr(decl, '__dict__') and not hasattr(decl.name_token, '__dict__')
+    assert decl.name is assign.name is assign.value_node.left.name  # interned identifier
+    assert decl.type_token is other.type_token                      # shared type token
+    assert sum(1 for _ in AST.walk(program)) == 9
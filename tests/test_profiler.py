@@ -0,0 +1,52 @@
+from azhar.profiler import Profiler
+from azhar import cli
+import sys
+import pytest
+from tests.helpers import run
+
+PROGRAM = '''function fib(n: int) -> int do
+    if n < 2 do
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+function twice(n: int) -> int do
+    return fib(n) * 2
+end
+print(twice(10))
+'''
+
+def profile(engine):
+    profiler = Profiler()
+    assert run(PROGRAM, engine, profiler=profiler) == "110\n"
+    return profiler
+
+@pytest.mark.parametrize('engine', ['tree', 'closure'])
+def test_counts_calls_and_lines(engine):
+    profiler = profile(engine)
+    calls = {s.name: s.calls for s in profiler.functions.values()}
+    assert calls == {'<program>': 1, 'twice': 1, 'fib': 177}
+    hits = {line: s.hits for line, s in profiler.lines.items()}
+    assert hits[2] == 177 and hits[3] == 89 and hits[5] == 88 and hits[10] == 1
+    fib = next(s for s in profiler.functions.values() if s.name == 'fib')
+    assert 0 < fib.own == fib.total   # recursive: timed once, from the outermost call
+    assert profiler.calls == [] and profiler.statements == []
+
+@pytest.mark.parametrize('engine', ['tree', 'closure'])
+def test_report_and_collapsed_stacks(engine):
+    profiler = profile(engine)
+    report = profiler.report(PROGRAM)
+    assert report.splitlines()[0].split() == ['function', 'line', 'calls', 'total', 'ms', 'self', 'ms']
+    assert "return fib(n - 1) + fib(n - 2)" in report
+    profiler.stacks = {('<program>', 'twice', 'fib'): 2_500_000, ('<program>',): 999}
+    assert profiler.collapsed() == "<program>;twice;fib 2500\n"
+
+def test_unwritable_stacks_path_is_an_error_not_a_traceback(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "fib.azhar"
+    path.write_text(PROGRAM, encoding="utf-8")
+    stacks = tmp_path / "missing" / "stacks.txt"
+    monkeypatch.setattr(sys, 'argv', ['azhar', '--no-cache', '--profile', f'--profile-stacks={stacks}', str(path)])
+    assert cli.main() == 3
+    captured = capsys.readouterr()
+    assert captured.out == "110\n"
+    assert f"azhar: cannot write {stacks}: No such file or directory" in captured.err
@@ -0,0 +1,75 @@
+from azhar.resolver import Resolver
+from azhar.purity import analyze, Memo, MISSING
+from azhar import ast as AST
+from tests.helpers import checked, run
+
+def purity(src):
+    program = checked(src)
+    Resolver(file="<test>").resolve(program)
+    analyze(program)
+    return {n.name: n.pure for n in AST.walk(program) if isinstance(n, AST.FunctionDef)}
+
+FIB = '''
+function fib(n: int) -> int do
+    if n < 2 do
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+print(fib(60))
+'''
+
+def test_pure_and_impure_functions():
+    assert purity(FIB + '''
+let total: int = 0
+function noisy(n: int) -> int do
+    print(n)
+    return n
+end
+function global_read(n: int) -> int do
+    return n + total
+end
+function uses_noisy(n: int) -> int do
+    return noisy(n) * 2
+end
+function with_helper(n: int) -> int do
+    let acc: int = 0
+    function step(k: int) -> int do
+        acc = acc + k
+        return acc
+    end
+    step(n)
+    return acc
+end
+''') == {'fib': True, 'noisy': False, 'global_read': False, 'uses_noisy': False,
+         'with_helper': True, 'step': False}
+
+def test_impurity_spreads_through_callers():
+    assert purity('''
+function ask() -> int do
+    return read_int()
+end
+function twice(n: int) -> int do
+    return n * 2
+end
+function middle(n: int) -> int do
+    return twice(n) + ask()
+end
+function top(n: int) -> int do
+    return twice(middle(n))
+end
+''') == {'ask': False, 'twice': True, 'middle': False, 'top': False}
+
+def test_memo_is_a_bounded_lru():
+    memo = Memo(2)
+    memo.store('a', 1)
+    memo.store('b', 2)
+    assert memo.lookup('a') == 1   # 'b' is now least recently used
+    memo.store('c', 3)
+    assert memo.lookup('b') is MISSING
+    assert memo.stats() == {'hits': 1, 'misses': 1, 'entries': 2, 'size': 2}
+
+def test_memoized_calls_on_every_engine(engine):
+    memo = Memo()
+    assert run(FIB, engine, memo=memo) == "1548008755920\n"   # unmemoized this would never finish
+    assert memo.misses == 61 and memo.hits > 0
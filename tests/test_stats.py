@@ -0,0 +1,76 @@
+import json
+import sys
+from azhar import cli
+from azhar.stats import Stats
+from tests.helpers import run
+
+SRC = '''
+let x: int = 1
+function f(n: int) -> int do
+    return n + x
+end
+print(f(2))
+'''
+
+def test_tree_engine_counters(tmp_path, capsys):
+    path = tmp_path / "prog.azhar"
+    path.write_text(SRC, encoding="utf-8")
+    stats = Stats()
+    cli.run_file(str(path), use_cache=False, stats=stats)
+    assert capsys.readouterr().out == "3\n"
+    counters = stats.as_dict()['counters']
+    # n is one link out of the body's block, x two
+    assert counters['variable_lookups'] == 2 and counters['avg_lookup_depth'] == 1.5
+    assert counters['function_calls'] == counters['max_call_depth'] == 1
+    assert counters['environments_allocated'] == 2   # parameters + body block
+    assert list(stats.phases) == ['lex', 'parse', 'typecheck', 'optimize', 'run']
+
+def test_cli_writes_json(tmp_path, capsys, monkeypatch, engine):
+    path = tmp_path / "prog.azhar"
+    path.write_text(SRC, encoding="utf-8")
+    out = tmp_path / "stats.json"
+    monkeypatch.setattr(sys, 'argv', ['azhar', f'--engine={engine}', '--memoize', f'--stats={out}', str(path)])
+    assert cli.main() == 0
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data['engine'] == engine and data['script'] == str(path)
+    assert {'run', 'typecheck'} <= set(data['phases_ms'])
+    assert data['memo']['misses'] == 0   # f reads a global: not pure, never memoized
+    counters = data['counters']
+    assert counters['function_calls'] == counters['max_call_depth'] == 1
+    if engine == 'tree':
+        assert data['counters_unavailable'] == [] and counters['variable_lookups'] == 2
+    else:
+        assert data['counters_unavailable'] == ['nodes_evaluated', 'environments_allocated',
+                                                'variable_lookups', 'avg_lookup_depth']
+
+def test_call_counters_on_every_engine(engine):
+    src = '''
+function depth(n: int) -> int do
+    if n == 0 do
+        return 0
+    end
+    return 1 + depth(n - 1)
+end
+function loop(n: int, acc: int) -> int do
+    if n == 0 do
+        return acc
+    end
+    return loop(n - 1, acc + 1)
+end
+print(depth(5) + loop(3, 0))
+'''
+    stats = Stats()
+    assert run(src, engine, stats=stats) == "8\n"
+    assert stats.calls == 6 + 4
+    # loop() is tail-recursive: the VM reuses its frame, the others nest
+    assert stats.max_call_depth == 6
+
+def test_unwritable_stats_path_keeps_the_exit_status(tmp_path, capsys, monkeypatch):
+    path = tmp_path / "prog.azhar"
+    path.write_text(SRC, encoding="utf-8")
+    out = tmp_path / "missing" / "stats.json"
+    monkeypatch.setattr(sys, 'argv', ['azhar', f'--stats={out}', str(path)])
+    assert cli.main() == 3
+    assert f"azhar: cannot write {out}: No such file or directory" in capsys.readouterr().err
+    path.write_text('print(1 +)', encoding="utf-8")
+    assert cli.main() == 1   # a failed run keeps its own status
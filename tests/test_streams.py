@@ -0,0 +1,70 @@
+import io
+import os
+import pytest
+from azhar.engines import make_engine
+from azhar.streams import Output, Input
+from azhar.errors import RuntimeErrorEx
+from tests.helpers import checked, execute
+
+class CountingStream(io.StringIO):
+    def __init__(self, tty=False):
+        super().__init__()
+        self.writes = 0
+        self.tty = tty
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+    def isatty(self):
+        return self.tty
+
+LOOP = 'let i: int = 0\nwhile i < 10000 do\nprint(i)\noutput("")\ni = i + 1\nend'
+
+def test_output_is_buffered_for_pipes(engine):
+    out = CountingStream()
+    execute(checked(LOOP), engine, output=Output(out, buffer_size=4096))
+    assert out.getvalue() == "".join(f"{i}\n" for i in range(10000))
+    assert out.writes < 20
+
+def test_terminals_and_unbuffered_write_through(engine):
+    for out, output in ((CountingStream(tty=True), None), (CountingStream(), False)):
+        execute(checked(LOOP), engine, output=Output(out, buffered=output))
+        assert out.writes == 20000
+
+def test_flush_before_read_and_on_error(engine):
+    out = CountingStream()
+    class Stdin(io.StringIO):
+        def read(self, size=-1):
+            assert out.getvalue() == "0\nname? "   # the prompt is out already
+            return super().read(size)
+        readline = read
+    src = 'print(0)\noutput("name? ")\nprint(read_string())\nprint(1 / 0)'
+    with pytest.raises(ZeroDivisionError):
+        execute(checked(src), engine, Stdin("bob\n"), output=Output(out))
+    assert out.getvalue() == "0\nname? bob\n"
+
+def read_all(inp, kinds):
+    inp.open()
+    return [inp.read_string() if k == 's' else inp.read_int() for k in kinds]
+
+def test_input_matches_readline_semantics(tmp_path):
+    data = "1\r\n é \r\n\n  -7 \rlast"
+    path = tmp_path / "in.txt"
+    path.write_bytes(data.encode("utf-8"))
+    expected = ["1", " é ", "", -7, "last", ""]
+    kinds = "sssiss"
+    with open(path, encoding="utf-8") as f:
+        assert read_all(Input(f), kinds) == expected
+    r, w = os.pipe()
+    os.write(w, data.encode("utf-8")); os.close(w)
+    with open(r, encoding="utf-8") as f:
+        assert read_all(Input(f), kinds) == expected
+
+def test_read_int_error_and_run_to_run_state(engine):
+    # a run goes on reading where the previous one stopped (REPL)
+    out = io.StringIO()
+    interp = make_engine(engine, file="<test>", output=Output(out), input=Input(io.StringIO("4\nfour\n")))
+    program = checked('print(read_int())')
+    interp.run(program)
+    assert out.getvalue() == "4\n"
+    with pytest.raises(RuntimeErrorEx, match="read_int got non-integer input"):
+        interp.run(program)
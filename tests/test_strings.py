@@ -0,0 +1,55 @@
+from azhar.errors import TypeErrorEx, RuntimeErrorEx
+from azhar.strings import Rope, concat, substr, index, ROPE_MIN
+import pytest
+from tests.helpers import checked, run
+
+PROGRAM = '''
+let s: string = ""
+let i: int = 0
+while i < 100 do
+    s = s + "ab" + "cd"
+    i = i + 1
+end
+let t: string = s
+s = s + "XYZ"
+t = t + "QQ"
+print(len(s))
+print(substr(s, 398, 5))
+print(index(s, "dXY") + index(t, "XYZ"))
+print(t == s)
+print("a" + "b" == "ab")
+'''
+
+def test_concatenation_on_every_engine(engine):
+    assert run(PROGRAM, engine) == "403\ncdXYZ\n398\nFalse\nTrue\n"
+
+def test_appending_shares_chunks_without_aliasing():
+    base = concat("x" * ROPE_MIN, "y")
+    a = concat(base, "a")
+    assert a.chunks is base.chunks                   # appended in place
+    b = concat(base, "b")                            # base's list already grew: copy
+    assert b.chunks is not a.chunks
+    assert (str(base), str(a)[-2:], str(b)[-2:]) == ("x" * ROPE_MIN + "y", "ya", "yb")
+
+def test_substr_and_index_do_not_join():
+    rope = "0123456789" * 30
+    for piece in ("abc", "def", "ghi"):
+        rope = concat(rope, piece)
+    assert isinstance(rope, Rope)
+    assert substr(rope, 298, 6) == "89abcd" and index(rope, "cdefg") == 302 and index(rope, "zz") == -1
+    assert len(rope) == 309 and rope.flat is None
+    assert rope == str(rope) and hash(rope) == hash(str(rope))
+
+@pytest.mark.parametrize('src, message', [
+    ('print("a" + 1)', "Arithmetic requires int"),
+    ('print("a" - "b")', "Arithmetic requires int"),
+    ('print(substr("abc", 1))', r"Cannot call substr\(string, int\)"),
+    ('print(index("abc", 1))', r"Cannot call index\(string, int\)"),
+])
+def test_type_errors(src, message):
+    with pytest.raises(TypeErrorEx, match=message):
+        checked(src)
+
+def test_substr_out_of_range(engine):
+    with pytest.raises(RuntimeErrorEx, match=r"substr\(2, 5\) out of range for a string of length 3"):
+        run('print(substr("abc", 2, 5))', engine)
@@ -1,13 +1,7 @@
 import pytest
-from azhar.lexer import Lexer
-from azhar.parser import Parser
-from azhar.types import TypeChecker
 from azhar.errors import TypeErrorEx
-
-def typecheck(src):
-    tokens = Lexer(src, file="<test>").tokenize()
-    program = Parser(tokens, file="<test>").parse()
-    TypeChecker(file="<test>").check(program)
+import operator
+from tests.helpers import checked as typecheck
 
 def test_good_types():
     typecheck('let a: int = 3\nfunction f(x:int)->int do return x end\n')  # valid decls and function [attached_file:1]
@@ -19,3 +13,29 @@ def test_assignment_type_mismatch():
 def test_undeclared_var():
     with pytest.raises(TypeErrorEx):
         typecheck('a = 1')  # a not declared [attached_file:1]
+
+def test_break_outside_loop():
+    with pytest.raises(TypeErrorEx):
+        typecheck('break')
+    with pytest.raises(TypeErrorEx):
+        typecheck('while true do\nfunction f() -> void do break end\nend')  # loops do not extend into functions
+
+def test_for_loop_variable():
+    typecheck('for i in 0 .. 3 do\nlet j: int = i\nbreak\nend')
+    with pytest.raises(TypeErrorEx, match="bounds must be int"):
+        typecheck('for i in 0 .. "3" do\nend')
+    with pytest.raises(TypeErrorEx, match="Undeclared variable 'i'"):
+        typecheck('for i in 0 .. 3 do\nend\nprint(i)')   # scoped to the body
+    with pytest.raises(TypeErrorEx):
+        typecheck('for i in 0 .. 3 do\ni = true\nend')
+
+def test_expressions_are_annotated():
+    program = typecheck('let a: int = 3\nprint(-a / 2 < 1 and "x" == read_string())')
+    cmp_ = program.statements[1].expr.left
+    assert (cmp_.type_name, cmp_.op) == ('bool', operator.lt)
+    div = cmp_.left
+    assert (div.type_name, div.op) == ('int', operator.floordiv)
+    assert (div.left.type_name, div.left.op, div.left.node.type_name) == ('int', operator.neg, 'int')
+    eq = program.statements[1].expr.right
+    assert (eq.op, eq.right.type_name) == (operator.eq, 'string')
+    assert program.statements[1].expr.op is None   # and/or short-circuit
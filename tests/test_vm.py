@@ -0,0 +1,63 @@
+from azhar.resolver import Resolver
+from azhar.compiler import Compiler
+from azhar.bytecode import *
+from azhar.errors import RuntimeErrorEx
+import pytest
+from tests.helpers import checked, run
+
+def compile_src(src):
+    program = checked(src)
+    Resolver(file="<test>").resolve(program)
+    return Compiler(file="<test>").compile_program(program)
+
+def test_compiles_to_flat_bytecode():
+    code = compile_src('let x: int = 1\nwhile x < 10 do\nx = x * 2\nend')
+    ops = [op for op, _ in code.instructions]
+    assert ops[:2] == [LOAD_CONST, STORE_LOCAL]
+    assert BINARY_OP in ops and POP_JUMP_IF_FALSE in ops and JUMP in ops
+    assert ops[-2:] == [LOAD_CONST, RETURN]
+
+def test_block_locals_share_the_frame():
+    code = compile_src('let a: int = 1\nwhile a < 3 do\nlet b: int = a\na = b + 1\nend')
+    assert code.frame_size == 3  # static link + a + b; blocks allocate no frames
+    assert (STORE_LOCAL, 2) in code.instructions
+
+def test_function_reads_globals_through_static_link():
+    code = compile_src('let g: int = 5\nfunction f(x: int) -> int do\nreturn x + g\nend\nprint(f(1))')
+    call = [arg for op, arg in code.instructions if op == CALL][0]
+    callee, depth, argc = call
+    assert (depth, argc) == (0, 1)
+    assert (LOAD_OUTER, (1, 1)) in callee.instructions
+
+def test_disassemble_shows_calls():
+    text = compile_src('function f(a: int) -> int do return a end\nprint(f(2))').disassemble()
+    assert "CALL" in text and "f depth=0 argc=1" in text
+
+DEEP = '''
+function sum(n: int) -> int do
+    if n == 0 do return 0 end
+    return n + sum(n - 1)
+end
+function count(n: int, acc: int) -> int do
+    if n == 0 do return acc end
+    return count(n - 1, acc + 1)
+end
+print(count(300000, 0))
+print(sum(20000))
+'''
+
+def run_vm(src, **options):
+    return run(src, 'vm', **options)
+
+def test_tail_calls_reuse_the_frame():
+    code = compile_src(DEEP)
+    count = [arg[0] for op, arg in code.instructions if op == CALL][0]
+    assert TAIL_CALL in [op for op, _ in count.instructions]
+    assert "TAIL_CALL" in count.disassemble()
+
+def test_deep_recursion_without_python_recursion():
+    assert run_vm(DEEP) == "300000\n200010000\n"
+
+def test_max_depth_is_a_runtime_error():
+    with pytest.raises(RuntimeErrorEx, match=r"Maximum call depth \(1000\) exceeded calling 'sum'"):
+        run_vm(DEEP, max_depth=1000)